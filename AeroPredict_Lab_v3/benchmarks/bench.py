@@ -0,0 +1,137 @@
+import argparse, json, os, platform, statistics, sys, tempfile, time, numpy as np
+
+# AeroPredict benchmarks. Results are written as JSON ({name: {median_s, p99_s, ...}}) and
+# compared against a stored baseline; any case slower than baseline*tolerance fails the run.
+#   python -m benchmarks.bench --quick --compare benchmarks/baseline.json
+#   python -m benchmarks.bench --quick --out benchmarks/baseline.json   (refresh the baseline)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+def timeit(fn, repeat:int = 5, warmup:int = 1):
+    for _ in range(warmup): fn()
+    ts = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); ts.append(time.perf_counter() - t0)
+    ts.sort()
+    return {"median_s": statistics.median(ts), "min_s": ts[0], "p99_s": ts[min(len(ts)-1, int(round(0.99*(len(ts)-1))))], "repeat": repeat}
+
+def bench_core(sizes, repeat):
+    from src.model import synth_dataset, train_logit, roc_curve, pr_curve, platt_fit, train_ensemble, predict_ensemble, predict_fused
+    from src.calibration import IsotonicCalibrator
+    out = {}
+    for n in sizes:
+        X, y = synth_dataset(n=n, seed=1)
+        out[f"train_logit[gd,n={n}]"] = timeit(lambda: train_logit(X, y, epochs=400), repeat)
+        out[f"train_logit[newton,n={n}]"] = timeit(lambda: train_logit(X, y, solver="newton", epochs=100), repeat)
+        p = np.random.default_rng(0).random(n)
+        out[f"roc_curve[n={n}]"] = timeit(lambda: roc_curve(y, p), repeat)
+        out[f"pr_curve[n={n}]"] = timeit(lambda: pr_curve(y, p), repeat)
+        out[f"platt_fit[n={n}]"] = timeit(lambda: platt_fit(p, y), repeat)
+        out[f"isotonic_fit[n={n}]"] = timeit(lambda: IsotonicCalibrator.fit(p, y), repeat)
+        iso = IsotonicCalibrator.fit(p, y)
+        out[f"isotonic_apply[n={n}]"] = timeit(lambda: iso.apply(p), repeat)
+    # K=32 bootstrap members vs one model, 100 calls of 300 rows each
+    _, _, _, (W, b) = train_ensemble(X[:2000], y[:2000], k=32, epochs=50)
+    Xs = X[:300]; w1, b1 = W[0], float(b[0])
+    out["predict_ensemble[k=32,rows=300,x100]"] = timeit(lambda: [predict_ensemble(Xs, W, b) for _ in range(100)], repeat)
+    out["predict_fused[rows=300,x100]"] = timeit(lambda: [predict_fused(Xs, w1, b1) for _ in range(100)], repeat)
+    return out
+
+def bench_api(sizes, folds, repeat, n_single:int = 300):
+    tmp = tempfile.mkdtemp(prefix="aeropredict-bench-")
+    # always the temp dir: the API publishes models and logs experiments, never into a real registry
+    os.environ["REGISTRY_DIR"] = os.path.join(tmp, "registry")
+    os.environ["EXPERIMENTS_PATH"] = os.path.join(tmp, "experiments.db")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from fastapi.testclient import TestClient
+    from src.api import app
+    from src.model import synth_dataset, FEAT_NAMES
+    c = TestClient(app)
+    c.post("/calibrate")
+    X, _ = synth_dataset(n=max(sizes), seed=2)
+    rows = [dict(zip(FEAT_NAMES, r)) for r in X.tolist()]
+    out = {}
+    lat = []
+    for r in rows[:n_single]:
+        t0 = time.perf_counter(); c.post("/predict", json=r); lat.append(time.perf_counter() - t0)
+    lat.sort()
+    out["predict[single]"] = {"median_s": statistics.median(lat), "min_s": lat[0], "p99_s": lat[int(0.99*(len(lat)-1))], "repeat": len(lat)}
+    for n in sizes:
+        body = {"items": rows[:n]}
+        out[f"predict_batch[n={n}]"] = timeit(lambda: c.post("/predict/batch", json=body), repeat)
+        raw = X[:n].astype("<f4").tobytes()
+        out[f"predict_columnar[n={n}]"] = timeit(lambda: c.post("/predict/columnar", content=raw,
+                                                                 headers={"content-type": "application/octet-stream"}), repeat)
+        for k in folds:
+            req = {"n_samples": max(2000, n), "k_folds": k}
+            out[f"train_cv[n={req['n_samples']},k={k}]"] = timeit(lambda: c.post("/train_cv", json=req), max(1, repeat//2))
+    return out
+
+def bench_startup(repeat):
+    # wall time of a fresh interpreter until the API is live (import done) or ready (model in memory);
+    # "artifact" reuses a published model, "bootstrap" starts from an empty registry
+    import subprocess
+    tmp = tempfile.mkdtemp(prefix="aeropredict-bench-startup-")
+    snippets = {"live": "import src.api", "ready": "import src.api as a; a._active()"}
+    cases = [("eager", "artifact", "ready"), ("lazy", "artifact", "live"), ("lazy", "artifact", "ready"),
+             ("eager", "bootstrap", "ready"), ("lazy", "bootstrap", "live")]
+    out = {}
+    for mode, reg, stage in cases:
+        def run(mode=mode, reg=reg, stage=stage):
+            reg_dir = os.path.join(tmp, "registry") if reg == "artifact" else tempfile.mkdtemp(dir=tmp)
+            env = {**os.environ, "STARTUP_MODE": mode, "REGISTRY_DIR": reg_dir, "EXPERIMENTS_PATH": os.path.join(tmp, "experiments.db"),
+                   "LOG_LEVEL": "WARNING"}
+            subprocess.run([sys.executable, "-c", snippets[stage]], cwd=os.path.dirname(HERE), env=env, check=True)
+        out[f"startup[{mode},{reg},{stage}]"] = timeit(run, repeat)
+    return out
+
+def compare(results, baseline, tolerance:float):
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name)
+        if not b: continue
+        ratio = r["median_s"]/max(b["median_s"], 1e-9)
+        r["baseline_median_s"] = b["median_s"]; r["ratio"] = ratio
+        if ratio > tolerance: regressions.append((name, ratio))
+    return regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="AeroPredict performance benchmarks with baseline regression gate")
+    ap.add_argument("--quick", action="store_true", help="small sizes, for CI / pre-deploy")
+    ap.add_argument("--sizes", default=None, help="comma-separated n values (default: 2000,20000 quick / 10000,100000,300000)")
+    ap.add_argument("--folds", default="3,5", help="comma-separated k values for /train_cv")
+    ap.add_argument("--repeat", type=int, default=None)
+    ap.add_argument("--only", choices=["core","api","startup"], default=None)
+    ap.add_argument("--out", default=None, help="write results JSON here")
+    ap.add_argument("--compare", default=None, help="baseline JSON to gate against")
+    ap.add_argument("--tolerance", type=float, default=1.5, help="fail when median > baseline*tolerance")
+    a = ap.parse_args(argv)
+    if a.compare and not os.path.exists(a.compare): ap.error(f"baseline {a.compare} not found")  # a missing gate must not pass
+    sizes = [int(s) for s in (a.sizes or ("2000,20000" if a.quick else "10000,100000,300000")).split(",")]
+    folds = [int(k) for k in a.folds.split(",") if k]
+    repeat = a.repeat or (3 if a.quick else 7)
+    results = {}
+    if a.only in (None, "core"): results.update(bench_core(sizes, repeat))
+    if a.only in (None, "api"): results.update(bench_api(sizes, folds, repeat))
+    if a.only in (None, "startup"): results.update(bench_startup(repeat))
+    doc = {"meta": {"ts": time.time(), "python": platform.python_version(), "numpy": np.__version__,
+                    "machine": platform.machine(), "cpus": os.cpu_count(), "sizes": sizes, "folds": folds, "repeat": repeat},
+           "results": results}
+    regressions = []
+    if a.compare:
+        with open(a.compare, "r") as f: regressions = compare(results, json.load(f), a.tolerance)
+    for name, r in results.items():
+        extra = f"  x{r['ratio']:.2f} vs baseline" if "ratio" in r else ""
+        print(f"{name:<40} median {r['median_s']*1e3:10.3f} ms  p99 {r['p99_s']*1e3:10.3f} ms{extra}")
+    if a.out:
+        os.makedirs(os.path.dirname(os.path.abspath(a.out)), exist_ok=True)
+        with open(a.out, "w") as f: json.dump(doc, f, indent=2)
+    if regressions:
+        print("\nREGRESSIONS (tolerance x%.2f):" % a.tolerance)
+        for name, ratio in regressions: print(f"  {name}: x{ratio:.2f}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 
-import os, requests, streamlit as st, pandas as pd, numpy as np, matplotlib.pyplot as plt
+import os, time, requests, streamlit as st, pandas as pd, numpy as np, matplotlib.pyplot as plt
 
 API = os.environ.get("API_URL","http://127.0.0.1:8020")
 st.set_page_config(page_title="AeroPredict Lab — v3", page_icon="assets/favicon.png" if os.path.exists("assets/favicon.png") else "✈️", layout="wide")
@@ -7,7 +7,27 @@ st.title("🧪 AeroPredict Lab — v3 (K-fold + Calibración)")
 
 st.sidebar.caption(f"API: `{API}`")
 
-tab1, tab2, tab3, tab4 = st.tabs(["Inferencia", "Entrenar", "CV & Calibración", "Métricas/Logs"])
+def run_job(kind, payload=None):
+    # background job + polling: the API worker is never held for the whole run
+    job = requests.post(f"{API}/jobs/{kind}", json=payload, timeout=15)
+    if job.status_code != 202:
+        st.error(job.json().get("detail", job.text)); return None
+    job_id = job.json()["job_id"]
+    bar = st.progress(0.0, text=f"job {job_id}: en cola")
+    while True:
+        js = requests.get(f"{API}/jobs/{job_id}", timeout=15).json()
+        pr = js.get("progress") or {}
+        if pr.get("total"):
+            bar.progress(min(1.0, pr["done"]/pr["total"]), text=f"job {job_id}: {pr['stage']} {pr['done']}/{pr['total']}")
+        if js["status"] in ("done", "failed", "cancelled"):
+            break
+        time.sleep(0.5)
+    if js["status"] != "done":
+        st.error(f"job {job_id}: {js['status']} {js.get('error') or ''}"); return None
+    bar.progress(1.0, text=f"job {job_id}: listo")
+    return js["result"]
+
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["Inferencia", "Entrenar", "CV & Calibración", "Métricas/Logs", "Monitor"])
 
 with tab1:
     st.subheader("Inferencia puntual")
@@ -21,11 +41,19 @@ with tab1:
         cols[5].number_input("wind_x",    value=0.0),
         cols[6].number_input("wind_y",    value=0.0),
     ]
+    unc = st.checkbox("incertidumbre (requiere ensemble: /train_ensemble)")
     if st.button("Predecir", type="primary"):
         payload = dict(airspeed=vals[0], altitude=vals[1], vspeed=vals[2], pitch=vals[3], roll=vals[4], wind_x=vals[5], wind_y=vals[6])
-        r = requests.post(f"{API}/predict", json=payload, timeout=15).json()
-        st.metric("Prob. inestable", f"{r['prob_unstable']:.2%}")
-        st.caption("Usa calibración Platt si fue entrenada.")
+        resp = requests.post(f"{API}/predict", params={"uncertainty": "true"} if unc else None, json=payload, timeout=15)
+        if resp.status_code != 200:
+            st.error(resp.json().get("detail", resp.text))
+        else:
+            r = resp.json()
+            st.metric("Prob. inestable", f"{r['prob_unstable']:.2%}")
+            if "ensemble" in r:
+                e = r["ensemble"]
+                st.caption(f"ensemble: media {e['mean']:.2%} ± {e['std']:.2%} · intervalo 90% [{e['q05']:.2%}, {e['q95']:.2%}]")
+        st.caption("Usa la calibración de la versión activa (Platt o isotónica) si existe.")
 
 with tab2:
     st.subheader("Entrenamiento simple")
@@ -33,11 +61,12 @@ with tab2:
     lr        = st.number_input("lr", 0.0001, 1.0, 0.05)
     epochs    = st.number_input("epochs", 50, 3000, 400, step=50)
     l2        = st.number_input("l2", 1e-6, 1e-1, 1e-3, format="%.6f")
+    solver    = st.selectbox("solver", ["gd", "newton", "lbfgs"], help="newton/lbfgs paran al converger (tol); epochs es el máximo de iteraciones")
     notes     = st.text_input("notes", "")
     if st.button("Entrenar (simple)", type="primary"):
-        payload = dict(n_samples=int(n_samples), lr=float(lr), epochs=int(epochs), l2=float(l2), notes=notes)
-        res = requests.post(f"{API}/train", json=payload, timeout=120).json()
-        st.success(res)
+        payload = dict(n_samples=int(n_samples), lr=float(lr), epochs=int(epochs), l2=float(l2), solver=solver, notes=notes)
+        res = run_job("train", payload)
+        if res: st.success(res)
 
 with tab3:
     st.subheader("K-fold CV")
@@ -46,25 +75,69 @@ with tab3:
     lr        = st.number_input("lr (CV)", 0.0001, 1.0, 0.05, key="lrcv")
     epochs    = st.number_input("epochs (CV)", 50, 3000, 400, step=50, key="epcv")
     l2        = st.number_input("l2 (CV)", 1e-6, 1e-1, 1e-3, format="%.6f", key="l2cv")
+    solver    = st.selectbox("solver (CV)", ["gd", "newton", "lbfgs"], key="solvercv")
     if st.button("Entrenar CV", type="primary"):
-        payload = dict(n_samples=int(n_samples), k_folds=int(k), lr=float(lr), epochs=int(epochs), l2=float(l2))
-        js = requests.post(f"{API}/train_cv", json=payload, timeout=300).json()
-        st.dataframe(pd.DataFrame(js["per_fold"]), use_container_width=True)
-        st.success(js["summary"])
+        payload = dict(n_samples=int(n_samples), k_folds=int(k), lr=float(lr), epochs=int(epochs), l2=float(l2), solver=solver)
+        js = run_job("train_cv", payload)
+        if js:
+            st.dataframe(pd.DataFrame(js["per_fold"]), use_container_width=True)
+            st.success(js["summary"])
 
     st.divider()
-    st.subheader("Calibración Platt")
+    st.subheader("Calibración")
+    metodo = st.selectbox("método", ["platt", "isotonic"], help="Platt: logístico sobre logit(p). Isotónica: escalones monótonos (PAV).")
     if st.button("Calibrar (auto val set)"):
-        js = requests.post(f"{API}/calibrate", timeout=120).json()
-        st.info(js)
+        js = run_job(f"calibrate?method={metodo}")
+        if js: st.info(js)
 
     st.caption("La calibración ajusta las probabilidades para que reflejen mejor la frecuencia observada.")
 
 with tab4:
-    st.subheader("Experiment log (CSV)")
-    path = "data/experiments.csv"
+    st.subheader("Experiment log")
+    c1, c2 = st.columns([1, 3])
+    n_last = c1.number_input("últimos N", 10, 1000, 50, step=10)
+    event  = c2.selectbox("evento", ["(todos)", "train", "train_cv", "train_ooc", "calibrate", "sweep", "sweep_trial"])
     try:
-        df = pd.read_csv(path)
-        st.dataframe(df, use_container_width=True)
+        params = {"limit": int(n_last)}
+        if event != "(todos)": params["event"] = event
+        runs = requests.get(f"{API}/experiments", params=params, timeout=15).json()["runs"]
+        if runs:
+            df = pd.json_normalize(runs)
+            df["ts"] = pd.to_datetime(df["ts"], unit="s")
+            st.dataframe(df, use_container_width=True)
+        else:
+            st.info("Aún no hay registros. Entrena o CV para generar filas.")
     except Exception as e:
         st.info("Aún no hay registros. Entrena o CV para generar filas.")
+
+with tab5:
+    st.subheader("Deriva de entradas y predicciones")
+    c1, c2 = st.columns([1, 1])
+    if c2.button("Reiniciar monitor"):
+        requests.post(f"{API}/monitor/reset", timeout=15)
+    try:
+        mon = requests.get(f"{API}/monitor", timeout=15).json()
+    except Exception:
+        mon = {"enabled": False}
+    if not mon.get("enabled"):
+        st.info("Monitor desactivado (MONITOR=0) o API no disponible.")
+    elif not mon["n"]:
+        c1.caption(f"Modelo v{mon['model_version']}: aún no hay predicciones observadas.")
+    else:
+        c1.metric("PSI máx.", f"{mon['psi_max']:.3f}", delta=("deriva" if mon["drift"] else "ok"), delta_color=("inverse" if mon["drift"] else "off"))
+        st.caption(f"Modelo v{mon['model_version']} · {mon['n']} filas · referencia N(mu, sigma) del entrenamiento · PSI ≥ 0.1 aviso, ≥ 0.25 alerta")
+        df = pd.DataFrame([{"feature": k, **{c: f.get(c) for c in ("mean", "std", "train_mu", "train_sigma", "mean_shift_z", "psi", "status")}}
+                           for k, f in mon["features"].items()])
+        st.dataframe(df, use_container_width=True)
+        feat = st.selectbox("histograma de", list(mon["features"]))
+        ref = np.array(mon["reference"]); obs = np.array(mon["features"][feat]["hist"], dtype=float)
+        fig, ax = plt.subplots(figsize=(7, 2.5))
+        ax.bar(np.arange(len(obs)) - 0.2, obs/max(obs.sum(), 1), width=0.4, label="observado")
+        ax.bar(np.arange(len(ref)) + 0.2, ref, width=0.4, label="referencia")
+        ax.set_xlabel("bin z = (x - mu)/sigma"); ax.legend()
+        st.pyplot(fig)
+        pr = mon["predictions"]
+        fig2, ax2 = plt.subplots(figsize=(7, 2.5))
+        ax2.bar(np.array(pr["edges"][:-1]), pr["hist"], width=1/len(pr["hist"]), align="edge")
+        ax2.set_xlabel("prob. inestable"); ax2.set_title(f"media {pr['mean']:.3f}")
+        st.pyplot(fig2)
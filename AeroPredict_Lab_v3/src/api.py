@@ -1,149 +1,561 @@
+import time; _T0 = time.perf_counter()  # startup clock, started before the heavy imports
+from fastapi import FastAPI, HTTPException, Request, Query
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Literal, Optional
+import numpy as np, os, json, asyncio, threading
+from contextlib import asynccontextmanager
+from loguru import logger
+from .model import train_logit, LogitModel, synth_dataset, standardize, roc_curve, pr_curve, kfold_indices, platt_fit, platt_apply
+from .experiments import ExperimentStore
+from .datasets import open_source, train_from_source, DatasetCache
+from .registry import ModelRegistry
+from . import columnar
+from .batcher import MicroBatcher
+from .monitor import DriftMonitor
+from .features import RollingFeatures
+from .online import OnlineLearner
+from .telemetry import Telemetry, MetricsMiddleware, stage, sample_stacks
+from .tasks import run_train, run_train_cv, run_train_ensemble, run_calibrate
+from .jobs import JobManager, QueueFull, TERMINAL
+from .sweep import check_base, expand_space
 
-    from fastapi import FastAPI
-    from fastapi.responses import FileResponse, PlainTextResponse
-    from pydantic import BaseModel, Field
-    from typing import List, Dict, Any
-    import numpy as np, os, time, json
-    from loguru import logger
-    from .model import train_logit, LogitModel, synth_dataset, standardize, roc_curve, pr_curve, kfold_indices, platt_fit, platt_apply
-    from .experiments import CSVLogger
-
-    MODEL_PATH = os.environ.get("MODEL_PATH", "models/model.npz")
-    STATS_PATH = os.environ.get("STATS_PATH", "models/stats.json")
-    CALIB_PATH = os.environ.get("CALIB_PATH", "models/calib.json")
-    CARD_PATH  = os.environ.get("CARD_PATH",  "models/model_card.md")
-
-    app = FastAPI(title="AeroPredict Lab API", version="3.0.0")
-    logger.add(lambda m: print(m, end=""), level=os.environ.get("LOG_LEVEL","INFO"))
-    exlog = CSVLogger("data/experiments.csv")
-
-    class TrainRequest(BaseModel):
-        n_samples: int = Field(8000, ge=1000, le=300000)
-        lr: float = 0.05
-        epochs: int = 400
-        l2: float = 1e-3
-        seed: int = 42
-        notes: str = ""
-
-    class TrainCVRequest(BaseModel):
-        n_samples: int = Field(10000, ge=2000, le=300000)
-        k_folds: int = Field(5, ge=2, le=10)
-        lr: float = 0.05
-        epochs: int = 400
-        l2: float = 1e-3
-        seed: int = 123
-        notes: str = ""
-
-    class FeatureVec(BaseModel):
-        airspeed: float; altitude: float; vspeed: float; pitch: float; roll: float; wind_x: float; wind_y: float
-
-    class BatchPredict(BaseModel):
-        items: List[FeatureVec]
-
-    def _save_stats(mu, sigma):
-        os.makedirs(os.path.dirname(STATS_PATH), exist_ok=True)
-        with open(STATS_PATH, "w") as f:
-            json.dump({"mu": mu.tolist(), "sigma": sigma.tolist()}, f)
-
-    def _load_stats():
-        with open(STATS_PATH, "r") as f:
-            s = json.load(f); return np.array(s["mu"]), np.array(s["sigma"])
-
-    def _save_calib(a:float,b:float):
-        os.makedirs(os.path.dirname(CALIB_PATH), exist_ok=True)
-        with open(CALIB_PATH, "w") as f: json.dump({"a":a,"b":b}, f)
-
-    def _load_calib():
-        if not os.path.exists(CALIB_PATH): return None
-        with open(CALIB_PATH,"r") as f: c=json.load(f); return float(c["a"]), float(c["b"])
-
-    def _ensure_model():
-        if os.path.exists(MODEL_PATH) and os.path.exists(STATS_PATH):
-            return LogitModel.load(MODEL_PATH), _load_stats()
-        X,y = synth_dataset(n=4000, seed=42)
-        model, mu, sigma = train_logit(X, y, lr=0.05, epochs=400, l2=1e-3)
-        model.save(MODEL_PATH); _save_stats(mu, sigma)
-        return model, (mu, sigma)
-
-    MODEL, (MU, SIGMA) = _ensure_model()
-
-    @app.get("/health")
-    def health(): 
-        return {"status":"ok","version":"3.0.0","model_exists": os.path.exists(MODEL_PATH), "calibrated": os.path.exists(CALIB_PATH)}
-
-    @app.post("/train")
-    def train(req: TrainRequest):
-        global MODEL, MU, SIGMA
-        X,y = synth_dataset(n=req.n_samples, seed=req.seed)
-        MODEL, MU, SIGMA = train_logit(X, y, lr=req.lr, epochs=req.epochs, l2=req.l2)
-        MODEL.save(MODEL_PATH); _save_stats(MU, SIGMA)
-        exlog.log("train", req.model_dump(), {"ok":True})
-        return {"trained": True, "n": int(req.n_samples)}
-
-    @app.post("/train_cv")
-    def train_cv(req: TrainCVRequest):
-        X,y = synth_dataset(n=req.n_samples, seed=req.seed)
-        folds = kfold_indices(len(X), req.k_folds, seed=req.seed)
-        per_fold=[]; aucrocs=[]; aucprs=[]
-        for i in range(req.k_folds):
-            va_idx = folds[i]
-            tr_idx = np.concatenate([folds[j] for j in range(req.k_folds) if j!=i])
-            model, mu, sigma = train_logit(X[tr_idx], y[tr_idx], lr=req.lr, epochs=req.epochs, l2=req.l2)
-            p = model.predict_proba((X[va_idx]-mu)/(sigma+1e-8))
-            fpr,tpr,aucroc = roc_curve(y[va_idx], p)
-            rec,prec,aucpr  = pr_curve(y[va_idx], p)
-            per_fold.append({"fold":i,"n_train":int(len(tr_idx)),"n_val":int(len(va_idx)),"auc_roc":float(aucroc),"auc_pr":float(aucpr)})
-            aucrocs.append(aucroc); aucprs.append(aucpr)
-        summary = {"k_folds": req.k_folds, "auc_roc_mean": float(np.mean(aucrocs)), "auc_pr_mean": float(np.mean(aucprs))}
-        exlog.log("train_cv", req.model_dump(), {"auc_roc_mean": summary["auc_roc_mean"], "auc_pr_mean": summary["auc_pr_mean"]})
-        return {"per_fold": per_fold, "summary": summary}
-
-    @app.post("/calibrate")
-    def calibrate():
-        # use a fresh val set to fit Platt
-        X,y = synth_dataset(n=4000, seed=777)
-        # load current model stats
-        global MODEL, MU, SIGMA
-        p = MODEL.predict_proba((X-MU)/(SIGMA+1e-8))
-        a,b = platt_fit(p, y, lr=0.1, epochs=400)
-        _save_calib(a,b)
-        exlog.log("calibrate", {}, {"a":a,"b":b})
-        return {"calibrated": True, "a": a, "b": b}
-
-    def _vectorize(v: FeatureVec):
-        x = np.array([v.airspeed, v.altitude, v.vspeed, v.pitch, v.roll, v.wind_x, v.wind_y], dtype=float)
-        xs = (x - MU) / (SIGMA + 1e-8)
-        return xs
-
-    @app.post("/predict")
-    def predict(v: FeatureVec):
-        xs = _vectorize(v)
-        p = float(MODEL.predict_proba(xs))
-        calib = _load_calib()
-        if calib:
-            a,b = calib; p = float(platt_apply(np.array([p]), a, b)[0])
-        return {"prob_unstable": p, "ts": time.time(), "calibrated": bool(calib)}
-
-    @app.post("/predict/batch")
-    def predict_batch(req: BatchPredict):
-        Xs = np.vstack([_vectorize(v) for v in req.items])
-        p = MODEL.predict_proba(Xs)
-        calib = _load_calib()
-        if calib:
-            a,b = calib; p = platt_apply(p, a, b)
-        return {"probs": [float(x) for x in p], "calibrated": bool(calib)}
-
-    @app.get("/model/download")
-    def model_download():
-        return FileResponse(MODEL_PATH, filename="model.npz")
-
-    @app.get("/model/card")
-    def model_card():
-        card = f"""# Model Card — AeroPredict v3
+REGISTRY_DIR = os.environ.get("REGISTRY_DIR", "models/registry")
+# legacy single-file layout, imported once into the registry if present
+MODEL_PATH = os.environ.get("MODEL_PATH", "models/model.npz")
+STATS_PATH = os.environ.get("STATS_PATH", "models/stats.json")
+CALIB_PATH = os.environ.get("CALIB_PATH", "models/calib.json")
+CARD_PATH  = os.environ.get("CARD_PATH",  "models/model_card.md")
+
+# STARTUP_MODE=lazy: importing the app does no model work at all (no artifact read, no bootstrap
+# training); a background thread warms the model up once the server starts, and the first
+# request that needs it before then loads it inline. /health/live vs /health/ready tell them apart.
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager")
+STARTUP = {"mode": STARTUP_MODE, "import_s": None, "ready_s": None}
+
+@asynccontextmanager
+async def _lifespan(app):
+    if STARTUP_MODE == "lazy" and REGISTRY.loaded is None:
+        threading.Thread(target=_ensure_model, name="model-warmup", daemon=True).start()
+    yield
+
+app = FastAPI(title="AeroPredict Lab API", version="3.0.0", lifespan=_lifespan)
+logger.add(lambda m: print(m, end=""), level=os.environ.get("LOG_LEVEL","INFO"))
+TELEMETRY = Telemetry()
+app.add_middleware(MetricsMiddleware, telemetry=TELEMETRY, routes=app.router.routes)
+EXPERIMENTS_PATH = os.environ.get("EXPERIMENTS_PATH", "data/experiments.db")
+# rows from the old CSV log are imported the first time the store is created
+exlog = ExperimentStore(EXPERIMENTS_PATH, import_csv="data/experiments.csv")
+DATA_CACHE = DatasetCache(max_bytes=int(float(os.environ.get("DATASET_CACHE_MB", "512"))*2**20),
+                          persist_dir=os.environ.get("DATASET_CACHE_DIR") or None)
+
+class TrainRequest(BaseModel):
+    n_samples: int = Field(8000, ge=1000, le=300000)
+    lr: float = 0.05
+    epochs: int = 400
+    l2: float = 1e-3
+    solver: Literal["gd","newton","lbfgs"] = "gd"
+    tol: float = Field(1e-6, gt=0)
+    seed: int = 42
+    notes: str = ""
+
+class TrainCVRequest(BaseModel):
+    n_samples: int = Field(10000, ge=2000, le=300000)
+    k_folds: int = Field(5, ge=2, le=10)
+    lr: float = 0.05
+    epochs: int = 400
+    l2: float = 1e-3
+    solver: Literal["gd","newton","lbfgs"] = "gd"
+    tol: float = Field(1e-6, gt=0)
+    seed: int = 123
+    notes: str = ""
+
+class TrainOOCRequest(BaseModel):
+    path: str
+    y_path: Optional[str] = None
+    label: str = "y"
+    lr: float = 0.01
+    epochs: int = Field(3, ge=1, le=100)
+    l2: float = 1e-3
+    batch_size: int = Field(4096, ge=32, le=1_000_000)
+    chunk_rows: int = Field(262144, ge=1024, le=10_000_000)
+    optimizer: Literal["adam","sgd"] = "adam"
+    seed: int = 0
+    notes: str = ""
+
+class TrainEnsembleRequest(BaseModel):
+    n_samples: int = Field(8000, ge=1000, le=300000)
+    k: int = Field(32, ge=2, le=128)
+    lr: float = 0.05
+    epochs: int = 400
+    l2: float = 1e-3
+    tol: float = Field(1e-6, gt=0)
+    seed: int = 42
+    notes: str = ""
+
+class SweepRequest(BaseModel):
+    space: Dict[str, Any]  # {"lr": [..], "l2": {"low": 1e-5, "high": 1e-1, "log": true}, ...}
+    mode: Literal["grid","random"] = "grid"
+    n_trials: int = Field(16, ge=1, le=500)
+    n_samples: int = Field(10000, ge=2000, le=300000)
+    k_folds: int = Field(3, ge=2, le=10)
+    eta: int = Field(3, ge=2, le=10)
+    seed: int = 123
+    base: Dict[str, Any] = {}
+    publish: bool = True
+    workers: int = Field(2, ge=1, le=32)
+    notes: str = ""
+
+class FeatureVec(BaseModel):
+    airspeed: float; altitude: float; vspeed: float; pitch: float; roll: float; wind_x: float; wind_y: float
+
+class BatchPredict(BaseModel):
+    items: List[FeatureVec]
+
+class OnlineBatch(BaseModel):
+    items: List[FeatureVec]
+    labels: List[float] = Field(..., description="observed outcome per item, 0/1 (soft labels in [0, 1] allowed)")
+
+class TelemetrySample(BaseModel):
+    # one flightTelemetry row; nullable fields are carried forward from the previous sample
+    ts: Optional[float] = None; t: Optional[float] = None; x: Optional[float] = None; y: Optional[float] = None
+    vx: Optional[float] = None; vy: Optional[float] = None; pitch: Optional[float] = None; roll: Optional[float] = None
+    wind_x: Optional[float] = None; wind_y: Optional[float] = None
+
+class TelemetryPredict(BaseModel):
+    flight_id: str = "default"
+    samples: List[TelemetrySample]
+
+def _load_stats():
+    with open(STATS_PATH, "r") as f:
+        s = json.load(f); return np.array(s["mu"]), np.array(s["sigma"])
+
+def _load_calib():
+    if not os.path.exists(CALIB_PATH): return None
+    with open(CALIB_PATH,"r") as f: c=json.load(f); return float(c["a"]), float(c["b"])
+
+# artifacts are memory-mapped (REGISTRY_MMAP=0 reads them into private copies instead)
+REGISTRY = ModelRegistry(REGISTRY_DIR, poll_seconds=float(os.environ.get("REGISTRY_POLL_S", "2.0")),
+                         mmap=os.environ.get("REGISTRY_MMAP", "1") == "1")
+_MODEL_LOCK = threading.Lock()
+
+def _ensure_model():
+    with _MODEL_LOCK:  # the warm-up thread and an early request must not both bootstrap
+        m = REGISTRY.refresh()
+        if m is None and os.path.exists(MODEL_PATH) and os.path.exists(STATS_PATH):
+            mu, sigma = _load_stats()
+            m = REGISTRY.publish(LogitModel.load(MODEL_PATH), mu, sigma, calib=_load_calib(), meta={"event": "import_legacy"})
+        if m is None:
+            X,y = DATA_CACHE.get(4000, 42)
+            model, mu, sigma = train_logit(X, y, lr=0.05, epochs=400, l2=1e-3)
+            m = REGISTRY.publish(model, mu, sigma, meta={"event": "bootstrap"})
+    if STARTUP["ready_s"] is None: STARTUP["ready_s"] = time.perf_counter() - _T0
+    return m
+
+def _active():
+    # the served bundle; in lazy mode the first caller before warm-up finishes loads it inline
+    return REGISTRY.active or _ensure_model()
+
+async def _active_async():
+    # same for async endpoints: waiting on the warm-up (or loading) happens in a worker thread,
+    # so /health/live and everything else on the event loop keep answering meanwhile
+    m = REGISTRY.active
+    return m if m is not None else await asyncio.to_thread(_ensure_model)
+
+if STARTUP_MODE != "lazy": _ensure_model()
+
+@app.get("/health")
+def health(): 
+    m = REGISTRY.loaded
+    return {"status":"ok","version":"3.0.0","live": True,"ready": m is not None,"model_exists": m is not None, "calibrated": bool(m and m.calib),
+            "model_version": (m.version if m else None), "startup": STARTUP, "dataset_cache": DATA_CACHE.stats()}
+
+@app.get("/health/live")
+def health_live():
+    # liveness: the process answers; never touches the model
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+def health_ready():
+    # readiness: the active model is in memory, so /predict will not pay a load or bootstrap
+    m = REGISTRY.loaded
+    if m is None: return JSONResponse({"status": "starting", "ready": False, "startup": STARTUP}, status_code=503)
+    return {"status": "ok", "ready": True, "model_version": m.version, "startup": STARTUP}
+
+@app.post("/train")
+def train(req: TrainRequest):
+    res = run_train(req.model_dump(), REGISTRY, DATA_CACHE)
+    exlog.log("train", req.model_dump(), {"ok":True, "n_iter": res["n_iter"], "converged": res["converged"], "model_version": res["model_version"]})
+    return res
+
+# /train_ooc only reads datasets below this directory; request paths are resolved relative to it
+DATA_ROOT = os.path.realpath(os.environ.get("DATA_ROOT", "data"))
+
+def _data_path(path: str) -> str:
+    full = os.path.realpath(os.path.join(DATA_ROOT, path))  # follows symlinks and "..", so both are checked
+    if os.path.commonpath([full, DATA_ROOT]) != DATA_ROOT:
+        raise HTTPException(400, detail=f"{path!r} is outside the data root")
+    return full
+
+@app.post("/train_ooc")
+def train_ooc(req: TrainOOCRequest):
+    # out-of-core: .npy/Parquet under DATA_ROOT, streaming stats + minibatch training
+    path = _data_path(req.path); y_path = _data_path(req.y_path) if req.y_path else None
+    try:
+        src = open_source(path, y_path=y_path, label=req.label)
+        model, mu, sigma = train_from_source(src, lr=req.lr, epochs=req.epochs, l2=req.l2, batch_size=req.batch_size,
+                                             optimizer=req.optimizer, chunk_rows=req.chunk_rows, seed=req.seed)
+    except (OSError, ValueError, RuntimeError) as e:
+        raise HTTPException(400, detail=str(e))
+    m = REGISTRY.publish(model, mu, sigma, meta={"event": "train_ooc", **req.model_dump()})
+    exlog.log("train_ooc", req.model_dump(), {"ok":True, "n": src.n_rows, "model_version": m.version})
+    return {"trained": True, "n": src.n_rows, "optimizer": req.optimizer, "model_version": m.version}
+
+@app.post("/train_ensemble")
+def train_ensemble(req: TrainEnsembleRequest):
+    # bagged model: point fit + k bootstrap members, served with per-row uncertainty (?uncertainty=true)
+    res = run_train_ensemble(req.model_dump(), REGISTRY, DATA_CACHE)
+    exlog.log("train_ensemble", req.model_dump(), {"ok":True, "n_iter": res["n_iter"], "converged": res["converged"], "model_version": res["model_version"]})
+    return res
+
+@app.post("/train_cv")
+def train_cv(req: TrainCVRequest):
+    res = run_train_cv(req.model_dump(), DATA_CACHE)
+    exlog.log("train_cv", req.model_dump(), {"auc_roc_mean": res["summary"]["auc_roc_mean"], "auc_pr_mean": res["summary"]["auc_pr_mean"]})
+    return res
+
+@app.post("/calibrate")
+def calibrate(method: Literal["platt","isotonic"] = "platt"):
+    _active()  # calibrates the served model, so it has to exist
+    res = run_calibrate(REGISTRY, DATA_CACHE, method=method)
+    exlog.log("calibrate", {"method": method}, {k: v for k, v in res.items() if k not in ("calibrated","method")})
+    return res
+
+def _job_done(job):
+    # runs in the parent once a worker finishes: log it and pick up any newly published version
+    if job.status == "done":
+        REGISTRY.refresh()
+        r = job.result
+        if job.kind == "sweep": return  # trials and the summary are logged by the sweep itself
+        metrics = r["summary"] if job.kind == "train_cv" else {k: v for k, v in r.items() if k in ("n_iter","converged","a","b","n_blocks","k","model_version")}
+        exlog.log(job.kind, {**job.params, "job_id": job.id}, metrics)
+
+JOBS = JobManager(REGISTRY_DIR, {"max_bytes": DATA_CACHE.max_bytes, "persist_dir": DATA_CACHE.persist_dir},
+                  max_workers=int(os.environ.get("JOBS_MAX_WORKERS", "1")), max_pending=int(os.environ.get("JOBS_MAX_PENDING", "16")),
+                  on_done=_job_done, log_path=EXPERIMENTS_PATH)
+
+def _submit(kind: str, params: Dict[str, Any]):
+    try:
+        job = JOBS.submit(kind, params)
+    except QueueFull as e:
+        raise HTTPException(429, detail=str(e))
+    return {"job_id": job.id, "status": job.status, "kind": kind}
+
+@app.post("/jobs/train", status_code=202)
+def job_train(req: TrainRequest):
+    return _submit("train", req.model_dump())
+
+@app.post("/jobs/train_cv", status_code=202)
+def job_train_cv(req: TrainCVRequest):
+    return _submit("train_cv", req.model_dump())
+
+@app.post("/jobs/train_ensemble", status_code=202)
+def job_train_ensemble(req: TrainEnsembleRequest):
+    return _submit("train_ensemble", req.model_dump())
+
+@app.post("/jobs/calibrate", status_code=202)
+def job_calibrate(method: Literal["platt","isotonic"] = "platt"):
+    _active()
+    return _submit("calibrate", {"method": method})
+
+# trial processes a sweep job may start on top of its JOBS_MAX_WORKERS slot (1: trials run inside the job)
+SWEEP_MAX_WORKERS = max(1, int(os.environ.get("SWEEP_MAX_WORKERS", "1")))
+
+@app.post("/sweep", status_code=202)
+def sweep(req: SweepRequest):
+    # runs as a background job; poll /jobs/{id} for rung progress and the final ranking
+    try:
+        n = len(expand_space(req.space, req.mode, req.n_trials, req.seed)); check_base(req.base)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    params = {**req.model_dump(), "workers": min(req.workers, SWEEP_MAX_WORKERS)}
+    return {**_submit("sweep", params), "n_configs": n, "workers": params["workers"]}
+
+@app.get("/jobs")
+def jobs_list():
+    return JOBS.list()
+
+def _job(job_id: str):
+    try:
+        return JOBS.get(job_id)
+    except KeyError as e:
+        raise HTTPException(404, detail=e.args[0])
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    return _job(job_id).to_dict()
+
+@app.post("/jobs/{job_id}/cancel")
+def job_cancel(job_id: str):
+    _job(job_id); return JOBS.cancel(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request, interval: float = 0.5):
+    # SSE: one "progress" event whenever the job record changes, a final "end" event when it finishes
+    job = _job(job_id)
+    async def gen():
+        last = None
+        while True:
+            if await request.is_disconnected(): break
+            d = await asyncio.to_thread(job.to_dict)
+            msg = json.dumps(d)
+            if msg != last:
+                yield f"event: {'end' if d['status'] in TERMINAL else 'progress'}\ndata: {msg}\n\n"; last = msg
+            if d["status"] in TERMINAL: break
+            await asyncio.sleep(max(0.1, interval))
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+def _vectorize(v: FeatureVec):
+    # raw features; mu/sigma and Platt are folded into the bundle's fused weights
+    return (v.airspeed, v.altitude, v.vspeed, v.pitch, v.roll, v.wind_x, v.wind_y)
+
+# input drift / prediction monitor fed by every predict endpoint (MONITOR=0 turns it off)
+MONITOR = DriftMonitor(flush_rows=int(os.environ.get("MONITOR_FLUSH_ROWS", "512"))) if os.environ.get("MONITOR", "1") == "1" else None
+
+def _score_rows(X):
+    m = _active()  # one snapshot per call: weights, stats and calibration always match
+    with stage("score"): p = m.score_affine(X)
+    if m.calib and not m.calib.affine:
+        with stage("calibrate"): p = m.apply_calib(p)
+    if MONITOR is not None:
+        with stage("monitor"): MONITOR.observe(X, p, m)
+    return p, m
+
+ENSEMBLE_QUANTILES = (0.05, 0.5, 0.95)
+
+def _ensemble_stats(m, X):
+    # all K bootstrap members in one GEMM: mean/std/quantiles of the calibrated probability per row
+    if m.ensemble is None:
+        raise HTTPException(409, detail=f"model v{m.version} has no bootstrap ensemble; train one with /train_ensemble")
+    with stage("ensemble"): mean, std, Q = m.score_ensemble(X, ENSEMBLE_QUANTILES)
+    return {"mean": mean, "std": std, **{f"q{round(q*100):02d}": Q[:, i] for i, q in enumerate(ENSEMBLE_QUANTILES)}}
+
+# opt-in request coalescing for single-row /predict (PREDICT_BATCHING=1)
+BATCHER = MicroBatcher(_score_rows, max_rows=int(os.environ.get("BATCH_MAX_ROWS", "256")),
+                       max_wait_us=int(os.environ.get("BATCH_MAX_WAIT_US", "500"))) if os.environ.get("PREDICT_BATCHING", "0") == "1" else None
+
+@app.post("/predict")
+async def predict(v: FeatureVec, uncertainty: bool = False):
+    await _active_async()  # _score_rows then finds the model in memory
+    if uncertainty:
+        with stage("vectorize"): X = np.array([_vectorize(v)])
+        p, m = _score_rows(X)
+        return {"prob_unstable": float(p[0]), "ts": time.time(), "calibrated": bool(m.calib), "model_version": m.version,
+                "ensemble": {k: float(a[0]) for k, a in _ensemble_stats(m, X).items()}}
+    if BATCHER is not None:
+        with stage("vectorize"): x = _vectorize(v)
+        with stage("batch_wait"): p, m = await BATCHER.submit(x)
+        return {"prob_unstable": p, "ts": time.time(), "calibrated": bool(m.calib), "model_version": m.version}
+    with stage("vectorize"): X = np.array([_vectorize(v)])
+    p, m = _score_rows(X)
+    p = float(p[0])
+    return {"prob_unstable": p, "ts": time.time(), "calibrated": bool(m.calib), "model_version": m.version}
+
+@app.get("/predict/batcher")
+def predict_batcher_stats():
+    return {"enabled": BATCHER is not None, **(BATCHER.stats() if BATCHER else {})}
+
+def _collect_state():
+    # scrape-time gauges: active model, micro-batcher, drift monitor, dataset cache, jobs
+    m = REGISTRY.active
+    out = ["# TYPE aeropredict_model_version gauge", f"aeropredict_model_version {m.version if m else 0}",
+           "# TYPE aeropredict_jobs_active gauge", f"aeropredict_jobs_active {JOBS.active_count()}"]
+    cs = DATA_CACHE.stats()
+    out += ["# TYPE aeropredict_dataset_cache_bytes gauge", f"aeropredict_dataset_cache_bytes {cs['bytes']}",
+            "# TYPE aeropredict_dataset_cache_hits_total counter", f"aeropredict_dataset_cache_hits_total {cs['hits']}",
+            "# TYPE aeropredict_dataset_cache_misses_total counter", f"aeropredict_dataset_cache_misses_total {cs['misses']}"]
+    if BATCHER is not None:
+        b = BATCHER.stats()
+        out += ["# TYPE aeropredict_batcher_queue_depth gauge", f"aeropredict_batcher_queue_depth {b['queue_depth']}",
+                "# TYPE aeropredict_batcher_rows_total counter", f"aeropredict_batcher_rows_total {b['rows']}",
+                "# TYPE aeropredict_batcher_batch_size histogram"]
+        acc = 0
+        for ub, c in zip(BATCHER.size_buckets, BATCHER.size_counts):
+            acc += c; out.append(f'aeropredict_batcher_batch_size_bucket{{le="{ub}"}} {acc}')
+        out += [f'aeropredict_batcher_batch_size_bucket{{le="+Inf"}} {b["batches"]}',
+                f"aeropredict_batcher_batch_size_sum {b['rows']}", f"aeropredict_batcher_batch_size_count {b['batches']}"]
+    if MONITOR is not None:
+        snap = MONITOR.snapshot()
+        out += ["# TYPE aeropredict_monitor_rows gauge", f"aeropredict_monitor_rows {snap['n']}", "# TYPE aeropredict_feature_psi gauge"]
+        out += [f'aeropredict_feature_psi{{feature="{k}"}} {f["psi"]}' for k, f in snap["features"].items()]
+    return out
+
+TELEMETRY.collectors.append(_collect_state)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition (version 0.0.4)
+    return PlainTextResponse(TELEMETRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+def debug_profile(seconds: float = Query(5.0, gt=0, le=60), interval_ms: float = Query(5.0, ge=1, le=1000)):
+    # sampling profiler, opt-in (PROFILER=1): collapsed stacks of every thread for flamegraph tools
+    if os.environ.get("PROFILER", "0") != "1": raise HTTPException(404, detail="profiler disabled (set PROFILER=1)")
+    return sample_stacks(seconds, interval_ms/1e3)
+
+@app.get("/monitor")
+def monitor(include_hist: bool = True):
+    # Welford mean/std, fixed z-bin histograms and PSI vs N(mu, sigma) per feature since the active version went live
+    if MONITOR is None: return {"enabled": False}
+    snap = MONITOR.snapshot()
+    if not include_hist:
+        for f in snap["features"].values(): f.pop("hist")
+    return {"enabled": True, **snap}
+
+@app.post("/monitor/reset")
+def monitor_reset():
+    if MONITOR is None: return {"enabled": False}
+    MONITOR.reset(_active())
+    return {"enabled": True, "model_version": MONITOR.version}
+
+@app.post("/predict/batch")
+def predict_batch(req: BatchPredict, uncertainty: bool = False):
+    with stage("vectorize"): X = np.array([_vectorize(v) for v in req.items], dtype=float).reshape(-1, 7)
+    p, m = _score_rows(X)
+    out = {"probs": p.tolist(), "calibrated": bool(m.calib), "model_version": m.version}
+    if uncertainty: out["ensemble"] = {k: a.tolist() for k, a in _ensemble_stats(m, X).items()}
+    return out
+
+# warm-started online updates of the active model (POST /online/update), published every ONLINE_PUBLISH_EVERY batches
+ONLINE = OnlineLearner(REGISTRY, optimizer=os.environ.get("ONLINE_OPTIMIZER", "ftrl"), lr=float(os.environ.get("ONLINE_LR", "0.1")),
+                       l1=float(os.environ.get("ONLINE_L1", "0")), l2=float(os.environ.get("ONLINE_L2", "1e-3")),
+                       publish_every=int(os.environ.get("ONLINE_PUBLISH_EVERY", "50")),
+                       update_stats=os.environ.get("ONLINE_UPDATE_STATS", "1") == "1")
+
+@app.post("/online/update")
+def online_update(req: OnlineBatch):
+    if len(req.items) != len(req.labels) or not req.items:
+        raise HTTPException(400, detail="items and labels must be non-empty and the same length")
+    y = np.asarray(req.labels, dtype=float)
+    if ((y < 0) | (y > 1)).any(): raise HTTPException(400, detail="labels must be in [0, 1]")
+    with stage("vectorize"): X = np.array([_vectorize(v) for v in req.items], dtype=float).reshape(-1, 7)
+    with stage("update"): res = ONLINE.update(X, y, _active())
+    if res["published_version"] is not None:
+        exlog.log("online", ONLINE.config(), {"model_version": res["published_version"], "loss_before": res["loss_before"]})
+    return res
+
+@app.get("/online")
+def online_state():
+    return ONLINE.state()
+
+@app.post("/online/publish")
+def online_publish():
+    # publish pending updates now instead of waiting for ONLINE_PUBLISH_EVERY
+    v = ONLINE.publish()
+    if v is not None: exlog.log("online", ONLINE.config(), {"model_version": v, "forced": True})
+    return {"published_version": v}
+
+# per-flight rolling windows for /predict/telemetry (window sizes in samples)
+ROLLING = RollingFeatures(windows=[int(w) for w in os.environ.get("FEATURE_WINDOWS", "5,25").split(",")],
+                          smooth=int(os.environ.get("FEATURE_SMOOTH", "1")), max_flights=int(os.environ.get("FEATURE_MAX_FLIGHTS", "10000")))
+
+@app.post("/predict/telemetry")
+def predict_telemetry(req: TelemetryPredict, include_features: bool = False):
+    # raw telemetry chunk for one flight -> one scored row per sample whose longest window is full
+    with stage("vectorize"):
+        cols = {k: np.array([getattr(r, k) for r in req.samples], dtype=float) for k in TelemetrySample.model_fields}
+        if np.isnan(cols["t"]).all(): cols["t"] = cols["ts"]
+        if np.isnan(cols["t"]).any(): raise HTTPException(400, detail="every sample needs t or ts")
+        for k in ("wind_x", "wind_y"):
+            if np.isnan(cols[k]).all(): del cols[k]
+        wf = ROLLING.push(req.flight_id, cols)
+        # a row is scored once every channel it uses has been observed: model inputs and the window
+        # means (NaN while the window still holds a sample from before a channel's first value)
+        means = [i for i, name in enumerate(wf.names) if "_mean_" in name]
+        ok = np.isfinite(wf.X).all(axis=1) & ~np.isnan(wf.F[:, means]).any(axis=1)
+    if ok.any(): p, m = _score_rows(wf.X[ok])
+    else: p, m = np.empty(0), _active()
+    out = {"flight_id": req.flight_id, "t": wf.t[ok].tolist(), "probs": p.tolist(), "pending": ROLLING.pending(req.flight_id),
+           "incomplete": int((~ok).sum()), "window_span": ROLLING.span, "calibrated": bool(m.calib), "model_version": m.version}
+    if include_features:  # a slope over identical timestamps stays NaN: sent as null
+        out["features"] = {name: [v if np.isfinite(v) else None for v in wf.F[ok, i].tolist()] for i, name in enumerate(wf.names)}
+    return out
+
+@app.post("/predict/columnar")
+async def predict_columnar(request: Request, dtype: Literal["float32","float64"]="float64",
+                           layout: Literal["rows","columns"]="rows", out: Literal["float32","float64","json"]="float32"):
+    # body: JSON {"columns": {feature: [...]}}, raw little-endian floats (octet-stream) or Arrow IPC;
+    # response: packed little-endian floats unless out=json
+    body = await request.body()
+    try:
+        with stage("decode"): X, cols = columnar.decode(body, request.headers.get("content-type", ""), dtype=dtype, layout=layout)
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(400, detail=str(e))
+    m = await _active_async()
+    with stage("score"): p = m.score_affine(X, columns=cols)
+    if m.calib and not m.calib.affine:
+        with stage("calibrate"): p = m.apply_calib(p)
+    if MONITOR is not None:
+        with stage("monitor"): MONITOR.observe(X.T if cols else X, p, m)
+    headers = {"X-Model-Version": str(m.version), "X-Rows": str(len(p)), "X-Calibrated": str(bool(m.calib)).lower()}
+    if out == "json":
+        return {"probs": p.tolist(), "calibrated": bool(m.calib), "model_version": m.version}
+    return Response(content=p.astype("<f4" if out == "float32" else "<f8", copy=False).tobytes(),
+                    media_type="application/octet-stream", headers=headers)
+
+@app.get("/model/versions")
+def model_versions():
+    cur = REGISTRY.active
+    return {"active": cur.version if cur else None, "versions": REGISTRY.versions()}
+
+@app.post("/model/activate/{version}")
+def model_activate(version: int):
+    try:
+        m = REGISTRY.activate(version)
+    except KeyError as e:
+        raise HTTPException(404, detail=e.args[0])
+    exlog.log("activate", {"version": version}, {"ok": True})
+    return {"active": m.version, "calibrated": bool(m.calib)}
+
+@app.post("/model/rollback")
+def model_rollback():
+    try:
+        m = REGISTRY.rollback()
+    except KeyError as e:
+        raise HTTPException(409, detail=e.args[0])
+    exlog.log("rollback", {}, {"active": m.version})
+    return {"active": m.version, "calibrated": bool(m.calib)}
+
+@app.get("/model/download")
+def model_download():
+    m = _active()  # the artifact keeps the w/b keys, so LogitModel.load still reads it
+    return FileResponse(m.path, filename=f"model_v{m.version}.npz")
+
+@app.get("/experiments")
+def experiments(event: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+                limit: int = Query(50, ge=1, le=1000), offset: int = Query(0, ge=0), before_id: Optional[int] = None):
+    rows = exlog.query(event=event, since=since, until=until, limit=limit, offset=offset, before_id=before_id)
+    return {"runs": rows, "next_before_id": (rows[-1]["id"] if len(rows) == limit else None)}
+
+@app.get("/experiments/best")
+def experiments_best(metric: str, event: Optional[str] = None, mode: Literal["max","min"] = "max", limit: int = Query(1, ge=1, le=100)):
+    return {"metric": metric, "mode": mode, "runs": exlog.best(metric, event=event, mode=mode, limit=limit)}
+
+@app.get("/metrics/summary")
+def metrics_summary(n: int = Query(10, ge=1, le=200)):
+    return {"counts": exlog.counts(), "latest": exlog.query(limit=n),
+            "best_cv": exlog.best("auc_roc_mean", event="train_cv")[:1]}
+
+@app.get("/model/card")
+def model_card():
+    card = f"""# Model Card — AeroPredict v3
 Version: 3.0.0
 Features: airspeed, altitude, vspeed, pitch, roll, wind_x, wind_y
-Model: Logistic Regression (NumPy) with standardization (mu/sigma) and optional Platt calibration.
-Endpoints: /train, /train_cv, /calibrate, /predict, /predict/batch
-Logs: data/experiments.csv
+Model: Logistic Regression (NumPy) with standardization (mu/sigma) and optional calibration (Platt folded into the affine map, or isotonic lookup); optional bootstrap ensemble for uncertainty (?uncertainty=true).
+Artifacts: versioned bundles in {REGISTRY_DIR} (weights + mu/sigma + calibration [+ K x d member weights]), active: v{_active().version}
+Endpoints: /train, /train_cv, /train_ensemble, /train_ooc, /calibrate, /sweep, /jobs/{{train,train_cv,train_ensemble,calibrate}}, /jobs/{{id}}[/events|/cancel], /predict, /predict/batch, /predict/columnar, /monitor, /metrics, /model/versions, /model/activate/{{version}}, /model/rollback
+Logs: {EXPERIMENTS_PATH} (SQLite; /experiments, /experiments/best, /metrics/summary)
 """
-        return PlainTextResponse(card)
+    return PlainTextResponse(card)
+
+STARTUP["import_s"] = time.perf_counter() - _T0
@@ -0,0 +1,68 @@
+import asyncio, numpy as np
+from typing import Any, Callable, Dict, Tuple
+
+# Request coalescing for single-row /predict: concurrent callers park a future on a queue,
+# one worker task drains up to max_rows (or waits max_wait_us after the first row) and
+# scores the whole group with one matrix product.
+
+class MicroBatcher:
+    def __init__(self, score_fn: Callable[[np.ndarray], Tuple[np.ndarray, Any]], max_rows:int = 256, max_wait_us:int = 500):
+        self.score_fn = score_fn
+        self.max_rows = max(1, int(max_rows))
+        self.max_wait = max(0, int(max_wait_us))/1e6
+        self._loop = None; self._queue = None; self._task = None; self._full = None
+        self.batches = 0; self.rows = 0; self.max_batch = 0; self.last_batch = 0
+        self.size_buckets = [2**i for i in range(int(np.log2(self.max_rows))+1)]
+        if self.size_buckets[-1] < self.max_rows: self.size_buckets.append(self.max_rows)
+        self.size_counts = [0]*len(self.size_buckets)
+
+    def _ensure_worker(self):
+        # the queue/task are bound to the running loop; rebuild them if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop; self._queue = asyncio.Queue(); self._full = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, x) -> Tuple[float, Any]:
+        # resolves to (probability, tag) where tag is what score_fn returned next to the batch
+        self._ensure_worker()
+        fut = self._loop.create_future()
+        self._queue.put_nowait((x, fut))
+        if self._queue.qsize() >= self.max_rows: self._full.set()
+        return await fut
+
+    async def _run(self):
+        q = self._queue
+        while True:
+            items = [await q.get()]
+            if self.max_wait and q.qsize() < self.max_rows - 1:
+                # park until the window closes or enough rows arrived (waiting on an Event, not
+                # on q.get(), so a timeout can never drop a dequeued row)
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            while len(items) < self.max_rows and not q.empty():
+                items.append(q.get_nowait())
+            self._record(len(items))
+            try:
+                p, tag = self.score_fn(np.array([x for x, _ in items], dtype=float))
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done(): fut.set_exception(e)
+                continue
+            for (_, fut), pi in zip(items, p.tolist()):
+                if not fut.done(): fut.set_result((pi, tag))
+
+    def _record(self, n:int):
+        self.batches += 1; self.rows += n; self.last_batch = n; self.max_batch = max(self.max_batch, n)
+        for i, ub in enumerate(self.size_buckets):
+            if n <= ub: self.size_counts[i] += 1; break
+
+    def stats(self) -> Dict:
+        return {"max_rows": self.max_rows, "max_wait_us": int(self.max_wait*1e6),
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                "batches": self.batches, "rows": self.rows, "last_batch_size": self.last_batch, "max_batch_size": self.max_batch,
+                "mean_batch_size": (self.rows/self.batches if self.batches else 0.0),
+                "batch_size_histogram": {f"le_{ub}": c for ub, c in zip(self.size_buckets, self.size_counts)}}
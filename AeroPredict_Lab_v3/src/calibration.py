@@ -0,0 +1,88 @@
+import numpy as np
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from .model import platt_fit
+
+# Probability calibrators, fitted on a held-out set and stored inside the model artifact.
+# Each one is an immutable NamedTuple with fit/apply and a flat array form for the .npz:
+#   platt    -> p' = sigmoid(a*logit(p) + b); affine in the logit, so it folds into the GEMV
+#   isotonic -> monotone step function from PAV, applied with one searchsorted
+
+class PlattCalibrator(NamedTuple):
+    a: float
+    b: float
+    kind = "platt"
+    affine = True
+
+    @classmethod
+    def fit(cls, p: np.ndarray, y: np.ndarray) -> "PlattCalibrator":
+        return cls(*platt_fit(p, y))
+
+    def apply(self, p: np.ndarray) -> np.ndarray:
+        z = np.log((p+1e-6)/(1-p+1e-6))
+        return 1/(1+np.exp(-(self.a*z + self.b)))
+
+    def to_array(self) -> np.ndarray:
+        return np.array([self.a, self.b], dtype=float)
+
+    @classmethod
+    def from_array(cls, arr: np.ndarray) -> "PlattCalibrator":
+        return cls(float(arr[0]), float(arr[1]))
+
+    def summary(self) -> Dict[str, Any]:
+        return {"a": self.a, "b": self.b}
+
+def _pav(y: np.ndarray, w: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # pool-adjacent-violators on values already sorted by score; returns (block start index, block mean)
+    start, val, wt = [], [], []
+    for i in range(len(y)):
+        s, v, ww = i, float(y[i]), float(w[i])
+        while val and val[-1] >= v:
+            ww2 = wt.pop(); v = (val.pop()*ww2 + v*ww)/(ww2 + ww); ww += ww2; s = start.pop()
+        start.append(s); val.append(v); wt.append(ww)
+    return np.asarray(start, dtype=np.intp), np.asarray(val, dtype=float)
+
+class IsotonicCalibrator(NamedTuple):
+    x: np.ndarray  # lower score edge of each block, increasing
+    y: np.ndarray  # calibrated probability of each block, non-decreasing
+    kind = "isotonic"
+    affine = False
+
+    @classmethod
+    def fit(cls, p: np.ndarray, y: np.ndarray) -> "IsotonicCalibrator":
+        # collapse tied scores first, so the Python PAV loop runs over distinct values only
+        u, inv = np.unique(np.asarray(p, dtype=float), return_inverse=True)
+        cnt = np.bincount(inv, minlength=len(u)).astype(float)
+        mean = np.bincount(inv, weights=np.asarray(y, dtype=float), minlength=len(u))/cnt
+        start, val = _pav(mean, cnt)
+        return cls(x=u[start], y=val)
+
+    def apply(self, p: np.ndarray) -> np.ndarray:
+        idx = np.searchsorted(self.x, p, side="right") - 1
+        np.maximum(idx, 0, out=idx)
+        return self.y.astype(np.result_type(p, np.float32), copy=False)[idx]
+
+    def to_array(self) -> np.ndarray:
+        return np.stack([self.x, self.y])
+
+    @classmethod
+    def from_array(cls, arr: np.ndarray) -> "IsotonicCalibrator":
+        return cls(x=np.ascontiguousarray(arr[0]), y=np.ascontiguousarray(arr[1]))
+
+    def summary(self) -> Dict[str, Any]:
+        return {"n_blocks": int(len(self.x))}
+
+CALIBRATORS = {"platt": PlattCalibrator, "isotonic": IsotonicCalibrator}
+
+def fit_calibrator(method: str, p: np.ndarray, y: np.ndarray):
+    if method not in CALIBRATORS: raise ValueError(f"unknown calibrator {method!r}; available: {list(CALIBRATORS)}")
+    return CALIBRATORS[method].fit(p, y)
+
+def as_calibrator(calib):
+    # accepts a calibrator, a bare (a, b) Platt pair (legacy calib.json / callers) or None
+    if calib is None or hasattr(calib, "kind"): return calib
+    a, b = calib
+    return PlattCalibrator(float(a), float(b))
+
+def load_calibrator(kind: Optional[str], arr: np.ndarray):
+    if arr.size == 0: return None
+    return CALIBRATORS[kind or "platt"].from_array(arr)
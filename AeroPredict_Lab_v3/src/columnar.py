@@ -0,0 +1,51 @@
+import json, numpy as np
+from typing import Tuple
+from .model import FEAT_NAMES
+
+# Decoders for /predict/columnar. Each returns (X, columns): X is (n, 7) when columns is
+# False, or (7, n) feature-major when True, so no per-row Python objects are built.
+
+ARROW_TYPES = ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file")
+_DTYPES = {"float32": "<f4", "float64": "<f8"}
+
+def decode_json_columns(body: bytes) -> Tuple[np.ndarray, bool]:
+    cols = json.loads(body)
+    if isinstance(cols, dict): cols = cols.get("columns", cols)
+    if not isinstance(cols, dict): raise ValueError("body must be a JSON object of feature columns")
+    missing = [c for c in FEAT_NAMES if c not in cols]
+    if missing: raise ValueError(f"missing feature columns {missing}")
+    X = np.array([cols[c] for c in FEAT_NAMES], dtype=float)
+    if X.ndim != 2: raise ValueError("feature columns must be flat arrays of equal length")
+    return X, True
+
+def decode_raw(body: bytes, dtype: str = "float64", layout: str = "rows") -> Tuple[np.ndarray, bool]:
+    if dtype not in _DTYPES: raise ValueError(f"dtype must be one of {list(_DTYPES)}")
+    a = np.frombuffer(body, dtype=_DTYPES[dtype])
+    d = len(FEAT_NAMES)
+    if a.size % d: raise ValueError(f"payload holds {a.size} values, not a multiple of {d} features")
+    if layout == "rows": return a.reshape(-1, d), False
+    if layout == "columns": return a.reshape(d, -1), True
+    raise ValueError("layout must be 'rows' or 'columns'")
+
+def decode_arrow(body: bytes) -> Tuple[np.ndarray, bool]:
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise RuntimeError("Arrow payloads need pyarrow (pip install pyarrow)") from e
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid:
+        table = pa.ipc.open_file(pa.BufferReader(body)).read_all()
+    missing = [c for c in FEAT_NAMES if c not in table.column_names]
+    if missing: raise ValueError(f"missing feature columns {missing}")
+    X = np.empty((len(FEAT_NAMES), table.num_rows))
+    for i, c in enumerate(FEAT_NAMES):
+        X[i] = table.column(c).to_numpy()
+    return X, True
+
+def decode(body: bytes, content_type: str, dtype: str = "float64", layout: str = "rows") -> Tuple[np.ndarray, bool]:
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct in ARROW_TYPES: return decode_arrow(body)
+    if ct == "application/json": return decode_json_columns(body)
+    if ct in ("application/octet-stream", ""): return decode_raw(body, dtype=dtype, layout=layout)
+    raise ValueError(f"unsupported content type {ct!r}")
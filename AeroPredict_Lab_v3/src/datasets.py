@@ -0,0 +1,130 @@
+import os, tempfile, threading, numpy as np
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+from .model import FEAT_NAMES, train_logit_minibatch, synth_dataset
+
+# Out-of-core sources: everything is read in bounded row chunks so n can exceed RAM.
+
+class NpySource:
+    # X as an (n, 7) .npy (any float dtype) plus y as an (n,) .npy, or a single (n, 8)
+    # .npy whose last column is the label. Files are memory-mapped, never fully loaded.
+    def __init__(self, path:str, y_path:Optional[str]=None):
+        self.X = np.load(path, mmap_mode="r")
+        if y_path:
+            self.y = np.load(y_path, mmap_mode="r")
+        else:
+            if self.X.ndim != 2 or self.X.shape[1] != len(FEAT_NAMES)+1:
+                raise ValueError(f"{path}: expected {len(FEAT_NAMES)+1} columns (features + label) when no y_path is given")
+            self.y = self.X[:, -1]; self.X = self.X[:, :-1]
+        if self.X.shape[1] != len(FEAT_NAMES) or len(self.y) != len(self.X):
+            raise ValueError(f"{path}: shape {self.X.shape} / {self.y.shape} does not match {len(FEAT_NAMES)} features")
+        self.n_rows = int(len(self.X))
+
+    def iter_chunks(self, chunk_rows:int=262144, seed:Optional[int]=None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        starts = np.arange(0, self.n_rows, chunk_rows)
+        if seed is not None: np.random.default_rng(seed).shuffle(starts)
+        for s in starts:
+            yield np.asarray(self.X[s:s+chunk_rows], dtype=float), np.asarray(self.y[s:s+chunk_rows], dtype=float)
+
+class ParquetSource:
+    # One Parquet file or a directory of them with FEAT_NAMES columns plus a label column,
+    # streamed as record batches through pyarrow.dataset.
+    def __init__(self, path:str, label:str="y"):
+        try:
+            import pyarrow.dataset as ds
+        except ImportError as e:
+            raise RuntimeError("Parquet sources need pyarrow (pip install pyarrow)") from e
+        self.ds = ds.dataset(path, format="parquet"); self.label = label
+        missing = [c for c in FEAT_NAMES+[label] if c not in self.ds.schema.names]
+        if missing: raise ValueError(f"{path}: missing columns {missing}")
+        self.n_rows = int(self.ds.count_rows())
+
+    def iter_chunks(self, chunk_rows:int=262144, seed:Optional[int]=None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        cols = FEAT_NAMES + [self.label]
+        # row groups are the shuffle unit (like NpySource's chunk starts): a seed permutes their order
+        parts = [rg for frag in self.ds.get_fragments() for rg in frag.split_by_row_group()]
+        if seed is not None: parts = [parts[i] for i in np.random.default_rng(seed).permutation(len(parts))]
+        batches = (b for part in parts for b in part.to_batches(schema=self.ds.schema, columns=cols, batch_size=chunk_rows))
+        for batch in batches:
+            if batch.num_rows == 0: continue
+            A = np.column_stack([batch.column(i).to_numpy(zero_copy_only=False).astype(float, copy=False) for i in range(len(cols))])
+            yield A[:, :-1], A[:, -1]
+
+def open_source(path:str, y_path:Optional[str]=None, label:str="y"):
+    if path.endswith(".npy"): return NpySource(path, y_path=y_path)
+    if path.endswith(".parquet") or os.path.isdir(path): return ParquetSource(path, label=label)
+    raise ValueError(f"unsupported dataset {path!r}: expected .npy, .parquet or a Parquet directory")
+
+def streaming_stats(source, chunk_rows:int=262144) -> Tuple[np.ndarray, np.ndarray]:
+    # single pass, chunk moments merged with Chan et al.; matches standardize() (ddof=0, +1e-8)
+    n = 0; mean = np.zeros(len(FEAT_NAMES)); M2 = np.zeros(len(FEAT_NAMES))
+    for X, _ in source.iter_chunks(chunk_rows):
+        nb = len(X); mb = X.mean(axis=0); M2b = ((X - mb)**2).sum(axis=0)
+        delta = mb - mean; tot = n + nb
+        mean = mean + delta*nb/tot; M2 = M2 + M2b + delta**2*n*nb/tot; n = tot
+    if n == 0: raise ValueError("empty dataset")
+    return mean, np.sqrt(M2/n) + 1e-8
+
+def train_from_source(source, lr=0.01, epochs=3, l2=1e-3, batch_size=4096, optimizer="adam", chunk_rows=262144, seed=0):
+    mu, sigma = streaming_stats(source, chunk_rows=chunk_rows)
+    model = train_logit_minibatch(source, mu, sigma, lr=lr, epochs=epochs, l2=l2, batch_size=batch_size,
+                                  optimizer=optimizer, chunk_rows=chunk_rows, seed=seed)
+    return model, mu, sigma
+
+# bump when synth_dataset's generator changes so persisted .npy files are not reused
+SYNTH_VERSION = 1
+
+class DatasetCache:
+    # LRU of synth_dataset(n, seed) results as read-only arrays, bounded by max_bytes.
+    # With persist_dir, generated sets are also written as .npy and memory-mapped on later runs.
+    def __init__(self, max_bytes:int = 512*2**20, persist_dir:Optional[str] = None):
+        self.max_bytes = int(max_bytes); self.persist_dir = persist_dir
+        self._items: "OrderedDict[Tuple[int,int], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock(); self.nbytes = 0
+        self.hits = 0; self.misses = 0; self.disk_hits = 0
+
+    def _files(self, n:int, seed:int) -> Tuple[str, str]:
+        stem = os.path.join(self.persist_dir, f"synth_v{SYNTH_VERSION}_n{n}_s{seed}")
+        return stem + "_X.npy", stem + "_y.npy"
+
+    def _load_or_build(self, n:int, seed:int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.persist_dir:
+            fx, fy = self._files(n, seed)
+            if os.path.exists(fx) and os.path.exists(fy):
+                self.disk_hits += 1
+                return np.load(fx, mmap_mode="r"), np.load(fy, mmap_mode="r")
+        X, y = synth_dataset(n=n, seed=seed)
+        if self.persist_dir:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            for path, arr in ((fx, X), (fy, y)):
+                # unique temp name per writer (threads share a pid), then an atomic rename
+                with tempfile.NamedTemporaryFile(dir=self.persist_dir, suffix=".tmp.npy", delete=False) as f:
+                    np.save(f, arr)
+                os.replace(f.name, path)
+        X.setflags(write=False); y.setflags(write=False)
+        return X, y
+
+    def get(self, n:int, seed:int) -> Tuple[np.ndarray, np.ndarray]:
+        key = (int(n), int(seed))
+        with self._lock:
+            if key in self._items:
+                self.hits += 1; self._items.move_to_end(key)
+                return self._items[key]
+        # build outside the lock; a concurrent miss on the same key just builds it twice
+        X, y = self._load_or_build(*key)
+        size = X.nbytes + y.nbytes
+        with self._lock:
+            self.misses += 1
+            if key not in self._items and size <= self.max_bytes:
+                self._items[key] = (X, y); self.nbytes += size
+                while self.nbytes > self.max_bytes:
+                    _, (ox, oy) = self._items.popitem(last=False); self.nbytes -= ox.nbytes + oy.nbytes
+        return X, y
+
+    def clear(self):
+        with self._lock:
+            self._items.clear(); self.nbytes = 0
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._items), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits, "persist_dir": self.persist_dir}
@@ -1,6 +1,6 @@
 
-import os, csv, time
-from typing import Dict, Any
+import os, csv, time, json, math, ast, sqlite3, threading, atexit
+from typing import Dict, Any, List, Optional, Tuple
 
 class CSVLogger:
     def __init__(self, path:str = "data/experiments.csv"):
@@ -19,3 +19,114 @@ class CSVLogger:
                 "params": str(params),
                 "metrics": str(metrics)
             })
+
+class ExperimentStore:
+    # SQLite experiment log: typed columns, JSON params/metrics, numeric metrics in their own
+    # indexed table for best-by-metric. log() buffers rows and writes them in one transaction.
+    def __init__(self, path:str = "data/experiments.db", flush_every:int = 32, flush_seconds:float = 1.0,
+                 import_csv:Optional[str] = None):
+        self.path = path; self.flush_every = flush_every; self.flush_seconds = flush_seconds
+        self._import_csv = import_csv
+        self._conn: Optional[sqlite3.Connection] = None; self._open_lock = threading.Lock()
+        self._lock = threading.Lock(); self._buf: List[Tuple[float, str, Dict[str,Any], Dict[str,Any]]] = []
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush)
+
+    @property
+    def _con(self) -> sqlite3.Connection:
+        # opened on first use, so constructing the store (at API import) touches no disk
+        if self._conn is None:
+            with self._open_lock:
+                if self._conn is None: self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        con = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, ts REAL NOT NULL, event TEXT NOT NULL, params TEXT, metrics TEXT);
+            CREATE INDEX IF NOT EXISTS runs_ts ON runs(ts);
+            CREATE INDEX IF NOT EXISTS runs_event_id ON runs(event, id);
+            CREATE TABLE IF NOT EXISTS run_metrics (run_id INTEGER NOT NULL, key TEXT NOT NULL, value REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS run_metrics_key_value ON run_metrics(key, value);
+            CREATE INDEX IF NOT EXISTS run_metrics_run ON run_metrics(run_id);
+        """)
+        if is_new and self._import_csv and os.path.exists(self._import_csv):
+            self._insert(con, self._read_csv(self._import_csv))
+        return con
+
+    def log(self, event:str, params:Dict[str,Any], metrics:Dict[str,Any]):
+        with self._lock:
+            self._buf.append((time.time(), event, params, metrics))
+            due = len(self._buf) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_seconds
+        if due: self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._buf = self._buf, []
+            self._last_flush = time.monotonic()
+            if not rows: return
+            self._insert(self._con, rows)
+
+    @staticmethod
+    def _insert(con: sqlite3.Connection, rows):
+        with con:
+            for ts, event, params, metrics in rows:
+                cur = con.execute("INSERT INTO runs(ts,event,params,metrics) VALUES(?,?,?,?)",
+                                  (ts, event, json.dumps(params, default=str), json.dumps(metrics, default=str)))
+                nums = [(cur.lastrowid, k, float(v)) for k, v in metrics.items()
+                        if isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)]
+                if nums: con.executemany("INSERT INTO run_metrics(run_id,key,value) VALUES(?,?,?)", nums)
+
+    @staticmethod
+    def _row(r) -> Dict[str,Any]:
+        return {"id": r[0], "ts": r[1], "event": r[2], "params": json.loads(r[3] or "{}"), "metrics": json.loads(r[4] or "{}")}
+
+    def query(self, event:Optional[str]=None, since:Optional[float]=None, until:Optional[float]=None,
+              limit:int=50, offset:int=0, before_id:Optional[int]=None) -> List[Dict[str,Any]]:
+        # newest first (id order = append order); pass before_id (last id of the previous page) for O(limit) keyset paging
+        self.flush()
+        q = "SELECT id,ts,event,params,metrics FROM runs WHERE 1=1"; args: List[Any] = []
+        if event: q += " AND event=?"; args.append(event)
+        if since is not None: q += " AND ts>=?"; args.append(since)
+        if until is not None: q += " AND ts<=?"; args.append(until)
+        if before_id is not None: q += " AND id<?"; args.append(before_id)
+        q += " ORDER BY id DESC LIMIT ? OFFSET ?"; args += [int(limit), int(offset)]
+        with self._lock:
+            return [self._row(r) for r in self._con.execute(q, args).fetchall()]
+
+    def best(self, metric:str, event:Optional[str]=None, mode:str="max", limit:int=1) -> List[Dict[str,Any]]:
+        self.flush()
+        order = "DESC" if mode == "max" else "ASC"
+        q = ("SELECT r.id,r.ts,r.event,r.params,r.metrics FROM run_metrics m JOIN runs r ON r.id=m.run_id WHERE m.key=?"
+             + (" AND r.event=?" if event else "") + f" ORDER BY m.value {order} LIMIT ?")
+        args = [metric] + ([event] if event else []) + [int(limit)]
+        with self._lock:
+            return [self._row(r) for r in self._con.execute(q, args).fetchall()]
+
+    def counts(self) -> Dict[str,int]:
+        self.flush()
+        with self._lock:
+            return dict(self._con.execute("SELECT event, COUNT(*) FROM runs GROUP BY event").fetchall())
+
+    @staticmethod
+    def _read_csv(path:str) -> List[Tuple[float, str, Dict[str,Any], Dict[str,Any]]]:
+        # CSVLogger files wrote params/metrics with str(dict)
+        rows = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    params = ast.literal_eval(row["params"] or "{}"); metrics = ast.literal_eval(row["metrics"] or "{}")
+                except (ValueError, SyntaxError):
+                    params, metrics = {"raw": row["params"]}, {"raw": row["metrics"]}
+                rows.append((float(row["ts"]), row["event"], params, metrics))
+        return rows
+
+    def import_csv(self, path:str) -> int:
+        # one-off migration of a CSVLogger file
+        rows = self._read_csv(path)
+        with self._lock: self._buf.extend(rows)
+        self.flush()
+        return len(rows)
@@ -0,0 +1,156 @@
+import threading, numpy as np
+from collections import OrderedDict
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from .model import FEAT_NAMES
+
+# Raw flight telemetry (per-sample t, x, y, vx, vy, pitch, roll, as flightTelemetry stores it)
+# -> model rows. Instantaneous channels map onto FEAT_NAMES: airspeed = |(vx, vy)|, altitude = y,
+# vspeed = vy; wind_x/wind_y pass through when the log has them, else 0 (their training mean).
+# Window statistics are aligned at the window end and only emitted once the longest window is
+# full inside one flight: means come from cumulative sums, min/max from a block prefix/suffix
+# scan and least-squares slopes from sliding_window_view over bounded row chunks, so there is
+# no Python loop over rows or flights. The same kernel backs batch extraction (training data)
+# and RollingFeatures (streaming), so both produce identical rows.
+
+CHANNELS = ["airspeed","altitude","vspeed","pitch","roll"]
+STATS = ("mean","slope","min","max")
+
+class WindowFeatures(NamedTuple):
+    X: np.ndarray         # (m, 7) FEAT_NAMES rows for the model (channels averaged over `smooth` samples)
+    F: np.ndarray         # (m, k) window statistics, columns named by `names`
+    names: List[str]      # "<channel>_<stat>_<window>"
+    rows: np.ndarray      # (m,) index of the window-end sample in the input, to align labels/ids
+    t: np.ndarray         # (m,) time of the window-end sample
+
+def base_channels(cols: Dict[str, np.ndarray]) -> np.ndarray:
+    # (n, 7) instantaneous FEAT_NAMES matrix from raw telemetry columns
+    vx = np.asarray(cols["vx"], dtype=float); vy = np.asarray(cols["vy"], dtype=float); zero = np.zeros(len(vx))
+    return np.column_stack([np.hypot(vx, vy), np.asarray(cols["y"], dtype=float), vy,
+                            np.asarray(cols["pitch"], dtype=float), np.asarray(cols["roll"], dtype=float),
+                            np.asarray(cols.get("wind_x", zero), dtype=float), np.asarray(cols.get("wind_y", zero), dtype=float)])
+
+def feature_names(windows: Sequence[int], stats: Sequence[str] = STATS, channels: Sequence[str] = CHANNELS) -> List[str]:
+    return [f"{c}_{s}_{w}" for w in windows for s in stats for c in channels]
+
+def rolling_mean(V: np.ndarray, w: int) -> np.ndarray:
+    # (n, c) -> (n-w+1, c) mean of each length-w window, from one cumulative sum; a NaN only
+    # blanks the windows that contain it instead of every later prefix sum
+    miss = np.isnan(V)
+    c = np.cumsum(np.where(miss, 0.0, V), axis=0)
+    out = c[w-1:].copy(); out[1:] -= c[:-w]; out /= w
+    if miss.any():
+        m = np.cumsum(miss, axis=0); bad = m[w-1:].copy(); bad[1:] -= m[:-w]
+        out[bad > 0] = np.nan
+    return out
+
+def sliding_extreme(V: np.ndarray, w: int, fn=np.minimum) -> np.ndarray:
+    # (c, n) -> (c, n-w+1) running min/max in O(n) whatever w (van Herk / Gil-Werman): cut each
+    # row into length-w blocks, prefix- and suffix-accumulate inside blocks, and every window is
+    # one suffix from its first block combined with one prefix from the next
+    c, n = V.shape; nb = -(-n//w)
+    P = np.empty((c, nb*w)); P[:, :n] = V; P[:, n:] = V[:, -1:]
+    B = P.reshape(c, nb, w)
+    pre = fn.accumulate(B, axis=2).reshape(c, -1)
+    suf = fn.accumulate(B[:, :, ::-1], axis=2)[:, :, ::-1].reshape(c, -1)
+    return fn(suf[:, :n-w+1], pre[:, w-1:n])
+
+def window_stats(V: np.ndarray, t: np.ndarray, w: int, stats: Sequence[str] = STATS, chunk_rows: int = 16384) -> Dict[str, np.ndarray]:
+    # (c, n) channel-major values and (n,) times -> {stat: (c, n-w+1)}; slope is least squares
+    # d(value)/dt. Means and min/max are O(n) whatever w; slopes walk strided windows
+    # chunk_rows at a time, so their temporaries stay at chunk_rows*w.
+    V = np.ascontiguousarray(V, dtype=float)
+    m = V.shape[1] - w + 1
+    if m <= 0: return {s: np.empty((V.shape[0], 0)) for s in stats}
+    out = {}
+    vbar = rolling_mean(V.T, w).T
+    if "mean" in stats: out["mean"] = vbar
+    if "min" in stats: out["min"] = sliding_extreme(V, w, np.minimum)
+    if "max" in stats: out["max"] = sliding_extreme(V, w, np.maximum)
+    if "slope" in stats:
+        # centred per window (sum (t - tbar)(v - vbar) / sum (t - tbar)^2) on strided views: exact on long
+        # flights and epoch timestamps, where the cumulative-sum form cancels catastrophically
+        out["slope"] = sl = np.empty((V.shape[0], m))
+        for s0 in range(0, m, chunk_rows):
+            s1 = min(m, s0 + chunk_rows)
+            tw = sliding_window_view(t[s0:s1+w-1], w)
+            tc = tw - tw.mean(axis=1, keepdims=True)
+            sxx = np.einsum("kw,kw->k", tc, tc)
+            Vw = sliding_window_view(V[:, s0:s1+w-1], w, axis=1)  # (c, k, w) view, unit inner stride
+            # sum(tc) is not exactly 0 once t is rounded at epoch magnitude: subtract vbar*sum(tc)
+            sxv = np.einsum("kw,ckw->ck", tc, Vw) - vbar[:, s0:s1]*tc.sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sl[:, s0:s1] = sxv/sxx
+    return out
+
+def _ffill(V: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # carry the last observed value forward inside each flight (telemetry fields are nullable)
+    miss = np.isnan(V)
+    if not miss.any(): return V
+    idx = np.where(miss & ~starts[:, None], 0, np.arange(len(V))[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return np.take_along_axis(V, idx, axis=0)
+
+def extract(cols: Dict[str, np.ndarray], ids: Optional[np.ndarray] = None, windows: Sequence[int] = (5, 25),
+            stats: Sequence[str] = STATS, smooth: int = 1, chunk_rows: int = 16384) -> WindowFeatures:
+    # cols: raw telemetry columns ("t" or "ts", "y", "vx", "vy", "pitch", "roll"; optional wind_x/wind_y),
+    # several flights allowed when ids is given. Rows are ordered by (id, t); windows count samples.
+    windows = sorted({int(w) for w in windows}); smooth = int(smooth)
+    if not windows or windows[0] < 2 or smooth < 1: raise ValueError("windows must be >= 2 samples and smooth >= 1")
+    t = np.asarray(cols["t"] if cols.get("t") is not None else cols["ts"], dtype=float)
+    n = len(t)
+    in_order = ids is None and bool(np.all(t[1:] >= t[:-1]))
+    order = np.arange(n) if in_order else np.lexsort((t, ids)) if ids is not None else np.argsort(t, kind="stable")
+    seg = np.zeros(n, dtype=np.int64)
+    if ids is not None and n:
+        sid = np.asarray(ids)[order]; seg[1:] = np.cumsum(sid[1:] != sid[:-1])
+    starts = np.ones(n, dtype=bool); starts[1:] = seg[1:] != seg[:-1]
+    pick = (lambda a: np.asarray(a)) if in_order else (lambda a: np.asarray(a)[order])
+    t = pick(t)
+    B = _ffill(base_channels({k: pick(v) for k, v in cols.items() if k in ("y","vx","vy","pitch","roll","wind_x","wind_y")}), starts)
+    span = max(windows[-1], smooth)
+    end = np.arange(span-1, n)
+    end = end[seg[end] == seg[end-span+1]]  # window must not cross a flight boundary
+    # window-start index per size; one flight (the streaming case) gets plain slices instead of gathers
+    one = len(end) == max(n-span+1, 0)
+    start = (lambda w: slice(span-w, n-w+1)) if one else (lambda w: end-w+1)
+    ci = [FEAT_NAMES.index(c) for c in CHANNELS]
+    X = rolling_mean(B, smooth)[start(smooth)] if smooth > 1 else B[start(1)]
+    Bc = np.ascontiguousarray(B[:, ci].T)
+    F = np.empty((len(windows)*len(stats)*len(ci), len(end)))  # filled feature-major, returned as a (m, k) view
+    j = 0
+    for w in windows:  # a handful of window sizes, each fully vectorized
+        st = window_stats(Bc, t, w, stats, chunk_rows)
+        for s in stats:
+            F[j:j+len(ci)] = st[s][:, start(w)]; j += len(ci)
+    return WindowFeatures(X=X, F=F.T, names=feature_names(windows, stats), rows=order[end], t=t[end])
+
+class RollingFeatures:
+    # streaming extraction: keeps the last span-1 raw samples of each flight so that rows produced
+    # from successive chunks equal extract() over the concatenated series. Least recently updated
+    # flights are evicted past max_flights.
+    def __init__(self, windows: Sequence[int] = (5, 25), stats: Sequence[str] = STATS, smooth: int = 1, max_flights: int = 10000):
+        self.windows = sorted({int(w) for w in windows}); self.stats = tuple(stats); self.smooth = int(smooth)
+        self.span = max(self.windows[-1], self.smooth); self.max_flights = max_flights
+        self._tails: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def push(self, flight_id: str, cols: Dict[str, np.ndarray]) -> WindowFeatures:
+        cols = {k: np.asarray(v, dtype=float) for k, v in cols.items() if v is not None}
+        with self._lock:
+            tail = self._tails.pop(flight_id, None)
+            if tail is not None: cols = {k: np.concatenate([tail[k], cols[k]]) for k in cols if k in tail}
+            n = len(next(iter(cols.values())))
+            self._tails[flight_id] = {k: v[max(0, n-self.span+1):] for k, v in cols.items()}
+            while len(self._tails) > self.max_flights: self._tails.popitem(last=False)
+        k = 0 if tail is None else len(next(iter(tail.values())))
+        wf = extract(cols, None, self.windows, self.stats, self.smooth)
+        keep = wf.rows >= k  # rows already emitted from the previous chunk's tail never reappear
+        return WindowFeatures(wf.X[keep], wf.F[keep], wf.names, wf.rows[keep]-k, wf.t[keep])
+
+    def pending(self, flight_id: str) -> int:
+        tail = self._tails.get(flight_id)
+        return 0 if tail is None else len(next(iter(tail.values())))
+
+    def summary(self) -> Dict[str, int]:
+        return {"flights": len(self._tails), "max_flights": self.max_flights, "span": self.span}
@@ -0,0 +1,159 @@
+import time, uuid, threading, multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+# Background training jobs: work runs in a small spawn-based process pool so the API
+# workers stay free for /predict. Each job gets a Manager dict shared with its worker
+# process; the worker writes throttled progress there and polls it for a cancel flag.
+
+TERMINAL = ("done", "failed", "cancelled")
+
+class JobCancelled(Exception):
+    pass
+
+class QueueFull(Exception):
+    pass
+
+# worker-process globals, built once per child
+_W_REGISTRY = None; _W_CACHE = None; _W_LOG = None
+
+def _worker_ctx(registry_dir:str, cache_cfg:Dict[str, Any], log_path:Optional[str]):
+    global _W_REGISTRY, _W_CACHE, _W_LOG
+    from .registry import ModelRegistry
+    from .datasets import DatasetCache
+    from .experiments import ExperimentStore
+    if _W_REGISTRY is None or _W_REGISTRY.root != registry_dir:
+        _W_REGISTRY = ModelRegistry(registry_dir, poll_seconds=0)
+    if _W_CACHE is None:
+        _W_CACHE = DatasetCache(**cache_cfg)
+    if log_path and (_W_LOG is None or _W_LOG.path != log_path):
+        _W_LOG = ExperimentStore(log_path)
+    return _W_REGISTRY, _W_CACHE, (_W_LOG if log_path else None)
+
+def _run_job(kind:str, params:Dict[str, Any], registry_dir:str, cache_cfg:Dict[str, Any], log_path:Optional[str], state) -> Dict[str, Any]:
+    from . import tasks
+    registry, cache, exlog = _worker_ctx(registry_dir, cache_cfg, log_path)
+    state["status"] = "running"; state["started"] = time.time()
+    last = [0.0, None]
+    def progress(stage:str, done:int, total:int):
+        now = time.monotonic()
+        # one IPC round trip at most every 0.2 s (or on stage change/completion); tasks tick a
+        # "publish" stage before any registry write, so the cancel flag is always read ahead of it
+        if stage != last[1] or done >= total or now - last[0] >= 0.2:
+            last[0] = now; last[1] = stage
+            state["progress"] = {"stage": stage, "done": int(done), "total": int(total)}
+            if state.get("cancel"): raise JobCancelled()
+    try:
+        if kind == "train": return tasks.run_train(params, registry, cache, progress)
+        if kind == "train_cv": return tasks.run_train_cv(params, cache, progress)
+        if kind == "train_ensemble": return tasks.run_train_ensemble(params, registry, cache, progress)
+        if kind == "calibrate": return tasks.run_calibrate(registry, cache, progress, method=params.get("method", "platt"))
+        if kind == "sweep":
+            from .sweep import run_sweep
+            return run_sweep(params, registry, cache, cache_cfg, log=(exlog.log if exlog else None), progress=progress,
+                             n_workers=params.get("workers", 1))
+    finally:
+        if exlog: exlog.flush()  # pool processes outlive the job; make its rows visible now
+    raise ValueError(f"unknown job kind {kind!r}")
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    created: float
+    future: Any = None
+    state: Any = None  # Manager dict while queued/running, dropped once finished
+    status: str = "queued"
+    started: Optional[float] = None
+    progress: Optional[Dict[str, Any]] = None
+    finished: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def sync(self):
+        if self.state is None: return
+        try:
+            shared = dict(self.state)
+        except Exception:
+            return
+        self.started = shared.get("started", self.started); self.progress = shared.get("progress", self.progress)
+        if self.status not in TERMINAL: self.status = shared.get("status", self.status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        self.sync()
+        return {"job_id": self.id, "kind": self.kind, "status": self.status, "params": self.params, "created": self.created,
+                "started": self.started, "finished": self.finished, "progress": self.progress,
+                "result": self.result, "error": self.error}
+
+class JobManager:
+    def __init__(self, registry_dir:str, cache_cfg:Dict[str, Any], max_workers:int = 1, max_pending:int = 16,
+                 on_done: Optional[Callable[[Job], None]] = None, keep_finished:int = 200, log_path:Optional[str] = None):
+        self.registry_dir = registry_dir; self.cache_cfg = cache_cfg; self.log_path = log_path
+        self.max_workers = max(1, int(max_workers)); self.max_pending = int(max_pending)
+        self.on_done = on_done; self.keep_finished = keep_finished
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock(); self._pool = None; self._manager = None
+
+    def _ensure_pool(self):
+        # started lazily so importing the API never forks anything
+        if self._pool is None:
+            ctx = mp.get_context("spawn")
+            self._manager = ctx.Manager()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+
+    def active_count(self) -> int:
+        return sum(1 for j in self.jobs.values() if j.status not in TERMINAL)
+
+    def submit(self, kind:str, params:Dict[str, Any]) -> Job:
+        with self._lock:
+            if self.active_count() >= self.max_workers + self.max_pending:
+                raise QueueFull(f"{self.active_count()} jobs already queued or running")
+            self._ensure_pool()
+            job = Job(id=uuid.uuid4().hex[:12], kind=kind, params=params, created=time.time())
+            job.state = self._manager.dict({"status": "queued", "cancel": False})
+            self.jobs[job.id] = job
+            self._trim()
+        job.future = self._pool.submit(_run_job, kind, params, self.registry_dir, self.cache_cfg, self.log_path, job.state)
+        job.future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        return job
+
+    def _finish(self, job:Job, fut):
+        job.sync()
+        try:
+            job.result = fut.result(); job.status = "done"
+        except (CancelledError, JobCancelled):
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"; job.error = f"{type(e).__name__}: {e}"
+        job.finished = time.time(); job.state = None
+        if self.on_done:
+            try: self.on_done(job)
+            except Exception: pass
+
+    def _trim(self):
+        done = [j for j in self.jobs.values() if j.status in TERMINAL]
+        for j in sorted(done, key=lambda j: j.created)[:max(0, len(done) - self.keep_finished)]:
+            del self.jobs[j.id]
+
+    def get(self, job_id:str) -> Job:
+        if job_id not in self.jobs: raise KeyError(f"job {job_id} not found")
+        return self.jobs[job_id]
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [j.to_dict() for j in sorted(self.jobs.values(), key=lambda j: j.created, reverse=True)]
+
+    def cancel(self, job_id:str) -> Job:
+        job = self.get(job_id)
+        if job.status in TERMINAL: return job
+        if job.future is not None and job.future.cancel():
+            return job  # never started; the done callback marks it cancelled
+        state = job.state
+        if state is not None: state["cancel"] = True  # running: the worker aborts at its next progress tick
+        return job
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True); self._manager.shutdown()
+            self._pool = None; self._manager = None
@@ -9,6 +9,8 @@ FEAT_NAMES = ["airspeed","altitude","vspeed","pitch","roll","wind_x","wind_y"]
 class LogitModel:
     w: np.ndarray
     b: float
+    n_iter: int = 0
+    converged: bool = False
     def predict_proba(self, X: np.ndarray) -> np.ndarray:
         z = X @ self.w + self.b
         return 1.0/(1.0 + np.exp(-z))
@@ -22,21 +24,197 @@ class LogitModel:
         data = np.load(path)
         return LogitModel(w=data["w"], b=float(data["b"]))
 
+def fold_affine(model: LogitModel, mu: np.ndarray, sigma: np.ndarray, calib=None) -> Tuple[np.ndarray, float]:
+    # standardize -> logit -> Platt collapse into one affine map: p = sigmoid(X @ w + b) on raw X
+    # (sigma gets the same +1e-8 the serving path always added)
+    w = model.w/(sigma + 1e-8)
+    b = float(model.b - mu @ w)
+    if calib:
+        a, c = calib; w = a*w; b = a*b + c
+    return w, b
+
+def predict_fused(X: np.ndarray, w: np.ndarray, b: float, columns: bool=False) -> np.ndarray:
+    # X is (n, d), or (d, n) feature-major with columns=True; float32 input is scored in float32
+    w = w.astype(X.dtype, copy=False) if X.dtype in (np.float32, np.float64) else w
+    z = w @ X if columns else X @ w
+    z += b; np.negative(z, out=z)
+    with np.errstate(over="ignore"): np.exp(z, out=z)
+    z += 1.0; np.reciprocal(z, out=z)
+    return z
+
 def standardize(X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     mu = X.mean(axis=0)
     sigma = X.std(axis=0) + 1e-8
     return (X-mu)/sigma, mu, sigma
 
-def train_logit(X: np.ndarray, y: np.ndarray, lr=0.05, epochs=400, l2=1e-3):
-    Xs, mu, sigma = standardize(X)
+def _sigmoid(z):
+    return 1.0/(1.0+np.exp(-z))
+
+def _logit_loss_grad(Xa, y, theta, l2):
+    # mean log-loss + l2/2*|w|^2 (bias not penalized); Xa carries a trailing ones column
+    z = Xa @ theta; p = _sigmoid(z)
+    reg = theta.copy(); reg[-1] = 0.0
+    loss = float(np.mean(np.logaddexp(0.0, z) - y*z)) + 0.5*l2*float(reg @ reg)
+    grad = (Xa.T @ (p - y))/len(y) + l2*reg
+    return loss, grad, p
+
+def _solve_gd(Xs, y, lr, epochs, l2, tol, callback=None):
     n, d = Xs.shape; w = np.zeros(d); b = 0.0
-    for _ in range(epochs):
+    for it in range(epochs):
         z = Xs @ w + b
         p = 1.0/(1.0+np.exp(-z))
         grad_w = (Xs.T @ (p - y))/n + l2*w
         grad_b = float(np.mean(p - y))
+        if max(np.max(np.abs(grad_w)), abs(grad_b)) < tol: return w, b, it, True
         w -= lr * grad_w; b -= lr * grad_b
-    return LogitModel(w=w, b=b), mu, sigma
+        if callback: callback(it+1, epochs)
+    return w, b, epochs, False
+
+def _solve_newton(Xs, y, epochs, l2, tol, callback=None):
+    # IRLS: d+1 unknowns, so each step is one weighted Gram matrix and a tiny solve
+    n, d = Xs.shape; Xa = np.hstack([Xs, np.ones((n,1))]); theta = np.zeros(d+1)
+    R = np.full(d+1, l2); R[-1] = 1e-10
+    for it in range(1, epochs+1):
+        _, grad, p = _logit_loss_grad(Xa, y, theta, l2)
+        H = (Xa.T * (p*(1.0-p))) @ Xa / n + np.diag(R)
+        step = np.linalg.solve(H, grad)
+        theta -= step
+        if callback: callback(it, epochs)
+        if np.max(np.abs(step)) < tol: return theta[:-1], float(theta[-1]), it, True
+    return theta[:-1], float(theta[-1]), epochs, False
+
+def _solve_lbfgs(Xs, y, epochs, l2, tol, m=10, callback=None):
+    n, d = Xs.shape; Xa = np.hstack([Xs, np.ones((n,1))]); theta = np.zeros(d+1)
+    f, g, _ = _logit_loss_grad(Xa, y, theta, l2)
+    S: List[np.ndarray] = []; Yk: List[np.ndarray] = []
+    for it in range(1, epochs+1):
+        if np.max(np.abs(g)) < tol: return theta[:-1], float(theta[-1]), it-1, True
+        # two-loop recursion
+        q = g.copy(); alphas = []
+        for s, yv in zip(reversed(S), reversed(Yk)):
+            a = (s @ q)/(yv @ s); alphas.append(a); q -= a*yv
+        if S: q *= (S[-1] @ Yk[-1])/(Yk[-1] @ Yk[-1])
+        for (s, yv), a in zip(zip(S, Yk), reversed(alphas)):
+            q += s*(a - (yv @ q)/(yv @ s))
+        direction = -q; t = 1.0; gd = float(g @ direction)
+        if gd >= 0: direction = -g; gd = -float(g @ g); S.clear(); Yk.clear()
+        while True:  # Armijo backtracking
+            theta_new = theta + t*direction
+            f_new, g_new, _ = _logit_loss_grad(Xa, y, theta_new, l2)
+            if f_new <= f + 1e-4*t*gd or t < 1e-10: break
+            t *= 0.5
+        s = theta_new - theta; yv = g_new - g
+        if yv @ s > 1e-12:
+            S.append(s); Yk.append(yv)
+            if len(S) > m: S.pop(0); Yk.pop(0)
+        theta, f, g = theta_new, f_new, g_new
+        if callback: callback(it, epochs)
+    return theta[:-1], float(theta[-1]), epochs, False
+
+SOLVERS = ("gd", "newton", "lbfgs")
+
+def train_logit(X: np.ndarray, y: np.ndarray, lr=0.05, epochs=400, l2=1e-3, solver="gd", tol=1e-6, callback=None):
+    # callback(iteration, max_iterations) runs after every step (progress reporting / cancellation)
+    Xs, mu, sigma = standardize(X)
+    y = np.asarray(y, dtype=float)
+    if solver == "gd": w, b, n_iter, conv = _solve_gd(Xs, y, lr, epochs, l2, tol, callback=callback)
+    elif solver == "newton": w, b, n_iter, conv = _solve_newton(Xs, y, epochs, l2, tol, callback=callback)
+    elif solver == "lbfgs": w, b, n_iter, conv = _solve_lbfgs(Xs, y, epochs, l2, tol, callback=callback)
+    else: raise ValueError(f"unknown solver {solver!r}; expected one of {SOLVERS}")
+    return LogitModel(w=w, b=b, n_iter=int(n_iter), converged=bool(conv)), mu, sigma
+
+def train_logit_minibatch(source, mu: np.ndarray, sigma: np.ndarray, lr=0.01, epochs=3, l2=1e-3,
+                          batch_size=4096, optimizer="adam", chunk_rows=262144, seed=0):
+    # Out-of-core SGD/Adam: `source.iter_chunks(chunk_rows, seed)` yields (X, y) chunks, rows are
+    # shuffled within each chunk, so memory stays O(chunk_rows) whatever the dataset size.
+    if optimizer not in ("sgd", "adam"): raise ValueError(f"unknown optimizer {optimizer!r}")
+    d = len(mu); theta = np.zeros(d+1); m1 = np.zeros(d+1); m2 = np.zeros(d+1); t = 0
+    rng = np.random.default_rng(seed); b1, b2, eps = 0.9, 0.999, 1e-8
+    for ep in range(epochs):
+        for X, y in source.iter_chunks(chunk_rows, seed=seed+ep):
+            Xs = (X - mu)/sigma; perm = rng.permutation(len(Xs))
+            for s in range(0, len(perm), batch_size):
+                idx = perm[s:s+batch_size]; xb = Xs[idx]
+                p = 1.0/(1.0+np.exp(-(xb @ theta[:-1] + theta[-1])))
+                r = p - y[idx]
+                g = np.r_[(xb.T @ r)/len(idx) + l2*theta[:-1], r.mean()]
+                if optimizer == "sgd":
+                    theta -= lr*g
+                else:
+                    t += 1; m1 = b1*m1 + (1-b1)*g; m2 = b2*m2 + (1-b2)*g*g
+                    theta -= lr*(m1/(1-b1**t))/(np.sqrt(m2/(1-b2**t)) + eps)
+    return LogitModel(w=theta[:-1].copy(), b=float(theta[-1]), n_iter=int(epochs))
+
+def kfold_masks(n:int, folds) -> np.ndarray:
+    # (n, k) boolean training masks, column i excludes fold i
+    M = np.ones((n, len(folds)), dtype=bool)
+    for i, va in enumerate(folds): M[va, i] = False
+    return M
+
+def train_logit_batched(X: np.ndarray, y: np.ndarray, masks: np.ndarray, lr=0.05, epochs=400, l2=1e-3, tol=1e-6, callback=None):
+    # Full-batch GD for m models at once; model j sees the rows where masks[:, j] (l2 may be
+    # per model). Each model's standardization is folded into its weights so a step is two
+    # GEMMs over the shared matrix. Returns [(LogitModel, mu, sigma)] like train_logit.
+    X = np.asarray(X, dtype=float); y = np.asarray(y, dtype=float)
+    M = np.asarray(masks, dtype=float); n, d = X.shape; m = M.shape[1]
+    l2 = np.broadcast_to(np.asarray(l2, dtype=float), (m,))[:,None]
+    nf = M.sum(axis=0)
+    shift = X.mean(axis=0)  # global centering keeps the masked moments well conditioned
+    XT = np.ones((d+1, n)); XT[:d] = (X - shift).T  # (d+1, n) with a bias row: models x samples GEMMs
+    mu = (XT[:d] @ M).T/nf[:,None]
+    sigma = np.sqrt(np.maximum(((XT[:d]*XT[:d]) @ M).T/nf[:,None] - mu*mu, 0.0)) + 1e-8
+    Mn = np.ascontiguousarray((M/nf).T); yr = y[None,:]
+    W = np.zeros((m, d)); b = np.zeros(m); Wa = np.empty((m, d+1)); Z = np.empty((m, n))
+    active = np.ones(m, dtype=bool); n_iter = np.full(m, epochs)
+    with np.errstate(over="ignore"):
+        for it in range(epochs):
+            Wa[:, :d] = W/sigma; Wa[:, d] = b - np.sum(mu*Wa[:, :d], axis=1)
+            np.dot(Wa, XT, out=Z)
+            np.negative(Z, out=Z); np.exp(Z, out=Z); Z += 1.0; np.reciprocal(Z, out=Z)
+            Z -= yr; Z *= Mn
+            G = (XT @ Z.T).T; rs = G[:, d]
+            grad_w = (G[:, :d] - mu*rs[:,None])/sigma + l2*W
+            done = active & (np.maximum(np.max(np.abs(grad_w), axis=1), np.abs(rs)) < tol)
+            n_iter[done] = it; active &= ~done
+            if not active.any(): break
+            W[active] -= lr*grad_w[active]; b[active] -= lr*rs[active]
+            if callback: callback(it+1, epochs)
+    return [(LogitModel(w=W[j].copy(), b=float(b[j]), n_iter=int(n_iter[j]), converged=bool(n_iter[j] < epochs)),
+             mu[j] + shift, sigma[j]) for j in range(m)]
+
+def bootstrap_masks(n:int, k:int, seed:int=0) -> np.ndarray:
+    # (n, k) resample counts: column j says how often each row was drawn for bootstrap model j,
+    # which train_logit_batched takes as per-row weights
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n, size=(k, n)) + (np.arange(k)*n)[:,None]
+    return np.bincount(idx.ravel(), minlength=k*n).reshape(k, n).T.astype(float)
+
+def train_ensemble(X: np.ndarray, y: np.ndarray, k:int=32, lr=0.05, epochs=400, l2=1e-3, tol=1e-6, seed:int=0, callback=None):
+    # Bagged logit: column 0 fits the full data (the point model), columns 1..k bootstrap
+    # resamples, all in one batched GD. Members come back folded to raw features as a
+    # (k, d) weight matrix + (k,) biases, ready for predict_ensemble.
+    M = np.concatenate([np.ones((len(X), 1)), bootstrap_masks(len(X), k, seed)], axis=1)
+    fitted = train_logit_batched(X, y, M, lr=lr, epochs=epochs, l2=l2, tol=tol, callback=callback)
+    model, mu, sigma = fitted[0]
+    members = [fold_affine(mj, muj, sj) for mj, muj, sj in fitted[1:]]
+    return model, mu, sigma, (np.stack([w for w, _ in members]), np.array([c for _, c in members]))
+
+def predict_ensemble(X: np.ndarray, W: np.ndarray, b: np.ndarray, quantiles=(0.05, 0.5, 0.95), post=None):
+    # all K members with one (n, d) x (d, K) GEMM; post (e.g. an isotonic calibrator) maps the
+    # (n, K) probabilities elementwise. Returns per-row mean, std and (n, len(quantiles)) quantiles
+    W = W.astype(X.dtype, copy=False) if X.dtype in (np.float32, np.float64) else W
+    P = X @ W.T; P += b; np.negative(P, out=P)
+    with np.errstate(over="ignore"): np.exp(P, out=P)
+    P += 1.0; np.reciprocal(P, out=P)
+    if post is not None: P = post(P)
+    # row moments as GEMVs (several times faster than mean/std reductions over the short axis);
+    # probabilities live in [0, 1], so E[p^2] - mean^2 loses no meaningful precision
+    avg = np.full(P.shape[1], 1.0/P.shape[1], dtype=P.dtype)
+    mean = P @ avg; std = np.sqrt(np.maximum((P*P) @ avg - mean*mean, 0.0))
+    P.sort(axis=1)  # K is small: one sort serves every quantile (linear interpolation, like np.quantile)
+    pos = np.asarray(quantiles, dtype=float)*(P.shape[1]-1)
+    lo = np.floor(pos).astype(np.intp); hi = np.minimum(lo+1, P.shape[1]-1); frac = (pos - lo).astype(P.dtype)
+    return mean, std, P[:, lo]*(1-frac) + P[:, hi]*frac
 
 def synth_dataset(n=8000, seed=42):
     rng = np.random.default_rng(seed)
@@ -60,34 +238,46 @@ def synth_dataset(n=8000, seed=42):
     y = (rng.random(n) < prob).astype(float)
     return X, y
 
+_trapz = getattr(np, "trapezoid", None) or getattr(np, "trapz")
+
 def auc_xy(x, y):
-    return float(np.trapz(y, x))
-
-def roc_curve(y_true, p):
-    t = np.sort(np.unique(p))[::-1]
-    if len(t) < 2: t = np.array([1.0, 0.0])
-    TPR=[]; FPR=[]; P = np.sum(y_true==1); N = np.sum(y_true==0)
-    for thr in t:
-        yhat = (p>=thr).astype(float)
-        TP = np.sum((yhat==1)&(y_true==1))
-        FP = np.sum((yhat==1)&(y_true==0))
-        TN = np.sum((yhat==0)&(y_true==0))
-        TPR.append(TP/max(1,P)); FPR.append(FP/max(1,N))
-    FPR=np.array(FPR); TPR=np.array(TPR); idx=np.argsort(FPR)
-    return FPR[idx], TPR[idx], auc_xy(FPR[idx],TPR[idx])
-
-def pr_curve(y_true, p):
-    t = np.sort(np.unique(p))[::-1]
-    if len(t) < 2: t = np.array([1.0, 0.0])
-    PREC=[]; REC=[]; P = np.sum(y_true==1)
-    for thr in t:
-        yhat = (p>=thr).astype(float)
-        TP = np.sum((yhat==1)&(y_true==1))
-        FP = np.sum((yhat==1)&(y_true==0))
-        prec = TP/max(1,TP+FP); rec = TP/max(1,P)
-        PREC.append(prec); REC.append(rec)
-    REC=np.array(REC); PREC=np.array(PREC); idx=np.argsort(REC)
-    return REC[idx], PREC[idx], auc_xy(REC[idx], PREC[idx])
+    return float(_trapz(y, x))
+
+def _clf_counts(y_true, p, sample_weight=None):
+    # Sort once (descending score) and accumulate weighted TP/FP; each distinct
+    # score is one threshold, ties collapse onto the last index of their run.
+    y_true = np.asarray(y_true, dtype=float).ravel(); p = np.asarray(p, dtype=float).ravel()
+    w = np.ones_like(p) if sample_weight is None else np.asarray(sample_weight, dtype=float).ravel()
+    order = np.argsort(-p, kind="mergesort")
+    ps = p[order]; ys = y_true[order]; ws = w[order]
+    tps = np.cumsum(ws*(ys==1)); fps = np.cumsum(ws*(ys==0))
+    P = float(tps[-1]) if len(tps) else 0.0; N = float(fps[-1]) if len(fps) else 0.0
+    last = np.r_[np.flatnonzero(np.diff(ps)), len(ps)-1] if len(ps) else np.array([], dtype=int)
+    thr = ps[last]; tp = tps[last]; fp = fps[last]
+    if len(thr) < 2:
+        # same fallback as the per-threshold loop: evaluate at 1.0 and 0.0
+        thr = np.array([1.0, 0.0])
+        cnt = np.searchsorted(-ps, -thr, side="right")
+        tp = np.where(cnt>0, tps[np.maximum(cnt-1,0)], 0.0) if len(ps) else np.zeros(2)
+        fp = np.where(cnt>0, fps[np.maximum(cnt-1,0)], 0.0) if len(ps) else np.zeros(2)
+    return thr, tp, fp, P, N
+
+def _downsample(n:int, max_points=None):
+    if max_points is None or n <= max_points: return slice(None)
+    return np.unique(np.linspace(0, n-1, max(2, int(max_points))).round().astype(int))
+
+def roc_curve(y_true, p, sample_weight=None, max_points=None):
+    _, tp, fp, P, N = _clf_counts(y_true, p, sample_weight)
+    TPR = tp/(P if P>0 else 1.0); FPR = fp/(N if N>0 else 1.0)
+    auc = auc_xy(FPR, TPR); keep = _downsample(len(FPR), max_points)
+    return FPR[keep], TPR[keep], auc
+
+def pr_curve(y_true, p, sample_weight=None, max_points=None):
+    _, tp, fp, P, _ = _clf_counts(y_true, p, sample_weight)
+    den = tp + fp
+    PREC = np.divide(tp, den, out=np.zeros_like(tp), where=den>0); REC = tp/(P if P>0 else 1.0)
+    auc = auc_xy(REC, PREC); keep = _downsample(len(REC), max_points)
+    return REC[keep], PREC[keep], auc
 
 def kfold_indices(n:int, k:int, seed:int=123):
     rng = np.random.default_rng(seed)
@@ -95,16 +285,25 @@ def kfold_indices(n:int, k:int, seed:int=123):
     folds = np.array_split(idx, k)
     return folds
 
-def platt_fit(p: np.ndarray, y: np.ndarray, lr=0.1, epochs=300):
-    # Fit logistic on logit(p) to calibrate to y
+def platt_fit(p: np.ndarray, y: np.ndarray, lr=0.1, epochs=50, tol=1e-10):
+    # Fit logistic on logit(p) to calibrate to y. Two parameters, so Newton with the 2x2
+    # Hessian in closed form (step halving keeps it monotone) converges in a handful of
+    # steps; lr is unused, kept for old callers
     eps=1e-6
-    z = np.log((p+eps)/(1-p+eps))
-    a=0.0; b=0.0
+    z = np.log((p+eps)/(1-p+eps)); y = np.asarray(y, dtype=float)
+    loss = lambda a, b: float(np.mean(np.logaddexp(0.0, a*z + b) - y*(a*z + b)))
+    ym = min(max(float(y.mean()), eps), 1-eps)
+    a=0.0; b=float(np.log(ym/(1-ym))); f = loss(a, b)
     for _ in range(epochs):
-        s = 1/(1+np.exp(-(a*z + b)))
-        da = np.mean((s - y)*z)
-        db = np.mean(s - y)
-        a -= lr*da; b -= lr*db
+        s = _sigmoid(a*z + b); r = s - y; h = s*(1-s)
+        ga, gb = float(np.mean(r*z)), float(np.mean(r))
+        haa, hab, hbb = float(np.mean(h*z*z))+1e-12, float(np.mean(h*z)), float(np.mean(h))+1e-12
+        det = haa*hbb - hab*hab
+        da = (hbb*ga - hab*gb)/det; db = (haa*gb - hab*ga)/det
+        t = 1.0
+        while t > 1e-4 and loss(a - t*da, b - t*db) > f: t *= 0.5
+        a -= t*da; b -= t*db; f = loss(a, b)
+        if t*(abs(da) + abs(db)) < tol: break
     return float(a), float(b)
 
 def platt_apply(p: np.ndarray, a: float, b: float):
@@ -0,0 +1,98 @@
+import math, threading, time, numpy as np
+from collections import deque
+from typing import Any, Dict, List
+from .model import FEAT_NAMES
+
+# Online input/prediction monitor for the predict path. Requests only append their (X, p)
+# arrays to a pending deque (O(1), thread-safe without a lock); once flush_rows rows are pending
+# the caller that crossed the threshold folds them in with one vectorized pass: Chan/Welford
+# merge of mean/M2 and bincount histograms over fixed z-score bins. PSI compares those bins
+# with N(mu, sigma) of the served model, which is all the artifact knows about training data.
+# Rows with a non-finite feature or probability are counted as invalid and kept out of every
+# statistic, so one bad request cannot poison the running moments.
+
+Z_EDGES = np.linspace(-3.0, 3.0, 13)  # plus the two open tails -> 14 bins
+P_BINS = 20
+PSI_WARN, PSI_ALERT = 0.1, 0.25
+
+def _normal_ref(edges: np.ndarray) -> np.ndarray:
+    cdf = np.array([0.0] + [0.5*(1.0 + math.erf(e/math.sqrt(2.0))) for e in edges] + [1.0])
+    return np.diff(cdf)
+
+def psi(actual: np.ndarray, expected: np.ndarray, eps: float = 1e-4) -> float:
+    a = actual/max(actual.sum(), 1); a = np.maximum(a, eps); e = np.maximum(expected, eps)
+    return float(np.sum((a - e)*np.log(a/e)))
+
+class DriftMonitor:
+    def __init__(self, flush_rows: int = 512, feat_names: List[str] = FEAT_NAMES):
+        self.flush_rows = max(1, int(flush_rows)); self.feat_names = list(feat_names)
+        self._ref = _normal_ref(Z_EDGES)
+        self._lock = threading.Lock()  # only taken by the flushing caller and readers
+        self._pending = deque(); self._pending_rows = 0
+        self.reset()
+
+    def reset(self, bundle=None):
+        d = len(self.feat_names)
+        with self._lock:
+            self.version = bundle.version if bundle is not None else None
+            self._mu = np.asarray(bundle.mu, dtype=float) if bundle is not None else None
+            self._sigma = np.asarray(bundle.sigma, dtype=float) if bundle is not None else None
+            self.n = 0; self.mean = np.zeros(d); self.m2 = np.zeros(d)
+            self.xmin = np.full(d, np.inf); self.xmax = np.full(d, -np.inf)
+            self.hist = np.zeros((d, len(Z_EDGES)+1), dtype=np.int64)
+            self.p_n = 0; self.p_sum = 0.0; self.p_hist = np.zeros(P_BINS, dtype=np.int64)
+            self.invalid = 0
+            self.since = time.time()
+            self._pending.clear(); self._pending_rows = 0
+
+    def observe(self, X: np.ndarray, p: np.ndarray, bundle):
+        # X: (n, d) raw features as scored, p: (n,) probabilities, bundle: the ModelBundle that scored them
+        if bundle.version != self.version: self.reset(bundle)
+        self._pending.append((X, p))
+        self._pending_rows += len(p)
+        if self._pending_rows >= self.flush_rows: self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending = []
+            while self._pending: pending.append(self._pending.popleft())
+            self._pending_rows = 0
+            if not pending or self._mu is None: return
+            X = np.concatenate([np.asarray(x, dtype=float).reshape(-1, len(self.feat_names)) for x, _ in pending])
+            p = np.concatenate([np.asarray(q, dtype=float).ravel() for _, q in pending])
+            ok = np.isfinite(X).all(axis=1) & np.isfinite(p)
+            if not ok.all(): self.invalid += int((~ok).sum()); X = X[ok]; p = p[ok]
+            nb = len(X)
+            if not nb: return
+            mb = X.mean(axis=0); m2b = ((X - mb)**2).sum(axis=0)
+            n = self.n + nb; delta = mb - self.mean
+            self.mean += delta*nb/n; self.m2 += m2b + delta**2*self.n*nb/n; self.n = n
+            np.minimum(self.xmin, X.min(axis=0), out=self.xmin); np.maximum(self.xmax, X.max(axis=0), out=self.xmax)
+            # bin index per cell, then one bincount over (feature, bin) pairs
+            z = (X - self._mu)/(self._sigma + 1e-8)
+            nbins = len(Z_EDGES)+1
+            idx = np.searchsorted(Z_EDGES, z, side="right") + np.arange(X.shape[1])*nbins
+            self.hist += np.bincount(idx.ravel(), minlength=self.hist.size).reshape(self.hist.shape)
+            self.p_n += len(p); self.p_sum += float(p.sum())
+            self.p_hist += np.bincount(np.minimum((p*P_BINS).astype(np.intp), P_BINS-1), minlength=P_BINS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        self.flush()
+        with self._lock:
+            feats = {}
+            std = np.sqrt(self.m2/self.n) if self.n else np.zeros_like(self.m2)
+            for i, name in enumerate(self.feat_names):
+                s = psi(self.hist[i], self._ref) if self.n else 0.0
+                f = {"mean": float(self.mean[i]), "std": float(std[i]), "min": float(self.xmin[i]) if self.n else None,
+                     "max": float(self.xmax[i]) if self.n else None, "psi": s,
+                     "status": "alert" if s >= PSI_ALERT else ("warn" if s >= PSI_WARN else "ok"), "hist": self.hist[i].tolist()}
+                if self._mu is not None:
+                    f.update({"train_mu": float(self._mu[i]), "train_sigma": float(self._sigma[i]),
+                              "mean_shift_z": float((self.mean[i] - self._mu[i])/(self._sigma[i] + 1e-8)) if self.n else 0.0})
+                feats[name] = f
+            psis = [f["psi"] for f in feats.values()]
+            return {"model_version": self.version, "since": self.since, "n": int(self.n), "invalid_rows": int(self.invalid),
+                    "psi_max": max(psis) if psis else 0.0, "drift": any(f["status"] == "alert" for f in feats.values()),
+                    "z_edges": Z_EDGES.tolist(), "reference": self._ref.tolist(), "features": feats,
+                    "predictions": {"n": int(self.p_n), "mean": (self.p_sum/self.p_n if self.p_n else None),
+                                    "edges": np.linspace(0, 1, P_BINS+1).tolist(), "hist": self.p_hist.tolist()}}
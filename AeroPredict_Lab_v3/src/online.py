@@ -0,0 +1,109 @@
+import threading, numpy as np
+from typing import Any, Dict, Optional
+from .model import LogitModel
+
+# Online updates of the served model from small labeled batches. The learner warm-starts from
+# the active bundle (on copies: registry artifacts may be read-only memmaps), keeps running
+# feature statistics and takes one FTRL-Proximal or SGD step per batch in standardized space.
+# When a batch moves mu/sigma, the weights are re-expressed on the new scale first, so the stats
+# update alone never changes a prediction. Every publish_every updates the weights become a new
+# registry version. Each update costs O(batch * d), whatever the size of the training history.
+
+OPTIMIZERS = ("ftrl", "sgd")
+
+class OnlineLearner:
+    def __init__(self, registry, optimizer: str = "ftrl", lr: float = 0.1, l1: float = 0.0, l2: float = 1e-3,
+                 beta: float = 1.0, publish_every: int = 50, update_stats: bool = True, prior_rows: Optional[int] = None):
+        if optimizer not in OPTIMIZERS: raise ValueError(f"unknown optimizer {optimizer!r}; expected one of {OPTIMIZERS}")
+        self.registry = registry; self.optimizer = optimizer; self.lr = lr; self.l1 = l1; self.l2 = l2; self.beta = beta
+        self.publish_every = max(1, int(publish_every)); self.update_stats = update_stats; self.prior_rows = prior_rows
+        self._lock = threading.Lock(); self.base = None
+        self.total_updates = 0; self.total_rows = 0; self.published = []
+
+    def config(self) -> Dict[str, Any]:
+        return {"optimizer": self.optimizer, "lr": self.lr, "l1": self.l1, "l2": self.l2, "beta": self.beta,
+                "publish_every": self.publish_every, "update_stats": self.update_stats}
+
+    def _warm_start(self, bundle):
+        # a version published elsewhere (train, activate, rollback) replaces the local state
+        self.base = bundle; self.origin = bundle.version
+        self.theta = np.r_[np.array(bundle.model.w, dtype=float), float(bundle.model.b)]
+        self.mu = np.array(bundle.mu, dtype=float); self.sigma = np.array(bundle.sigma, dtype=float)
+        self.stats_rows = float(self.prior_rows or bundle.meta.get("stats_rows") or bundle.meta.get("n_samples") or 1000)
+        d = len(self.mu)
+        self._l1 = np.r_[np.full(d, self.l1), 0.0]; self._l2 = np.r_[np.full(d, self.l2), 0.0]  # bias is not penalized
+        self._n = np.zeros(d+1); self._z = self._z_from(self.theta); self._t = 0
+        self.pending = 0; self.pending_rows = 0
+
+    def _z_from(self, theta: np.ndarray) -> np.ndarray:
+        # FTRL accumulator that reproduces theta under the current per-coordinate learning rates
+        return -theta*((self.beta + np.sqrt(self._n))/self.lr + self._l2) - np.sign(theta)*self._l1
+
+    def _merge_stats(self, X: np.ndarray):
+        # Chan merge of the batch into the running mean/variance, then rescale theta so that
+        # w'.(x - mu')/s' + b' == w.(x - mu)/s + b for every x
+        nb = len(X); n = self.stats_rows + nb
+        mb = X.mean(axis=0); delta = mb - self.mu
+        m2 = self.sigma**2*self.stats_rows + ((X - mb)**2).sum(axis=0) + delta**2*self.stats_rows*nb/n
+        mu = self.mu + delta*nb/n; sigma = np.sqrt(m2/n)
+        s_old = self.sigma + 1e-8; s_new = sigma + 1e-8; w = self.theta[:-1]
+        self.theta[-1] += float((w/s_old) @ (mu - self.mu))
+        self.theta[:-1] = w*s_new/s_old
+        self.mu, self.sigma, self.stats_rows = mu, sigma, n
+        if self.optimizer == "ftrl": self._z = self._z_from(self.theta)
+
+    def _step(self, g: np.ndarray):
+        if self.optimizer == "sgd":
+            self._t += 1
+            g = g + self._l2*self.theta
+            self.theta -= self.lr/np.sqrt(self._t)*g
+            return
+        # FTRL-Proximal (McMahan et al.), per coordinate, closed-form weights from (z, n)
+        n_new = self._n + g*g
+        self._z += g - (np.sqrt(n_new) - np.sqrt(self._n))/self.lr*self.theta
+        self._n = n_new
+        shrink = np.abs(self._z) > self._l1
+        self.theta = np.where(shrink, -(self._z - np.sign(self._z)*self._l1)/((self.beta + np.sqrt(self._n))/self.lr + self._l2), 0.0)
+
+    def update(self, X: np.ndarray, y: np.ndarray, bundle) -> Dict[str, Any]:
+        # X: (n, d) raw features, y: (n,) labels in [0, 1], bundle: the active ModelBundle
+        X = np.asarray(X, dtype=float).reshape(len(y), -1); y = np.asarray(y, dtype=float)
+        with self._lock:
+            if self.base is None or bundle.version != self.base.version: self._warm_start(bundle)
+            # progressive validation: the batch is scored before the model learns from it
+            z = ((X - self.mu)/(self.sigma + 1e-8)) @ self.theta[:-1] + self.theta[-1]
+            loss = float(np.mean(np.logaddexp(0.0, z) - y*z))
+            if self.update_stats: self._merge_stats(X)
+            Xs = (X - self.mu)/(self.sigma + 1e-8)
+            r = 1.0/(1.0 + np.exp(-(Xs @ self.theta[:-1] + self.theta[-1]))) - y
+            self._step(np.r_[Xs.T @ r, r.sum()]/len(y))
+            self.pending += 1; self.pending_rows += len(y); self.total_updates += 1; self.total_rows += len(y)
+            published = self._publish() if self.pending >= self.publish_every else None
+            return {"rows": int(len(y)), "loss_before": loss, "pending_updates": self.pending, "base_version": self.base.version,
+                    "published_version": published}
+
+    def publish(self) -> Optional[int]:
+        with self._lock:
+            return self._publish() if self.base is not None and self.pending else None
+
+    def _publish(self) -> int:
+        # the calibrator carries over (re-run /calibrate after large drifts); bootstrap members
+        # would describe the old weights, so the new version ships without an ensemble
+        cur = self.base
+        meta = {"event": "online", "origin_version": self.origin, "parent_version": cur.version, "updates": self.pending,
+                "rows": self.pending_rows, "stats_rows": self.stats_rows, **self.config()}
+        m = self.registry.publish(LogitModel(w=self.theta[:-1].copy(), b=float(self.theta[-1])), self.mu.copy(), self.sigma.copy(),
+                                  calib=cur.calib, meta=meta)
+        self.base = m; self.pending = 0; self.pending_rows = 0
+        self.published.append(m.version); del self.published[:-20]
+        return m.version
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {**self.config(), "total_updates": self.total_updates, "total_rows": self.total_rows,
+                   "recent_versions": list(self.published)}
+            if self.base is not None:
+                out.update({"base_version": self.base.version, "origin_version": self.origin, "pending_updates": self.pending,
+                            "pending_rows": self.pending_rows, "stats_rows": self.stats_rows,
+                            "mu": self.mu.tolist(), "sigma": self.sigma.tolist()})
+            return out
@@ -0,0 +1,171 @@
+import os, json, time, threading, zipfile, numpy as np
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
+from .model import LogitModel, fold_affine, predict_fused, predict_ensemble
+from .calibration import as_calibrator, load_calibrator
+
+# Versioned model artifacts: models/registry/v0001.npz bundles weights, mu/sigma and the
+# calibrator; ACTIVE holds the served version number. Artifacts are write-once, so the
+# in-memory copy of the active one never goes stale and is swapped by one assignment.
+
+@dataclass(frozen=True)
+class ModelBundle:
+    version: int
+    model: LogitModel
+    mu: np.ndarray
+    sigma: np.ndarray
+    calib: Optional[Any] = None  # PlattCalibrator | IsotonicCalibrator, see calibration.py
+    meta: Dict[str, Any] = field(default_factory=dict)
+    path: str = ""
+    ensemble: Optional[Tuple[np.ndarray, np.ndarray]] = None  # bootstrap members on raw features: (K, d) W, (K,) b
+
+    @cached_property
+    def fused(self) -> Tuple[np.ndarray, float]:
+        # Platt folds into the affine map; other calibrators run after the sigmoid
+        return fold_affine(self.model, self.mu, self.sigma, self.calib if self.calib and self.calib.affine else None)
+
+    def score_affine(self, X: np.ndarray, columns: bool=False) -> np.ndarray:
+        # one GEMV + sigmoid; already calibrated unless the calibrator is non-affine
+        w, b = self.fused
+        return predict_fused(X, w, b, columns=columns)
+
+    def apply_calib(self, p: np.ndarray) -> np.ndarray:
+        return self.calib.apply(p) if self.calib and not self.calib.affine else p
+
+    def score(self, X: np.ndarray, columns: bool=False) -> np.ndarray:
+        # calibrated probabilities straight from raw features
+        return self.apply_calib(self.score_affine(X, columns=columns))
+
+    @cached_property
+    def ensemble_fused(self) -> Tuple[np.ndarray, np.ndarray]:
+        W, b = self.ensemble
+        if self.calib and self.calib.affine:
+            a, c = self.calib; return a*W, a*b + c
+        return np.asarray(W), np.asarray(b)
+
+    def score_ensemble(self, X: np.ndarray, quantiles=(0.05, 0.5, 0.95)):
+        # (mean, std, quantiles) per row over the K members, calibrated like score()
+        W, b = self.ensemble_fused
+        post = self.calib.apply if self.calib and not self.calib.affine else None
+        return predict_ensemble(X, W, b, quantiles=quantiles, post=post)
+
+def _read_npz(path:str, mmap:bool=False) -> Dict[str, np.ndarray]:
+    # np.savez stores members uncompressed, so with mmap=True every non-scalar member is
+    # memory-mapped straight out of the zip (read-only, zero-copy, page-cache shared
+    # between workers) instead of being read and copied
+    if not mmap:
+        with np.load(path, allow_pickle=False) as z:
+            return {k: z[k].copy() for k in z.files}
+    out = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            f.seek(info.header_offset + 26)
+            n_name, n_extra = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(n_name) + int(n_extra))
+            major, _ = np.lib.format.read_magic(f)
+            shape, fortran, dtype = (np.lib.format.read_array_header_1_0 if major == 1 else np.lib.format.read_array_header_2_0)(f)
+            if info.compress_type != zipfile.ZIP_STORED or not shape or dtype.hasobject:
+                with zf.open(info) as m: out[name] = np.lib.format.read_array(m, allow_pickle=False)
+            else:
+                out[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape, order="F" if fortran else "C")
+    return out
+
+class ModelRegistry:
+    def __init__(self, root:str = "models/registry", poll_seconds:float = 2.0, mmap:bool = False):
+        self.root = root
+        self.poll_seconds = poll_seconds
+        self.mmap = mmap  # artifacts are write-once, so mapping them can never observe a rewrite
+        self._lock = threading.Lock()  # serializes publish/activate; readers never take it
+        self._active: Optional[ModelBundle] = None
+        self._pointer_mtime = None
+        self._next_poll = 0.0
+
+    def _path(self, version:int) -> str:
+        return os.path.join(self.root, f"v{version:04d}.npz")
+
+    def _pointer(self) -> str:
+        return os.path.join(self.root, "ACTIVE")
+
+    def versions(self) -> List[int]:
+        if not os.path.isdir(self.root): return []
+        return sorted(int(f[1:-4]) for f in os.listdir(self.root) if f.startswith("v") and f.endswith(".npz") and f[1:-4].isdigit())
+
+    @property
+    def active(self) -> Optional[ModelBundle]:
+        # hot path: one monotonic-clock compare; the pointer file is only stat'ed every poll_seconds
+        if self.poll_seconds and time.monotonic() >= self._next_poll: self.refresh()
+        return self._active
+
+    @property
+    def loaded(self) -> Optional[ModelBundle]:
+        # what is in memory right now, without polling or touching disk (readiness probes)
+        return self._active
+
+    def load(self, version:int) -> ModelBundle:
+        path = self._path(version)
+        z = _read_npz(path, mmap=self.mmap)
+        calib = load_calibrator(str(z["calib_kind"]) if "calib_kind" in z else None, z["calib"])
+        return ModelBundle(version=version, model=LogitModel(w=z["w"], b=float(z["b"])),
+                           mu=z["mu"], sigma=z["sigma"], calib=calib, meta=json.loads(str(z["meta"])), path=path,
+                           ensemble=(z["ens_w"], z["ens_b"]) if "ens_w" in z else None)
+
+    def refresh(self) -> Optional[ModelBundle]:
+        # re-read from disk only when ACTIVE changed (e.g. another worker published)
+        self._next_poll = time.monotonic() + (self.poll_seconds or 0.0)
+        try:
+            mtime = os.stat(self._pointer()).st_mtime_ns
+        except FileNotFoundError:
+            return self._active
+        if mtime == self._pointer_mtime and self._active is not None: return self._active
+        with open(self._pointer(), "r") as f: version = int(f.read().strip())
+        if self._active is None or self._active.version != version:
+            self._active = self.load(version)
+        self._pointer_mtime = mtime
+        return self._active
+
+    def publish(self, model:LogitModel, mu, sigma, calib=None,
+                meta:Optional[Dict[str,Any]]=None, activate:bool=True, ensemble=None) -> ModelBundle:
+        os.makedirs(self.root, exist_ok=True)
+        meta = dict(meta or {}); meta.setdefault("ts", time.time())
+        calib = as_calibrator(calib)
+        with self._lock:
+            version = (self.versions() or [0])[-1] + 1
+            while True:
+                try:
+                    f = open(self._path(version), "xb")  # exclusive create: artifacts are never overwritten
+                    break
+                except FileExistsError:
+                    version += 1
+            with f:
+                np.savez(f, w=np.asarray(model.w, dtype=float), b=float(model.b), mu=np.asarray(mu, dtype=float),
+                         sigma=np.asarray(sigma, dtype=float), calib=(calib.to_array() if calib else np.zeros(0)),
+                         calib_kind=np.array(calib.kind if calib else ""),
+                         meta=np.array(json.dumps(meta)),
+                         **({"ens_w": np.asarray(ensemble[0], dtype=float), "ens_b": np.asarray(ensemble[1], dtype=float)} if ensemble else {}))
+            bundle = ModelBundle(version=version, model=model, mu=np.asarray(mu, dtype=float), sigma=np.asarray(sigma, dtype=float),
+                                 calib=calib, meta=meta, path=self._path(version), ensemble=ensemble)
+            if activate: self._set_active(bundle)
+        return bundle
+
+    def activate(self, version:int) -> ModelBundle:
+        if version not in self.versions(): raise KeyError(f"model version {version} not found")
+        with self._lock:
+            bundle = self._active if self._active and self._active.version == version else self.load(version)
+            self._set_active(bundle)
+        return bundle
+
+    def rollback(self) -> ModelBundle:
+        # back to the newest version older than the active one
+        cur = self._active.version if self._active else None
+        older = [v for v in self.versions() if cur is None or v < cur]
+        if not older: raise KeyError("no older model version to roll back to")
+        return self.activate(older[-1])
+
+    def _set_active(self, bundle:ModelBundle):
+        tmp = self._pointer() + f".{os.getpid()}.tmp"
+        with open(tmp, "w") as f: f.write(str(bundle.version))
+        os.replace(tmp, self._pointer())
+        self._pointer_mtime = os.stat(self._pointer()).st_mtime_ns
+        self._active = bundle  # single reference swap: in-flight requests keep their snapshot
@@ -0,0 +1,138 @@
+import argparse, json, os, time, multiprocessing as mp, numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+from .model import FEAT_NAMES
+
+# Offline batch scoring of Parquet/CSV flight logs into Parquet. Work is cut into units:
+# Parquet row groups, which the worker reads itself so decoding runs in parallel too, or CSV
+# record batches parsed in the parent by pyarrow's threaded reader. Workers load the model
+# once and score column-major with the fused kernel. The parent writes results in input
+# order through one ParquetWriter with at most 2*workers units in flight, so memory is
+# bounded by the unit size, not the input size.
+#   python -m src.score_batch logs/2024/ -o scored.parquet --keep flight_id,ts --workers 8
+
+OUT_COL = "prob_unstable"
+
+def load_bundle(spec: Dict[str, Any]):
+    # spec: {"registry_dir", "version"} (None = ACTIVE) or the legacy {"model", "stats", "calib"} files
+    from .registry import ModelBundle, ModelRegistry
+    if spec.get("model"):
+        from .model import LogitModel
+        from .calibration import as_calibrator
+        with open(spec["stats"], "r") as f: s = json.load(f)
+        calib = None
+        if spec.get("calib") and os.path.exists(spec["calib"]):
+            with open(spec["calib"], "r") as f: c = json.load(f); calib = (float(c["a"]), float(c["b"]))
+        return ModelBundle(version=0, model=LogitModel.load(spec["model"]), mu=np.array(s["mu"]), sigma=np.array(s["sigma"]),
+                           calib=as_calibrator(calib), path=spec["model"])
+    reg = ModelRegistry(spec["registry_dir"], poll_seconds=0, mmap=True)
+    m = reg.load(spec["version"]) if spec.get("version") else reg.refresh()
+    if m is None: raise ValueError(f"no active model in {spec['registry_dir']}")
+    return m
+
+_W_BUNDLE = None
+
+def _init_worker(spec: Dict[str, Any]):
+    global _W_BUNDLE
+    _W_BUNDLE = load_bundle(spec)
+
+def _read_unit(unit, columns: List[str]):
+    import pyarrow.parquet as pq
+    if unit[0] == "rg":
+        return pq.ParquetFile(unit[1]).read_row_group(unit[2], columns=columns)
+    return unit[1]
+
+def score_unit(unit, keep: List[str], uncertainty: bool = False, bundle=None):
+    import pyarrow as pa
+    m = bundle or _W_BUNDLE
+    t = _read_unit(unit, FEAT_NAMES + keep)
+    # (d, n) feature-major straight from the Arrow columns; no row-major copy
+    X = np.vstack([t.column(c).to_numpy(zero_copy_only=False).astype(float, copy=False) for c in FEAT_NAMES])
+    cols = {k: t.column(k) for k in keep}
+    cols[OUT_COL] = pa.array(m.score(X, columns=True).astype(np.float32, copy=False))
+    if uncertainty:
+        mean, std, Q = m.score_ensemble(X.T)
+        cols.update({"prob_mean": pa.array(mean.astype(np.float32)), "prob_std": pa.array(std.astype(np.float32)),
+                     "prob_q05": pa.array(Q[:, 0].astype(np.float32)), "prob_q95": pa.array(Q[:, 2].astype(np.float32))})
+    return pa.table(cols)
+
+def iter_units(path: str, fmt: Optional[str] = None, csv_block_bytes: int = 64*2**20) -> Iterator:
+    fmt = fmt or ("csv" if path.endswith((".csv", ".csv.gz")) else "parquet")
+    if fmt == "csv":
+        import pyarrow.csv as pacsv
+        reader = pacsv.open_csv(path, read_options=pacsv.ReadOptions(block_size=csv_block_bytes))
+        for batch in reader:
+            if batch.num_rows: yield ("batch", batch)
+        return
+    import pyarrow.dataset as ds, pyarrow.parquet as pq
+    for f in sorted(ds.dataset(path, format="parquet").files):
+        for rg in range(pq.ParquetFile(f).metadata.num_row_groups):
+            yield ("rg", f, rg)
+
+def score_file(path: str, out: str, spec: Dict[str, Any], keep: Optional[List[str]] = None, workers: int = 0,
+               fmt: Optional[str] = None, uncertainty: bool = False, compression: str = "snappy",
+               csv_block_bytes: int = 64*2**20, progress=None) -> Dict[str, Any]:
+    import pyarrow.parquet as pq
+    keep = list(keep or []); t0 = time.time(); rows = 0; n_units = 0; writer = None
+    # load once here so a missing model or ensemble fails with its own message, not as a broken pool
+    bundle = load_bundle(spec)
+    if uncertainty and bundle.ensemble is None:
+        raise ValueError(f"model v{bundle.version} has no bootstrap ensemble; --uncertainty needs one from /train_ensemble")
+    if spec.get("registry_dir") and not spec.get("version"): spec = {**spec, "version": bundle.version}  # workers score the same version
+    units = iter_units(path, fmt, csv_block_bytes)
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    def write(tbl):
+        nonlocal writer, rows, n_units
+        if writer is None: writer = pq.ParquetWriter(out, tbl.schema, compression=compression)
+        writer.write_table(tbl); rows += tbl.num_rows; n_units += 1
+        if progress: progress(n_units, rows)
+    try:
+        if workers <= 0:
+            for u in units: write(score_unit(u, keep, uncertainty, bundle=bundle))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(spec,)) as pool:
+                window = deque()
+                for u in units:
+                    window.append(pool.submit(score_unit, u, keep, uncertainty))
+                    if len(window) >= 2*workers: write(window.popleft().result())
+                while window: write(window.popleft().result())
+    finally:
+        if writer is not None: writer.close()
+    secs = time.time() - t0
+    return {"rows": rows, "units": n_units, "seconds": round(secs, 3), "rows_per_s": round(rows/secs) if secs > 0 else None,
+            "input_mb_per_s": round(_size_mb(path)/secs, 1) if secs > 0 else None, "out": out}
+
+def _size_mb(path: str) -> float:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(path) for f in fs)/2**20
+    return os.path.getsize(path)/2**20
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Score Parquet/CSV flight logs with an AeroPredict model into Parquet")
+    ap.add_argument("path", help="input .parquet file, Parquet directory or .csv")
+    ap.add_argument("-o", "--out", required=True, help="output .parquet file")
+    ap.add_argument("--keep", default="", help="comma-separated input columns copied to the output (ids, timestamps)")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2)-1), help="0 = score in this process")
+    ap.add_argument("--format", choices=["parquet","csv"], default=None, help="default: from the file extension")
+    ap.add_argument("--uncertainty", action="store_true", help="add ensemble mean/std/q05/q95 (needs a /train_ensemble model)")
+    ap.add_argument("--compression", default="snappy")
+    ap.add_argument("--csv-block-mb", type=float, default=64)
+    ap.add_argument("--registry-dir", default=os.environ.get("REGISTRY_DIR", "models/registry"))
+    ap.add_argument("--version", type=int, default=None, help="registry version (default: ACTIVE)")
+    ap.add_argument("--model", default=None, help="legacy model.npz instead of the registry (with --stats/--calib)")
+    ap.add_argument("--stats", default="models/stats.json")
+    ap.add_argument("--calib", default="models/calib.json")
+    a = ap.parse_args(argv)
+    spec = ({"model": a.model, "stats": a.stats, "calib": a.calib} if a.model else
+            {"registry_dir": a.registry_dir, "version": a.version})
+    try:
+        res = score_file(a.path, a.out, spec, keep=[k for k in a.keep.split(",") if k], workers=a.workers, fmt=a.format,
+                         uncertainty=a.uncertainty, compression=a.compression, csv_block_bytes=int(a.csv_block_mb*2**20))
+    except (ValueError, OSError) as e:
+        ap.exit(2, f"score_batch: error: {e}\n")
+    print(json.dumps(res))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse, itertools, json, math, multiprocessing as mp, os, time, numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from .model import SOLVERS
+
+# Hyperparameter sweeps: grid or random configurations, scored by k-fold CV AUC-ROC in a
+# process pool and pruned with successive halving on the epochs budget. Every evaluation
+# is logged; the winner is retrained on the full set and published to the registry.
+
+TUNABLE = ("lr", "epochs", "l2", "solver")
+# per tunable parameter: type and smallest allowed value (solver: one of SOLVERS)
+_TYPES = {"lr": (float, 1e-12), "epochs": (int, 1), "l2": (float, 0.0)}
+
+def _value(k: str, v):
+    # one validated, cast parameter value; ValueError (-> 400) on anything else
+    if k == "solver":
+        if v not in SOLVERS: raise ValueError(f"solver must be one of {list(SOLVERS)}, got {v!r}")
+        return v
+    kind, lo = _TYPES[k]
+    if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v):
+        raise ValueError(f"{k} values must be numbers, got {v!r}")
+    v = int(round(v)) if kind is int else float(v)
+    if v < lo: raise ValueError(f"{k} must be >= {lo}, got {v}")
+    return v
+
+def _check_spec(k: str, spec, mode: str):
+    # spec: non-empty list of values, or {"low", "high", "log": bool, "int": bool} for random search
+    if isinstance(spec, list):
+        if not spec: raise ValueError(f"{k}: empty value list")
+        return [_value(k, v) for v in spec]
+    if not isinstance(spec, dict): raise ValueError(f"{k}: expected a list of values or a {{low, high}} range, got {spec!r}")
+    if mode == "grid": raise ValueError("grid search needs explicit value lists")
+    if k == "solver": raise ValueError("solver needs a list of values")
+    extra = set(spec) - {"low", "high", "log", "int"}
+    if extra or "low" not in spec or "high" not in spec:
+        raise ValueError(f"{k}: a range needs exactly low and high (plus optional log/int), got {sorted(spec)}")
+    lo, hi = _value(k, spec["low"]), _value(k, spec["high"])
+    if lo > hi: raise ValueError(f"{k}: low {lo} > high {hi}")
+    if spec.get("log") and lo <= 0: raise ValueError(f"{k}: a log range needs low > 0")
+    return {"low": lo, "high": hi, "log": bool(spec.get("log")), "int": bool(spec.get("int")) or _TYPES[k][0] is int}
+
+def _sample(spec, rng):
+    if isinstance(spec, dict):
+        lo, hi = float(spec["low"]), float(spec["high"])
+        v = math.exp(rng.uniform(math.log(lo), math.log(hi))) if spec["log"] else rng.uniform(lo, hi)
+        return int(round(v)) if spec["int"] else v
+    return spec[int(rng.integers(len(spec)))]
+
+def check_base(base: Dict[str, Any]) -> Dict[str, Any]:
+    # fixed values for the parameters the space does not tune; data and CV settings are not overridable
+    if not isinstance(base, dict): raise ValueError("base must be an object")
+    unknown = [k for k in base if k not in TUNABLE]
+    if unknown: raise ValueError(f"base cannot set {unknown}; allowed: {list(TUNABLE)}")
+    return {k: _value(k, v) for k, v in base.items()}
+
+def expand_space(space: Dict[str, Any], mode: str = "grid", n_trials: int = 16, seed: int = 0) -> List[Dict[str, Any]]:
+    if not isinstance(space, dict) or not space: raise ValueError("space must be a non-empty object")
+    unknown = [k for k in space if k not in TUNABLE]
+    if unknown: raise ValueError(f"cannot tune {unknown}; tunable: {list(TUNABLE)}")
+    if mode not in ("grid", "random"): raise ValueError(f"unknown search mode {mode!r}")
+    space = {k: _check_spec(k, v, mode) for k, v in space.items()}
+    if mode == "grid":
+        keys = list(space)
+        return [dict(zip(keys, combo)) for combo in itertools.product(*(space[k] for k in keys))]
+    rng = np.random.default_rng(seed)
+    return [{k: _sample(v, rng) for k, v in space.items()} for _ in range(n_trials)]
+
+_CACHE = None
+
+def _eval_trial(params: Dict[str, Any], cache_cfg: Dict[str, Any], cache=None) -> Dict[str, Any]:
+    # cache: the caller's own DatasetCache when trials run inline (n_workers=1)
+    global _CACHE
+    from .datasets import DatasetCache
+    from .tasks import run_train_cv
+    if cache is None:
+        if _CACHE is None: _CACHE = DatasetCache(**cache_cfg)
+        cache = _CACHE
+    t0 = time.time()
+    res = run_train_cv(params, cache)
+    return {"auc_roc_mean": res["summary"]["auc_roc_mean"], "auc_pr_mean": res["summary"]["auc_pr_mean"], "seconds": time.time()-t0}
+
+def run_sweep(p: Dict[str, Any], registry, cache, cache_cfg: Dict[str, Any], log: Optional[Callable] = None,
+              progress: Optional[Callable[[str, int, int], None]] = None, n_workers: int = 1) -> Dict[str, Any]:
+    base = {"lr": 0.05, "epochs": 400, "l2": 1e-3, "solver": "gd", "tol": 1e-6, **check_base(p.get("base", {})),
+            "n_samples": int(p["n_samples"]), "k_folds": int(p["k_folds"]), "seed": int(p["seed"])}
+    configs = [{**base, **c} for c in expand_space(p["space"], p.get("mode", "grid"), p.get("n_trials", 16), p["seed"])]
+    if not configs: raise ValueError("empty search space")
+    eta = max(2, int(p.get("eta", 3)))
+    n_rungs = max(1, int(p.get("max_rungs", math.ceil(math.log(len(configs), eta)) + 1)))
+    alive = list(range(len(configs))); trials: List[Dict[str, Any]] = []; rungs = []
+    # one worker: trials run inline, so a sweep job costs no processes beyond its job slot
+    pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context("spawn")) if n_workers > 1 else None
+    try:
+        for r in range(n_rungs):
+            last = (r == n_rungs-1) or len(alive) == 1
+            frac = 1.0 if last else float(eta)**(r - (n_rungs-1))
+            jobs = [{**configs[i], "epochs": max(1, int(math.ceil(configs[i]["epochs"]*frac)))} for i in alive]
+            futures = [pool.submit(_eval_trial, j, cache_cfg) for j in jobs] if pool else [None]*len(jobs)
+            scores = []
+            for n_done, (i, j, f) in enumerate(zip(alive, jobs, futures), start=1):
+                m = f.result() if f is not None else _eval_trial(j, cache_cfg, cache)
+                trial = {"trial": i, "rung": r, "budget_frac": frac, "params": j, **m}
+                trials.append(trial); scores.append(m["auc_roc_mean"])
+                if log: log("sweep_trial", {**j, "trial": i, "rung": r}, m)
+                if progress: progress(f"rung {r}", n_done, len(alive))
+            order = np.argsort(scores)[::-1]
+            rungs.append({"rung": r, "budget_frac": frac, "n_configs": len(alive), "best_auc": float(np.max(scores))})
+            if last:
+                best_i = alive[int(order[0])]; best_auc = float(scores[int(order[0])])
+                break
+            alive = [alive[int(k)] for k in order[:max(1, len(alive)//eta)]]
+    except BaseException:
+        # cancelled (JobCancelled from progress) or failed: drop the queued trials instead of draining the rung
+        if pool is not None: pool.shutdown(wait=False, cancel_futures=True); pool = None
+        raise
+    finally:
+        if pool is not None: pool.shutdown()
+    best = configs[best_i]
+    out = {"n_configs": len(configs), "rungs": rungs, "best": {"trial": best_i, "params": best, "auc_roc_mean": best_auc},
+           "n_evaluations": len(trials), "trials": trials}
+    if p.get("publish", True):
+        from .tasks import run_train
+        res = run_train({**best, "notes": f"sweep best (trial {best_i})"}, registry, cache, progress)
+        out["model_version"] = res["model_version"]
+        if log: log("sweep", {k: v for k, v in p.items() if k != "base"}, {"best_auc_roc": best_auc, "model_version": res["model_version"], **{f"best_{k}": best[k] for k in TUNABLE}})
+    return out
+
+# python -m src.sweep --space '{"lr":[0.02,0.05,0.1],"l2":[1e-4,1e-3,1e-2]}' --workers 4
+def main(argv=None):
+    from .datasets import DatasetCache
+    from .experiments import ExperimentStore
+    from .registry import ModelRegistry
+    ap = argparse.ArgumentParser(description="AeroPredict hyperparameter sweep (successive halving on CV AUC)")
+    ap.add_argument("--space", required=True, help="JSON object or path to a JSON file: {param: [values] | {low, high, log}}")
+    ap.add_argument("--mode", choices=["grid","random"], default="grid")
+    ap.add_argument("--trials", type=int, default=16, help="configurations for random search")
+    ap.add_argument("--n-samples", type=int, default=10000)
+    ap.add_argument("--k-folds", type=int, default=3)
+    ap.add_argument("--eta", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=123)
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2)-1))
+    ap.add_argument("--no-publish", action="store_true")
+    ap.add_argument("--registry-dir", default=os.environ.get("REGISTRY_DIR", "models/registry"))
+    ap.add_argument("--log-path", default=os.environ.get("EXPERIMENTS_PATH", "data/experiments.db"))
+    a = ap.parse_args(argv)
+    if os.path.exists(a.space):
+        with open(a.space, "r") as f: space = json.load(f)
+    else:
+        space = json.loads(a.space)
+    cache_cfg = {"max_bytes": 512*2**20, "persist_dir": os.environ.get("DATASET_CACHE_DIR") or None}
+    params = {"space": space, "mode": a.mode, "n_trials": a.trials, "n_samples": a.n_samples, "k_folds": a.k_folds,
+              "eta": a.eta, "seed": a.seed, "publish": not a.no_publish}
+    res = run_sweep(params, ModelRegistry(a.registry_dir), DatasetCache(**cache_cfg), cache_cfg,
+                    log=ExperimentStore(a.log_path).log, n_workers=a.workers,
+                    progress=lambda stage, d, t: print(f"{stage}: {d}/{t}", flush=True))
+    res.pop("trials")
+    print(json.dumps(res, indent=2))
+
+if __name__ == "__main__":
+    main()
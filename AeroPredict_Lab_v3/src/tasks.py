@@ -0,0 +1,72 @@
+import numpy as np
+from typing import Any, Callable, Dict, Optional
+from .model import train_logit, train_logit_batched, train_ensemble, kfold_masks, kfold_indices, roc_curve, pr_curve
+from .calibration import fit_calibrator
+
+# Training work shared by the synchronous endpoints and the background job workers.
+# progress(stage, done, total) is optional and may raise to abort (job cancellation).
+# Each task ticks a "publish" stage right before writing to the registry and never after,
+# so a cancelled job has either published nothing or finishes as done.
+
+Progress = Optional[Callable[[str, int, int], None]]
+
+def _epochs(progress: Progress, stage: str = "epoch"):
+    return (lambda it, total: progress(stage, it, total)) if progress else None
+
+def _before_publish(progress: Progress):
+    if progress: progress("publish", 0, 1)  # last point where a cancel takes effect
+
+def run_train(p: Dict[str, Any], registry, cache, progress: Progress = None) -> Dict[str, Any]:
+    X,y = cache.get(p["n_samples"], p["seed"])
+    model, mu, sigma = train_logit(X, y, lr=p["lr"], epochs=p["epochs"], l2=p["l2"], solver=p["solver"], tol=p["tol"],
+                                   callback=_epochs(progress))
+    _before_publish(progress)
+    m = registry.publish(model, mu, sigma, meta={"event": "train", **p})
+    return {"trained": True, "n": int(p["n_samples"]), "solver": p["solver"], "n_iter": model.n_iter, "converged": model.converged,
+            "model_version": m.version}
+
+def run_train_ensemble(p: Dict[str, Any], registry, cache, progress: Progress = None) -> Dict[str, Any]:
+    # point model + k bootstrap members in one batched GD pass; published as a single bundle
+    X,y = cache.get(p["n_samples"], p["seed"])
+    model, mu, sigma, ens = train_ensemble(X, y, k=p["k"], lr=p["lr"], epochs=p["epochs"], l2=p["l2"], tol=p["tol"],
+                                           seed=p["seed"], callback=_epochs(progress))
+    _before_publish(progress)
+    m = registry.publish(model, mu, sigma, meta={"event": "train_ensemble", **p}, ensemble=ens)
+    return {"trained": True, "n": int(p["n_samples"]), "k": int(p["k"]), "n_iter": model.n_iter, "converged": model.converged,
+            "model_version": m.version}
+
+def run_train_cv(p: Dict[str, Any], cache, progress: Progress = None) -> Dict[str, Any]:
+    X,y = cache.get(p["n_samples"], p["seed"])
+    k = p["k_folds"]
+    folds = kfold_indices(len(X), k, seed=p["seed"])
+    per_fold=[]; aucrocs=[]; aucprs=[]
+    if p["solver"] == "gd":
+        # all folds share one vectorized GD pass over the full matrix
+        fitted = train_logit_batched(X, y, kfold_masks(len(X), folds), lr=p["lr"], epochs=p["epochs"], l2=p["l2"], tol=p["tol"],
+                                     callback=_epochs(progress))
+    for i in range(k):
+        va_idx = folds[i]
+        if p["solver"] == "gd":
+            model, mu, sigma = fitted[i]
+        else:
+            tr_idx = np.concatenate([folds[j] for j in range(k) if j!=i])
+            model, mu, sigma = train_logit(X[tr_idx], y[tr_idx], lr=p["lr"], epochs=p["epochs"], l2=p["l2"], solver=p["solver"], tol=p["tol"])
+        pv = model.predict_proba((X[va_idx]-mu)/(sigma+1e-8))
+        fpr,tpr,aucroc = roc_curve(y[va_idx], pv)
+        rec,prec,aucpr  = pr_curve(y[va_idx], pv)
+        per_fold.append({"fold":i,"n_train":int(len(X)-len(va_idx)),"n_val":int(len(va_idx)),"auc_roc":float(aucroc),"auc_pr":float(aucpr),"n_iter":model.n_iter})
+        aucrocs.append(aucroc); aucprs.append(aucpr)
+        if progress: progress("fold", i+1, k)
+    summary = {"k_folds": k, "auc_roc_mean": float(np.mean(aucrocs)), "auc_pr_mean": float(np.mean(aucprs))}
+    return {"per_fold": per_fold, "summary": summary}
+
+def run_calibrate(registry, cache, progress: Progress = None, method: str = "platt") -> Dict[str, Any]:
+    # use a fresh val set to fit the calibrator on the active model; published as a new version with the same weights
+    X,y = cache.get(4000, 777)
+    cur = registry.refresh() or registry.active
+    pv = cur.model.predict_proba((X-cur.mu)/(cur.sigma+1e-8))
+    cal = fit_calibrator(method, pv, y)
+    _before_publish(progress)
+    m = registry.publish(cur.model, cur.mu, cur.sigma, calib=cal, meta={**cur.meta, "event": "calibrate", "calibrator": method, "parent": cur.version},
+                         ensemble=cur.ensemble)
+    return {"calibrated": True, "method": method, **cal.summary(), "model_version": m.version}
@@ -0,0 +1,160 @@
+import bisect, contextvars, sys, threading, time, traceback
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Prometheus text-format metrics without the client library: counters, gauges and
+# fixed-bucket histograms keyed by label tuples, an ASGI middleware timing every request,
+# and stage() for per-stage timings inside handlers. parse/serialize are derived from the
+# gap between request start and the first stage, and between the last stage and the end
+# of the response body.
+
+LATENCY_BUCKETS = (5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra: parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _fmt_num(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v)) if isinstance(v, float) else str(v)
+
+class _Metric:
+    kind = "untyped"
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name; self.help = help; self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock(); self._values: Dict[Tuple, object] = {}
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+    def inc(self, labels: Tuple = (), v: float = 1.0):
+        with self._lock: self._values[labels] = self._values.get(labels, 0.0) + v
+
+    def render(self) -> List[str]:
+        with self._lock: items = list(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_num(v)}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+    def set(self, labels: Tuple = (), v: float = 0.0):
+        with self._lock: self._values[labels] = float(v)
+
+    def dec(self, labels: Tuple = (), v: float = 1.0):
+        self.inc(labels, -v)
+
+class Histogram(_Metric):
+    kind = "histogram"
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames); self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Tuple, v: float):
+        i = bisect.bisect_left(self.buckets, v)
+        with self._lock:
+            cell = self._values.get(labels)
+            if cell is None: cell = self._values[labels] = [[0]*(len(self.buckets)+1), 0.0, 0]
+            cell[0][i] += 1; cell[1] += v; cell[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock: items = [(k, (list(c[0]), c[1], c[2])) for k, c in self._values.items()]
+        out = self.header()
+        for k, (counts, total, n) in items:
+            acc = 0
+            for ub, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le = 'le="%s"' % _fmt_num(ub)
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, k, le)} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, k)} {_fmt_num(total)}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, k)} {n}")
+        return out
+
+class Telemetry:
+    def __init__(self, prefix: str = "aeropredict"):
+        self.metrics: List[_Metric] = []
+        self.requests = self.add(Counter(f"{prefix}_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status")))
+        self.latency = self.add(Histogram(f"{prefix}_request_duration_seconds", "End-to-end request latency", ("endpoint",)))
+        self.stages = self.add(Histogram(f"{prefix}_stage_duration_seconds", "Per-stage handler latency (parse, vectorize, score, calibrate, serialize, ...)", ("endpoint", "stage")))
+        self.in_flight = self.add(Gauge(f"{prefix}_requests_in_flight", "Requests currently being served", ("endpoint",)))
+        self.collectors = []  # callables returning extra exposition lines at scrape time
+
+    def add(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric); return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self.metrics: lines += m.render()
+        for fn in self.collectors:
+            try: lines += fn()
+            except Exception: pass  # a broken collector must not take /metrics down
+        return "\n".join(lines) + "\n"
+
+# per-request stage recorder, set by the middleware; sync handlers see it through the threadpool's context copy
+_CURRENT: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("aeropredict_request_stages", default=None)
+
+@contextmanager
+def stage(name: str):
+    rec = _CURRENT.get()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if rec is not None and not rec["closed"]:  # tasks spawned inside a request (batcher) outlive it
+            t1 = time.perf_counter()
+            if rec["first"] is None: rec["first"] = t0
+            rec["last"] = t1; rec["stages"].append((name, t1 - t0))
+
+class MetricsMiddleware:
+    # pure ASGI (no BaseHTTPMiddleware task hop). Labels use the route template (/jobs/{job_id}),
+    # never the raw path, so label cardinality stays bounded
+    def __init__(self, app, telemetry: Telemetry, routes: Optional[list] = None):
+        self.app = app; self.t = telemetry; self.routes = routes or []
+        self._resolved: Dict[Tuple[str, str], str] = {}
+
+    def _endpoint(self, scope) -> str:
+        key = (scope.get("method", ""), scope.get("path", ""))
+        ep = self._resolved.get(key)
+        if ep is None:
+            from starlette.routing import Match
+            ep = next((getattr(r, "path", "unmatched") for r in self.routes if r.matches(scope)[0] == Match.FULL), "unmatched")
+            if "{" not in ep and len(self._resolved) < 4096: self._resolved[key] = ep  # only static paths are cached
+        return ep
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http": return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        rec = {"first": None, "last": None, "stages": [], "closed": False}; token = _CURRENT.set(rec)
+        status = [500]; ep = self._endpoint(scope)
+        self.t.in_flight.inc((ep,))
+        async def _send(msg):
+            if msg["type"] == "http.response.start": status[0] = msg["status"]
+            await send(msg)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            t1 = time.perf_counter(); _CURRENT.reset(token); rec["closed"] = True
+            self.t.in_flight.dec((ep,))
+            self.t.requests.inc((ep, scope.get("method", ""), str(status[0])))
+            self.t.latency.observe((ep,), t1 - t0)
+            if rec["first"] is not None:
+                self.t.stages.observe((ep, "parse"), rec["first"] - t0)
+                for name, dt in rec["stages"]: self.t.stages.observe((ep, name), dt)
+                self.t.stages.observe((ep, "serialize"), t1 - rec["last"])
+
+def sample_stacks(seconds: float = 5.0, interval_s: float = 0.005, include_idle: bool = False) -> str:
+    # poor man's sampling profiler: sys._current_frames() every interval_s across all threads,
+    # aggregated as collapsed stacks ("frame;frame;frame count"), ready for flamegraph.pl/speedscope
+    me = threading.get_ident(); tally: _Tally = _Tally(); n = 0
+    deadline = time.monotonic() + max(0.0, seconds)
+    while time.monotonic() < deadline:
+        for tid, frame in sys._current_frames().items():
+            if tid == me: continue
+            stack = traceback.extract_stack(frame)
+            if not include_idle and stack and stack[-1].name in ("wait", "select", "poll", "_worker", "get", "accept", "sleep", "run_forever", "_run_once"):
+                continue
+            tally[";".join(f"{f.name} ({f.filename.rsplit('/', 1)[-1]}:{f.lineno})" for f in stack)] += 1
+        n += 1
+        time.sleep(interval_s)
+    head = f"# samples={n} interval_s={interval_s} seconds={seconds}\n"
+    return head + "".join(f"{k} {v}\n" for k, v in tally.most_common())
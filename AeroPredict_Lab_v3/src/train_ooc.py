@@ -0,0 +1,30 @@
+import argparse, json, os, time
+from .datasets import open_source, train_from_source
+from .registry import ModelRegistry
+
+# python -m src.train_ooc data/flights.parquet --epochs 3 --optimizer adam
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Out-of-core AeroPredict training over .npy / Parquet feature files")
+    ap.add_argument("path", help=".npy (features[+label]) or .parquet file/directory")
+    ap.add_argument("--y-path", default=None, help="label .npy when `path` holds only the 7 features")
+    ap.add_argument("--label", default="y", help="label column for Parquet sources")
+    ap.add_argument("--lr", type=float, default=0.01)
+    ap.add_argument("--epochs", type=int, default=3)
+    ap.add_argument("--l2", type=float, default=1e-3)
+    ap.add_argument("--batch-size", type=int, default=4096)
+    ap.add_argument("--chunk-rows", type=int, default=262144)
+    ap.add_argument("--optimizer", choices=["adam","sgd"], default="adam")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--registry-dir", default=os.environ.get("REGISTRY_DIR", "models/registry"))
+    ap.add_argument("--no-activate", action="store_true", help="publish the version without making it active")
+    a = ap.parse_args(argv)
+    t0 = time.time()
+    src = open_source(a.path, y_path=a.y_path, label=a.label)
+    model, mu, sigma = train_from_source(src, lr=a.lr, epochs=a.epochs, l2=a.l2, batch_size=a.batch_size,
+                                         optimizer=a.optimizer, chunk_rows=a.chunk_rows, seed=a.seed)
+    meta = {"event": "train_ooc", "path": a.path, "lr": a.lr, "epochs": a.epochs, "l2": a.l2, "optimizer": a.optimizer}
+    m = ModelRegistry(a.registry_dir).publish(model, mu, sigma, meta=meta, activate=not a.no_activate)
+    print(json.dumps({"trained": True, "n": src.n_rows, "seconds": round(time.time()-t0, 3), "model_version": m.version, "path": m.path}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import asyncio, numpy as np
+from src.batcher import MicroBatcher
+
+def test_concurrent_rows_coalesce_into_one_batch():
+    calls = []
+    def score(X):
+        calls.append(len(X)); return X.sum(axis=1), "v1"
+    mb = MicroBatcher(score, max_rows=64, max_wait_us=20000)
+    async def main():
+        return await asyncio.gather(*[mb.submit((float(i), 1.0)) for i in range(40)])
+    out = asyncio.run(main())
+    assert [p for p, _ in out] == [i + 1.0 for i in range(40)] and out[0][1] == "v1"
+    assert calls == [40]
+    st = mb.stats()
+    assert st["batches"] == 1 and st["rows"] == 40 and st["batch_size_histogram"]["le_64"] == 1
+
+def test_max_rows_splits_batches():
+    mb = MicroBatcher(lambda X: (X[:, 0], None), max_rows=8, max_wait_us=5000)
+    async def main():
+        return await asyncio.gather(*[mb.submit((float(i),)) for i in range(20)])
+    assert [p for p, _ in asyncio.run(main())] == list(range(20))
+    assert mb.stats()["max_batch_size"] == 8 and mb.stats()["batches"] == 3
@@ -0,0 +1,39 @@
+import numpy as np
+from src.calibration import PlattCalibrator, IsotonicCalibrator, fit_calibrator
+from src.registry import ModelRegistry
+
+def _scores(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    p = rng.random(n); y = (rng.random(n) < p**2).astype(float)  # miscalibrated on purpose
+    return p, y
+
+def test_platt_newton_reaches_the_optimum():
+    p, y = _scores()
+    a, b = PlattCalibrator.fit(p, y)
+    z = np.log((p+1e-6)/(1-p+1e-6)); s = 1/(1+np.exp(-(a*z + b)))
+    assert abs(np.mean((s-y)*z)) < 1e-8 and abs(np.mean(s-y)) < 1e-8  # gradient vanishes
+
+def test_isotonic_matches_pav_definition():
+    p, y = _scores()
+    p = np.round(p, 3)  # ties
+    iso = fit_calibrator("isotonic", p, y)
+    assert np.all(np.diff(iso.x) > 0) and np.all(np.diff(iso.y) >= 0)
+    q = iso.apply(p)
+    # the fit is the L2 projection onto monotone functions: per-block means are preserved
+    for v in np.unique(q):
+        assert abs(np.mean(y[q == v]) - v) < 1e-9
+    assert iso.apply(np.array([-1.0, 2.0])).tolist() == [iso.y[0], iso.y[-1]]
+
+def test_calibrator_is_stored_in_artifact(tmp_path):
+    from src.model import synth_dataset, train_logit
+    X, y = synth_dataset(n=2000, seed=4)
+    model, mu, sigma = train_logit(X, y, solver="newton", epochs=20)
+    iso = IsotonicCalibrator.fit(model.predict_proba((X-mu)/(sigma+1e-8)), y)
+    reg = ModelRegistry(str(tmp_path), poll_seconds=0)
+    m = reg.publish(model, mu, sigma, calib=iso)
+    loaded = reg.load(m.version)
+    assert loaded.calib.kind == "isotonic" and np.array_equal(loaded.calib.x, iso.x)
+    X2, _ = synth_dataset(n=2000, seed=5)  # fresh rows: training scores sit exactly on the step edges
+    assert np.allclose(loaded.score(X2), iso.apply(model.predict_proba((X2-mu)/(sigma+1e-8))))
+    p32 = loaded.score(X2.astype(np.float32))
+    assert p32.dtype == np.float32 and np.mean(np.abs(p32 - loaded.score(X2)) > 1e-5) < 0.01  # only rows near an edge move
@@ -0,0 +1,16 @@
+import json
+import numpy as np, pytest
+from src.columnar import decode_json_columns
+from src.model import FEAT_NAMES
+
+def test_json_columns_feature_major():
+    cols = {c: [float(i), float(i) + 0.5] for i, c in enumerate(FEAT_NAMES)}
+    for body in (cols, {"columns": cols}):
+        X, feature_major = decode_json_columns(json.dumps(body).encode())
+        assert feature_major and X.shape == (len(FEAT_NAMES), 2) and np.allclose(X[:, 1], np.arange(len(FEAT_NAMES)) + 0.5)
+
+@pytest.mark.parametrize("body", ["[1, 2]", "3", '"x"', "null", '{"columns": [1, 2]}'])
+def test_json_columns_non_object_is_value_error(body):
+    # ValueError is what /predict/columnar turns into a 400
+    with pytest.raises(ValueError, match="JSON object"):
+        decode_json_columns(body.encode())
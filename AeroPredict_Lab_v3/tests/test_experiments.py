@@ -0,0 +1,20 @@
+from src.experiments import CSVLogger, ExperimentStore
+
+def test_store_query_paging_and_best(tmp_path):
+    st = ExperimentStore(str(tmp_path/"exp.db"), flush_every=100)
+    for i in range(30):
+        st.log("train_cv" if i % 3 else "train", {"lr": 0.01*i}, {"auc_roc_mean": (i*7 % 30)/30, "ok": True})
+    page = st.query(event="train_cv", limit=5)
+    assert len(page) == 5 and all(r["event"] == "train_cv" for r in page)
+    assert page[0]["ts"] >= page[-1]["ts"] and isinstance(page[0]["params"], dict)
+    nxt = st.query(event="train_cv", limit=5, before_id=page[-1]["id"])
+    assert {r["id"] for r in nxt}.isdisjoint(r["id"] for r in page)
+    best = st.best("auc_roc_mean", event="train_cv")[0]
+    assert best["metrics"]["auc_roc_mean"] == max(r["metrics"]["auc_roc_mean"] for r in st.query(event="train_cv", limit=100))
+    assert st.counts() == {"train": 10, "train_cv": 20}
+
+def test_import_legacy_csv(tmp_path):
+    old = CSVLogger(str(tmp_path/"experiments.csv"))
+    old.log("calibrate", {}, {"a": 1.2, "b": -0.1})
+    st = ExperimentStore(str(tmp_path/"exp.db"), import_csv=str(tmp_path/"experiments.csv"))
+    assert st.query()[0]["metrics"] == {"a": 1.2, "b": -0.1}
@@ -0,0 +1,58 @@
+import numpy as np
+from src.features import extract, RollingFeatures
+
+def _flight(n, seed, t0=0.0):
+    rng = np.random.default_rng(seed); t = t0 + np.cumsum(rng.uniform(0.15, 0.25, n))
+    return {"t": t, "x": 20*t, "y": 300 + np.cumsum(rng.normal(0, 1, n)), "vx": 20 + rng.normal(0, 1, n),
+            "vy": rng.normal(-1, 0.5, n), "pitch": rng.normal(0, 0.05, n), "roll": rng.normal(0, 0.05, n)}
+
+def test_window_stats_match_brute_force_per_flight():
+    a, b = _flight(120, 1), _flight(90, 2, t0=1.7e9)
+    cols = {k: np.concatenate([b[k], a[k]]) for k in a}; ids = np.array([2]*90 + [1]*120)
+    wf = extract(cols, ids, windows=(4, 10))
+    assert wf.X.shape == (111 + 81, 7) and wf.F.shape == (192, 40)
+    assert (ids[wf.rows] == np.repeat([1, 2], [111, 81])).all()  # sorted by flight, no window crosses flights
+    for r in (0, 57, 150, 191):
+        e = wf.rows[r]; sl = slice(e-9, e+1)
+        assert ids[e-9] == ids[e]
+        assert np.isclose(wf.F[r, wf.names.index("altitude_slope_10")], np.polyfit(cols["t"][sl] - cols["t"][e], cols["y"][sl], 1)[0])
+        assert np.isclose(wf.F[r, wf.names.index("vspeed_min_10")], cols["vy"][sl].min())
+        assert np.isclose(wf.F[r, wf.names.index("pitch_max_4")], cols["pitch"][e-3:e+1].max())
+        assert np.isclose(wf.F[r, wf.names.index("airspeed_mean_10")], np.hypot(cols["vx"][sl], cols["vy"][sl]).mean())
+        assert np.isclose(wf.X[r, 1], cols["y"][e])
+
+def test_streaming_chunks_equal_batch_and_gaps_carry_forward():
+    a = _flight(200, 3); a["roll"][[50, 51, 120]] = np.nan
+    batch = extract(a, windows=(5, 25), smooth=3)
+    rf = RollingFeatures(windows=(5, 25), smooth=3)
+    parts = [rf.push("f", {k: v[s:s+13] for k, v in a.items()}) for s in range(0, 200, 13)]
+    assert np.allclose(np.vstack([p.F for p in parts]), batch.F) and np.allclose(np.vstack([p.X for p in parts]), batch.X)
+    assert not np.isnan(batch.F).any() and rf.pending("f") == 24
+
+def test_telemetry_endpoint_skips_unobserved_channels(tmp_path, monkeypatch):
+    import importlib, sys
+    from fastapi.testclient import TestClient
+    for k, v in {"STARTUP_MODE": "lazy", "REGISTRY_DIR": str(tmp_path / "registry"), "MODEL_PATH": str(tmp_path / "none.npz"),
+                 "EXPERIMENTS_PATH": str(tmp_path / "experiments.db"), "FEATURE_WINDOWS": "3,5"}.items():
+        monkeypatch.setenv(k, v)
+    sys.modules.pop("src.api", None)
+    api = importlib.import_module("src.api")
+    try:
+        c = TestClient(api.app)
+        f = _flight(12, 4)
+        rows = lambda drop: [{k: (None if drop(k, i) else float(f[k][i])) for k in ("t", "y", "vx", "vy", "pitch", "roll")} for i in range(12)]
+        # pitch never sent for this flight: nothing can be scored yet
+        r = c.post("/predict/telemetry", json={"flight_id": "a", "samples": rows(lambda k, i: k == "pitch")})
+        assert r.status_code == 200 and r.json()["probs"] == [] and r.json()["incomplete"] == 8
+        # leading nulls: rows start once the longest window holds only observed samples (pitch from i=3 -> end at 7)
+        r = c.post("/predict/telemetry?include_features=true",
+                   json={"flight_id": "b", "samples": rows(lambda k, i: k == "pitch" and i < 3 or k == "roll" and i == 0)})
+        d = r.json()
+        assert r.status_code == 200 and d["t"] == f["t"][7:].tolist() and len(d["probs"]) == 5 and d["incomplete"] == 3
+        assert all(v is not None for col in d["features"].values() for v in col)
+        # duplicate timestamps: slope is undefined and comes back as null
+        same = [{"t": 1.0, "y": 300.0, "vx": 20.0, "vy": -1.0, "pitch": 0.0, "roll": 0.0}]*6
+        d = c.post("/predict/telemetry?include_features=true", json={"flight_id": "c", "samples": same}).json()
+        assert len(d["probs"]) == 2 and d["features"]["altitude_slope_5"] == [None, None]
+    finally:
+        sys.modules.pop("src.api", None)
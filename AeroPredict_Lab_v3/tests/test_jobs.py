@@ -0,0 +1,105 @@
+import importlib, json, sys, threading, time
+import pytest
+from src.jobs import Job, JobCancelled, JobManager, QueueFull, TERMINAL, _run_job
+from src.model import synth_dataset, train_logit
+from src.registry import ModelRegistry
+
+TRAIN = {"n_samples": 2000, "seed": 1, "lr": 0.05, "epochs": 50, "l2": 1e-3, "solver": "gd", "tol": 1e-6}
+SLOW = {**TRAIN, "epochs": 10**7, "tol": 0.0}  # never converges: only a cancel ends it
+
+def _wait(job, until=TERMINAL, timeout=60.0):
+    t0 = time.time()
+    while job.to_dict()["status"] not in until:
+        assert time.time() - t0 < timeout, f"job {job.id} stuck in {job.status}"
+        time.sleep(0.05)
+    return job.to_dict()
+
+@pytest.fixture
+def jobs(tmp_path):
+    jm = JobManager(str(tmp_path / "registry"), {}, max_workers=1, max_pending=3)
+    yield jm
+    for j in list(jm.jobs.values()): jm.cancel(j.id)
+    jm.shutdown()
+
+def test_submit_and_poll(jobs, tmp_path):
+    job = jobs.submit("train", TRAIN)
+    assert job.to_dict()["status"] in ("queued", "running")
+    d = _wait(job)
+    assert d["status"] == "done" and d["result"]["model_version"] == 1 and d["started"] <= d["finished"]
+    assert d["progress"]["stage"] == "publish" and jobs.list()[0]["job_id"] == job.id
+    assert ModelRegistry(str(tmp_path / "registry"), poll_seconds=0).versions() == [1]
+
+def test_cancel_running_and_queued(jobs, tmp_path):
+    running = jobs.submit("train", SLOW)
+    queued = [jobs.submit("train", TRAIN) for _ in range(3)]
+    _wait(running, until=("running",))
+    # one worker holds `running`; the executor's call queue takes at most two more, so the last is still pending
+    assert jobs.cancel(queued[-1].id).future.cancelled()
+    for j in [running] + queued[:-1]: jobs.cancel(j.id)
+    for j in [running] + queued:
+        assert _wait(j)["status"] == "cancelled"
+    assert queued[-1].started is None
+    assert ModelRegistry(str(tmp_path / "registry"), poll_seconds=0).versions() == []
+
+def test_queue_full(jobs):
+    for _ in range(jobs.max_workers + jobs.max_pending): jobs.submit("train", SLOW)
+    with pytest.raises(QueueFull):
+        jobs.submit("train", TRAIN)
+
+def test_trim_keeps_active_and_newest_finished():
+    jm = JobManager("unused", {}, keep_finished=2)
+    for i, status in enumerate(["done", "failed", "running", "cancelled", "done", "queued"]):
+        jm.jobs[f"j{i}"] = Job(id=f"j{i}", kind="train", params={}, created=float(i), status=status)
+    jm._trim()
+    assert sorted(jm.jobs) == ["j2", "j3", "j4", "j5"]
+
+def _publish_one(root):
+    X, y = synth_dataset(n=2000, seed=2)
+    ModelRegistry(root, poll_seconds=0).publish(*train_logit(X, y, solver="newton", epochs=20))
+
+def test_cancel_is_checked_before_publishing(tmp_path, monkeypatch):
+    # _run_job in-process with a plain dict standing in for the Manager dict
+    root = str(tmp_path / "registry"); _publish_one(root)
+    publish = ModelRegistry.publish
+    state = {"cancel": False}
+    def cancel_during_publish(self, *a, **k):
+        m = publish(self, *a, **k); state["cancel"] = True; return m
+    monkeypatch.setattr(ModelRegistry, "publish", cancel_during_publish)
+    res = _run_job("calibrate", {"method": "platt"}, root, {}, None, state)
+    assert res["model_version"] == 2  # cancelled too late: the job published and reports it
+    state = {"cancel": True}
+    with pytest.raises(JobCancelled):
+        _run_job("calibrate", {"method": "platt"}, root, {}, None, state)
+    assert ModelRegistry(root, poll_seconds=0).versions() == [1, 2]
+
+def _events(body):
+    out = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(l.split(": ", 1) for l in block.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+def test_sse_streams_progress_then_end(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    monkeypatch.setenv("STARTUP_MODE", "lazy")
+    monkeypatch.setenv("REGISTRY_DIR", str(tmp_path / "registry"))
+    monkeypatch.setenv("EXPERIMENTS_PATH", str(tmp_path / "experiments.db"))
+    sys.modules.pop("src.api", None)
+    api = importlib.import_module("src.api")
+    try:
+        job = Job(id="abc", kind="train", params={}, created=time.time(),
+                  state={"status": "running", "started": time.time(), "progress": {"stage": "epoch", "done": 1, "total": 3}})
+        api.JOBS.jobs[job.id] = job
+        def work():
+            for done in (2, 3):
+                time.sleep(0.25); job.state["progress"] = {"stage": "epoch", "done": done, "total": 3}
+            time.sleep(0.25); job.result = {"model_version": 1}; job.status = "done"; job.state = None
+        threading.Thread(target=work).start()
+        c = TestClient(api.app)
+        ev = _events(c.get(f"/jobs/{job.id}/events", params={"interval": 0.1}).text)
+        assert [e for e, _ in ev[:-1]] == ["progress"]*(len(ev)-1) and ev[-1][0] == "end"
+        assert [d["progress"]["done"] for _, d in ev] == [1, 2, 3, 3]
+        assert ev[-1][1]["status"] == "done" and ev[-1][1]["result"] == {"model_version": 1}
+        assert c.get("/jobs/nope/events").status_code == 404
+    finally:
+        sys.modules.pop("src.api", None)
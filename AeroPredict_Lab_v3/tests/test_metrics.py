@@ -0,0 +1,39 @@
+import numpy as np
+from src.model import roc_curve, pr_curve, auc_xy
+
+def _roc_ref(y, p):
+    t = np.sort(np.unique(p))[::-1]
+    P = max(1, np.sum(y==1)); N = max(1, np.sum(y==0))
+    TPR = np.array([np.sum((p>=thr)&(y==1))/P for thr in t])
+    FPR = np.array([np.sum((p>=thr)&(y==0))/N for thr in t])
+    return FPR, TPR, auc_xy(FPR, TPR)
+
+def _pr_ref(y, p):
+    t = np.sort(np.unique(p))[::-1]
+    P = max(1, np.sum(y==1))
+    TP = np.array([np.sum((p>=thr)&(y==1)) for thr in t]); FP = np.array([np.sum((p>=thr)&(y==0)) for thr in t])
+    REC = TP/P; PREC = TP/np.maximum(1, TP+FP)
+    return REC, PREC, auc_xy(REC, PREC)
+
+def test_curves_match_threshold_loop_with_ties():
+    rng = np.random.default_rng(0)
+    y = (rng.random(2000) < 0.3).astype(float)
+    p = np.round(rng.random(2000), 2)  # heavy ties
+    for fast, ref in ((roc_curve, _roc_ref), (pr_curve, _pr_ref)):
+        x1, y1, a1 = fast(y, p); x2, y2, a2 = ref(y, p)
+        assert np.allclose(x1, x2) and np.allclose(y1, y2)
+        assert abs(a1 - a2) < 1e-12
+
+def test_weights_and_downsampling():
+    rng = np.random.default_rng(1)
+    y = (rng.random(500) < 0.5).astype(float); p = rng.random(500)
+    _, _, a = roc_curve(y, p)
+    _, _, aw = roc_curve(y, p, sample_weight=np.full(500, 3.0))
+    assert abs(a - aw) < 1e-12
+    fpr, tpr, ad = roc_curve(y, p, max_points=50)
+    assert len(fpr) <= 50 and ad == a and fpr[-1] == 1.0
+
+def test_constant_scores():
+    y = np.array([0., 1., 1., 0.]); p = np.full(4, 0.5)
+    fpr, tpr, _ = roc_curve(y, p)
+    assert np.allclose(fpr, [0, 1]) and np.allclose(tpr, [0, 1])
@@ -1,9 +1,89 @@
 
-import numpy as np
-from src.model import train_logit, synth_dataset
+import os, numpy as np
+import pytest
+from src.model import train_logit, train_logit_batched, kfold_indices, kfold_masks, synth_dataset
 
 def test_train_shapes():
     X,y = synth_dataset(n=500, seed=1)
     model, mu, sigma = train_logit(X, y, lr=0.05, epochs=10, l2=1e-3)
     assert model.w.shape[0] == X.shape[1]
     assert sigma.shape[0] == X.shape[1]
+
+def test_second_order_solvers_converge_early():
+    X,y = synth_dataset(n=3000, seed=3)
+    newton, _, _ = train_logit(X, y, l2=1e-3, solver="newton", epochs=100)
+    lbfgs, _, _  = train_logit(X, y, l2=1e-3, solver="lbfgs", epochs=100)
+    assert newton.converged and newton.n_iter <= 15
+    assert lbfgs.converged and lbfgs.n_iter <= 50
+    assert np.allclose(newton.w, lbfgs.w, atol=1e-4)
+
+def test_batched_folds_match_sequential():
+    X,y = synth_dataset(n=2000, seed=4)
+    folds = kfold_indices(len(X), 4, seed=4); M = kfold_masks(len(X), folds)
+    fitted = train_logit_batched(X, y, M, lr=0.05, epochs=50, l2=[1e-3, 1e-2, 1e-3, 0.0])
+    for j, (model, mu, sigma) in enumerate(fitted):
+        ref, mu_r, sigma_r = train_logit(X[M[:,j]], y[M[:,j]], lr=0.05, epochs=50, l2=[1e-3, 1e-2, 1e-3, 0.0][j])
+        assert np.allclose(model.w, ref.w, atol=1e-10) and abs(model.b - ref.b) < 1e-10
+        assert np.allclose(mu, mu_r) and np.allclose(sigma, sigma_r)
+
+def test_bootstrap_ensemble_one_gemm():
+    from src.model import bootstrap_masks, train_ensemble, predict_ensemble, fold_affine
+    M = bootstrap_masks(500, 8, seed=1)
+    assert M.shape == (500, 8) and np.all(M.sum(axis=0) == 500)
+    X,y = synth_dataset(n=2000, seed=11)
+    model, mu, sigma, (W, b) = train_ensemble(X, y, k=8, epochs=150)
+    ref, rmu, rsig = train_logit(X, y, epochs=150)
+    assert np.allclose(model.w, ref.w, atol=1e-8) and W.shape == (8, 7) and b.shape == (8,)
+    mean, std, Q = predict_ensemble(X[:300], W, b, quantiles=(0.1, 0.5, 0.9))
+    P = 1/(1+np.exp(-(X[:300] @ W.T + b)))
+    assert np.allclose(mean, P.mean(axis=1)) and np.allclose(std, P.std(axis=1), atol=1e-7)
+    assert np.allclose(Q, np.quantile(P, [0.1, 0.5, 0.9], axis=1).T)
+    assert std.mean() > 0  # members actually differ
+
+def test_out_of_core_training_from_npy(tmp_path):
+    from src.datasets import open_source, streaming_stats, train_from_source
+    X,y = synth_dataset(n=5000, seed=5)
+    np.save(tmp_path/"flights.npy", np.column_stack([X, y]).astype(np.float32))
+    src = open_source(str(tmp_path/"flights.npy"))
+    mu, sigma = streaming_stats(src, chunk_rows=700)
+    assert np.allclose(mu, X.astype(np.float32).astype(float).mean(axis=0))
+    assert np.allclose(sigma, X.astype(np.float32).astype(float).std(axis=0), rtol=1e-6)
+    model, _, _ = train_from_source(src, lr=0.01, epochs=2, batch_size=256, chunk_rows=1000)
+    ref, _, _ = train_logit(X, y, solver="newton", epochs=50)
+    assert np.corrcoef(model.w, ref.w)[0,1] > 0.95
+
+def test_parquet_row_group_order_follows_seed(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    import pyarrow as pa
+    from src.datasets import open_source
+    from src.model import FEAT_NAMES
+    X,y = synth_dataset(n=4000, seed=8)
+    table = pa.table({**{f: X[:, i] for i, f in enumerate(FEAT_NAMES)}, "y": y})
+    pq.write_table(table, tmp_path/"flights.parquet", row_group_size=500)  # 8 row groups
+    src = open_source(str(tmp_path/"flights.parquet"))
+    def firsts(seed): return [float(c[0][0, 0]) for c in src.iter_chunks(1000, seed=seed)]
+    assert firsts(None) == [float(X[i, 0]) for i in range(0, 4000, 500)]
+    assert firsts(1) == firsts(1) and firsts(1) != firsts(2) and sorted(firsts(1)) == sorted(firsts(None))
+    Xs = np.concatenate([c[0] for c in src.iter_chunks(1000, seed=3)])
+    assert np.array_equal(np.sort(Xs, axis=0), np.sort(X, axis=0))
+
+def test_dataset_cache_lru_readonly_and_persist(tmp_path):
+    from src.datasets import DatasetCache
+    one = synth_dataset(n=1000, seed=1)[0].nbytes + 8000
+    cache = DatasetCache(max_bytes=2*one, persist_dir=str(tmp_path))
+    X1, y1 = cache.get(1000, 1)
+    assert cache.get(1000, 1)[0] is X1 and cache.hits == 1 and not X1.flags.writeable
+    cache.get(1000, 2); cache.get(1000, 3)  # evicts (1000, 1)
+    assert cache.stats()["entries"] == 2 and cache.nbytes <= 2*one
+    X1b, _ = DatasetCache(persist_dir=str(tmp_path)).get(1000, 1)  # fresh process: memory-mapped from disk
+    assert isinstance(X1b, np.memmap) and np.array_equal(X1b, X1)
+
+def test_dataset_cache_concurrent_persist(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.datasets import DatasetCache
+    caches = [DatasetCache(persist_dir=str(tmp_path)) for _ in range(8)]  # separate caches: every one misses
+    with ThreadPoolExecutor(8) as ex:
+        out = list(ex.map(lambda c: c.get(20000, 5), caches))
+    X, y = synth_dataset(n=20000, seed=5)
+    assert all(np.array_equal(a, X) and np.array_equal(b, y) for a, b in out)
+    assert sorted(os.listdir(tmp_path)) == ["synth_v1_n20000_s5_X.npy", "synth_v1_n20000_s5_y.npy"]
@@ -0,0 +1,48 @@
+import numpy as np
+from src.model import synth_dataset, train_logit
+from src.registry import ModelRegistry
+from src.monitor import DriftMonitor
+
+def _bundle(tmp_path):
+    X, y = synth_dataset(n=4000, seed=3)
+    model, mu, sigma = train_logit(X, y, solver="newton", epochs=20)
+    return ModelRegistry(str(tmp_path), poll_seconds=0).publish(model, mu, sigma)
+
+def test_stats_match_numpy_and_psi_flags_shift(tmp_path):
+    m = _bundle(tmp_path)
+    X, _ = synth_dataset(n=3000, seed=9)
+    mon = DriftMonitor(flush_rows=100)
+    for i in range(0, 3000, 7):  # uneven request sizes, some single rows
+        mon.observe(X[i:i+7], m.score(X[i:i+7]), m)
+    snap = mon.snapshot()
+    assert snap["n"] == 3000 and snap["predictions"]["n"] == 3000 and snap["model_version"] == m.version
+    f = snap["features"]["altitude"]
+    assert np.isclose(f["mean"], X[:, 1].mean()) and np.isclose(f["std"], X[:, 1].std())
+    assert sum(f["hist"]) == 3000 and not snap["drift"]
+    shifted = X.copy(); shifted[:, 0] += 2*m.sigma[0]
+    mon.reset(m); mon.observe(shifted, m.score(shifted), m)
+    snap = mon.snapshot()
+    assert snap["features"]["airspeed"]["status"] == "alert" and snap["drift"]
+    assert snap["features"]["vspeed"]["status"] == "ok"
+
+def test_new_model_version_resets(tmp_path):
+    m = _bundle(tmp_path)
+    mon = DriftMonitor(flush_rows=1)
+    X, _ = synth_dataset(n=50, seed=1)
+    mon.observe(X, m.score(X), m)
+    m2 = ModelRegistry(str(tmp_path), poll_seconds=0).publish(m.model, m.mu, m.sigma)
+    mon.observe(X[:5], m2.score(X[:5]), m2)
+    assert mon.snapshot()["n"] == 5 and mon.version == m2.version
+
+def test_non_finite_rows_are_counted_not_aggregated(tmp_path):
+    m = _bundle(tmp_path)
+    X, _ = synth_dataset(n=40, seed=4)
+    bad = X[:4].copy(); bad[0, 2] = np.nan; bad[1, 0] = np.inf
+    p = m.score(bad); p[2] = np.nan
+    mon = DriftMonitor(flush_rows=4)
+    mon.observe(bad, p, m)  # flushes: 3 invalid rows, 1 valid
+    mon.observe(X[4:], m.score(X[4:]), m)
+    snap = mon.snapshot()
+    assert snap["invalid_rows"] == 3 and snap["n"] == 37 and snap["predictions"]["n"] == 37
+    f = snap["features"]["vspeed"]
+    assert np.isclose(f["mean"], X[3:, 2].mean()) and np.isclose(f["std"], X[3:, 2].std()) and sum(f["hist"]) == 37
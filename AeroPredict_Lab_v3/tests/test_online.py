@@ -0,0 +1,34 @@
+import numpy as np
+from src.model import synth_dataset, train_logit
+from src.online import OnlineLearner
+from src.registry import ModelRegistry
+
+def _setup(tmp_path):
+    X,y = synth_dataset(n=3000, seed=1)
+    model, mu, sigma = train_logit(X, y, solver="newton", epochs=20)
+    reg = ModelRegistry(str(tmp_path), poll_seconds=0, mmap=True)
+    reg.publish(model, mu, sigma, calib=(1.1, 0.0), meta={"n_samples": 3000})
+    return reg, ModelRegistry(str(tmp_path), poll_seconds=0, mmap=True).refresh(), model, mu, sigma
+
+def test_stats_update_preserves_predictions_and_artifact(tmp_path):
+    reg, m, *_ = _setup(tmp_path)
+    X,_ = synth_dataset(n=500, seed=2)
+    L = OnlineLearner(reg, lr=1e-300)  # steps vanish, so only the running stats move the weights
+    L.update(X + 50.0, np.zeros(len(X)), m)
+    assert L.stats_rows == 3500 and not np.allclose(L.mu, m.mu)
+    w = L.theta[:-1]/(L.sigma + 1e-8); b = L.theta[-1] - L.mu @ w
+    assert np.allclose(1/(1 + np.exp(-(X @ w + b))), m.model.predict_proba((X - m.mu)/(m.sigma + 1e-8)), atol=1e-9)
+    assert not m.mu.flags.writeable and np.allclose(ModelRegistry(str(tmp_path), 0).load(1).mu, m.mu)
+
+def test_ftrl_tracks_concept_drift_and_publishes_every_n(tmp_path):
+    reg, m, model, mu, sigma = _setup(tmp_path)
+    X,_ = synth_dataset(n=20000, seed=3)
+    z = ((X - mu)/sigma) @ -model.w + 0.5  # the relation flips after deployment
+    y = (np.random.default_rng(4).random(len(z)) < 1/(1 + np.exp(-z))).astype(float)
+    L = OnlineLearner(reg, optimizer="ftrl", lr=0.5, publish_every=40)
+    losses = [L.update(X[i:i+100], y[i:i+100], reg.active)["loss_before"] for i in range(0, len(X), 100)]
+    assert np.mean(losses[-20:]) < np.mean(losses[:5]) - 0.1
+    assert reg.versions() == [1, 2, 3, 4, 5, 6] and reg.active.meta["parent_version"] == 5 and reg.active.meta["origin_version"] == 1
+    assert L.state()["pending_updates"] == 0 and reg.active.calib == (1.1, 0.0)
+    reg.activate(1)  # an external activation re-warm-starts from that version
+    assert L.update(X[:100], y[:100], reg.active)["base_version"] == 1 and L.origin == 1
@@ -0,0 +1,54 @@
+import numpy as np
+from src.model import LogitModel
+from src.registry import ModelRegistry
+
+def _model(v):
+    return LogitModel(w=np.full(7, v), b=v)
+
+def test_publish_activate_rollback(tmp_path):
+    reg = ModelRegistry(str(tmp_path), poll_seconds=0)
+    m1 = reg.publish(_model(1.0), np.zeros(7), np.ones(7))
+    m2 = reg.publish(_model(2.0), np.zeros(7), np.ones(7), calib=(1.5, -0.2))
+    assert reg.versions() == [1, 2] and reg.active.version == 2 and reg.active.calib == (1.5, -0.2)
+    assert reg.rollback().version == 1 and reg.active.calib is None
+    # another worker sees the pointer change and reloads only then
+    other = ModelRegistry(str(tmp_path), poll_seconds=0)
+    assert other.refresh().version == 1 and np.allclose(other.active.model.w, 1.0)
+    reg.activate(m2.version)
+    assert other.refresh().version == 2 and other.active.calib == (1.5, -0.2)
+    assert LogitModel.load(m1.path).b == 1.0
+
+def test_fused_score_matches_staged_path(tmp_path):
+    from src.model import synth_dataset, train_logit, platt_apply
+    X,y = synth_dataset(n=1000, seed=6)
+    model, mu, sigma = train_logit(X, y, solver="newton", epochs=20)
+    m = ModelRegistry(str(tmp_path), poll_seconds=0).publish(model, mu, sigma, calib=(0.8, -0.1))
+    staged = platt_apply(model.predict_proba((X-mu)/(sigma+1e-8)), 0.8, -0.1)
+    assert np.allclose(m.score(X), staged, atol=1e-5)
+    assert np.allclose(m.score(np.ascontiguousarray(X.T), columns=True), m.score(X))
+    assert np.allclose(m.score(X.astype(np.float32)), m.score(X), atol=1e-5)
+
+def test_mmap_load_matches_copy(tmp_path):
+    from src.calibration import IsotonicCalibrator
+    from src.model import synth_dataset, train_logit
+    X,y = synth_dataset(n=1000, seed=8)
+    model, mu, sigma = train_logit(X, y, solver="newton", epochs=20)
+    iso = IsotonicCalibrator.fit(model.predict_proba((X-mu)/(sigma+1e-8)), y)
+    v = ModelRegistry(str(tmp_path), poll_seconds=0).publish(model, mu, sigma, calib=iso, meta={"note": "x"}).version
+    a = ModelRegistry(str(tmp_path), poll_seconds=0, mmap=True).load(v)
+    b = ModelRegistry(str(tmp_path), poll_seconds=0).load(v)
+    assert isinstance(a.mu, np.memmap) and not a.mu.flags.writeable and a.meta == b.meta
+    assert np.array_equal(a.score(X), b.score(X))
+
+def test_ensemble_roundtrip_and_calibration(tmp_path):
+    from src.model import synth_dataset, train_ensemble
+    X,y = synth_dataset(n=1500, seed=12)
+    model, mu, sigma, ens = train_ensemble(X, y, k=6, epochs=100)
+    reg = ModelRegistry(str(tmp_path), poll_seconds=0)
+    v = reg.publish(model, mu, sigma, calib=(0.9, 0.1), ensemble=ens).version
+    m = ModelRegistry(str(tmp_path), poll_seconds=0, mmap=True).load(v)
+    assert np.array_equal(m.ensemble[0], ens[0]) and reg.load(v).ensemble is not None
+    mean, std, Q = m.score_ensemble(X[:50])
+    P = 1/(1+np.exp(-(0.9*(X[:50] @ ens[0].T + ens[1]) + 0.1)))  # Platt folded into every member
+    assert np.allclose(mean, P.mean(axis=1)) and Q.shape == (50, 3)
+    assert reg.publish(model, mu, sigma).ensemble is None
@@ -0,0 +1,43 @@
+import numpy as np, pyarrow as pa, pyarrow.csv as pacsv, pyarrow.parquet as pq
+import pytest
+from src.model import FEAT_NAMES, synth_dataset, train_logit
+from src.registry import ModelRegistry
+from src.score_batch import score_file
+
+def _setup(tmp_path, n=5000):
+    X,y = synth_dataset(n=2000, seed=3)
+    model, mu, sigma = train_logit(X, y, solver="newton", epochs=20)
+    m = ModelRegistry(str(tmp_path/"reg"), poll_seconds=0).publish(model, mu, sigma, calib=(1.2, 0.1))
+    Xs,_ = synth_dataset(n=n, seed=4)
+    t = pa.table({**{c: Xs[:, i] for i, c in enumerate(FEAT_NAMES)}, "flight_id": np.arange(n)})
+    return m, Xs, t
+
+def test_parquet_row_groups_in_order(tmp_path):
+    m, X, t = _setup(tmp_path)
+    pq.write_table(t, tmp_path/"in.parquet", row_group_size=700)
+    res = score_file(str(tmp_path/"in.parquet"), str(tmp_path/"out.parquet"), {"registry_dir": str(tmp_path/"reg")},
+                     keep=["flight_id"], workers=0)
+    out = pq.read_table(tmp_path/"out.parquet")
+    assert res["rows"] == len(X) and res["units"] == 8 and out.column_names == ["flight_id", "prob_unstable"]
+    assert (out.column("flight_id").to_numpy() == np.arange(len(X))).all()
+    assert np.allclose(out.column("prob_unstable").to_numpy(), m.score(X), atol=1e-6)
+
+def test_csv_blocks_and_worker_pool(tmp_path):
+    m, X, t = _setup(tmp_path, n=3000)
+    pacsv.write_csv(t, tmp_path/"in.csv")
+    res = score_file(str(tmp_path/"in.csv"), str(tmp_path/"out.parquet"), {"registry_dir": str(tmp_path/"reg"), "version": 1},
+                     keep=["flight_id"], workers=2, csv_block_bytes=64*1024)
+    out = pq.read_table(tmp_path/"out.parquet")
+    assert res["rows"] == len(X) and res["units"] > 1
+    assert (out.column("flight_id").to_numpy() == np.arange(len(X))).all()
+    assert np.allclose(out.column("prob_unstable").to_numpy(), m.score(X), atol=1e-5)
+
+def test_missing_model_and_ensemble_fail_before_the_pool(tmp_path):
+    _, _, t = _setup(tmp_path, n=100)
+    pq.write_table(t, tmp_path/"in.parquet")
+    with pytest.raises(ValueError, match="no active model"):
+        score_file(str(tmp_path/"in.parquet"), str(tmp_path/"out.parquet"), {"registry_dir": str(tmp_path/"empty")}, workers=2)
+    with pytest.raises(ValueError, match="no bootstrap ensemble"):
+        score_file(str(tmp_path/"in.parquet"), str(tmp_path/"out.parquet"), {"registry_dir": str(tmp_path/"reg")},
+                   workers=2, uncertainty=True)
+    assert not (tmp_path/"out.parquet").exists()
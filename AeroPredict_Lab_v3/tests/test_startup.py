@@ -0,0 +1,32 @@
+import importlib, sys, threading, time
+from fastapi.testclient import TestClient
+
+ROW = {"airspeed": 70.0, "altitude": 900.0, "vspeed": -2.0, "pitch": 0.02, "roll": 0.1, "wind_x": 0.0, "wind_y": 0.0}
+
+def _lazy_api(tmp_path, monkeypatch):
+    monkeypatch.setenv("STARTUP_MODE", "lazy")
+    monkeypatch.setenv("REGISTRY_DIR", str(tmp_path / "registry"))
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path / "none.npz"))
+    monkeypatch.setenv("EXPERIMENTS_PATH", str(tmp_path / "experiments.db"))
+    monkeypatch.delenv("DATASET_CACHE_DIR", raising=False)
+    sys.modules.pop("src.api", None)
+    return importlib.import_module("src.api")
+
+def test_lazy_warmup_does_not_block_the_event_loop(tmp_path, monkeypatch):
+    api = _lazy_api(tmp_path, monkeypatch)
+    try:
+        assert api.REGISTRY.loaded is None  # importing did no model work
+        train = api.train_logit
+        monkeypatch.setattr(api, "train_logit", lambda *a, **k: (time.sleep(2.0), train(*a, **k))[1])
+        with TestClient(api.app) as c:  # lifespan starts the warm-up thread (slow bootstrap)
+            res = {}
+            t = threading.Thread(target=lambda: res.setdefault("predict", c.post("/predict", json=ROW)))
+            t.start(); time.sleep(0.3)  # /predict is now waiting for the model
+            t0 = time.perf_counter(); live = c.get("/health/live"); dt = time.perf_counter() - t0
+            assert live.status_code == 200 and dt < 0.5
+            assert c.get("/health/ready").status_code == 503
+            t.join(10)
+            assert res["predict"].status_code == 200 and 0 <= res["predict"].json()["prob_unstable"] <= 1
+            assert c.get("/health/ready").json()["ready"]
+    finally:
+        sys.modules.pop("src.api", None)
@@ -0,0 +1,73 @@
+import pytest
+from src.sweep import expand_space
+
+def test_expand_grid_and_random():
+    grid = expand_space({"lr": [0.01, 0.1], "l2": [1e-4, 1e-3, 1e-2]})
+    assert len(grid) == 6 and {"lr": 0.1, "l2": 1e-2} in grid
+    rnd = expand_space({"lr": {"low": 1e-3, "high": 1e-1, "log": True}, "epochs": {"low": 50, "high": 400, "int": True}},
+                       mode="random", n_trials=10, seed=1)
+    assert len(rnd) == 10 and all(1e-3 <= c["lr"] <= 1e-1 and isinstance(c["epochs"], int) for c in rnd)
+    with pytest.raises(ValueError):
+        expand_space({"momentum": [0.9]})
+
+@pytest.mark.parametrize("space, mode", [
+    ({"lr": {"high": 1}}, "random"), ({"lr": 0.1}, "grid"), ({"lr": []}, "grid"), ({}, "grid"),
+    ({"lr": {"low": 0.1, "high": 0.01}}, "random"), ({"lr": {"low": 0, "high": 1, "log": True}}, "random"),
+    ({"lr": {"low": 0.01, "high": 0.1, "step": 2}}, "random"), ({"lr": ["fast"]}, "grid"), ({"epochs": [0]}, "grid"),
+    ({"solver": ["sgd"]}, "grid"), ({"solver": {"low": 1, "high": 2}}, "random"), ({"lr": {"low": 0.01, "high": 0.1}}, "grid"),
+    ({"lr": [0.1]}, "bayes"),
+])
+def test_bad_spaces_raise_value_error(space, mode):
+    with pytest.raises(ValueError):
+        expand_space(space, mode=mode)
+
+def test_values_are_cast():
+    rnd = expand_space({"epochs": {"low": 50, "high": 400}, "l2": [0, 1]}, mode="random", n_trials=20, seed=3)
+    assert all(isinstance(c["epochs"], int) and isinstance(c["l2"], float) for c in rnd)
+    assert expand_space({"epochs": [100.0, 250.4]}) == [{"epochs": 100}, {"epochs": 250}]
+
+def test_base_only_sets_tunables():
+    from src.sweep import check_base
+    assert check_base({"epochs": 60.0, "solver": "newton"}) == {"epochs": 60, "solver": "newton"}
+    for bad in ({"n_samples": 10**9}, {"k_folds": 1}, {"lr": "x"}, [1]):
+        with pytest.raises(ValueError):
+            check_base(bad)
+
+def test_sweep_endpoint_rejects_bad_requests_with_400(tmp_path, monkeypatch):
+    import importlib, sys
+    from fastapi.testclient import TestClient
+    monkeypatch.setenv("STARTUP_MODE", "lazy")
+    monkeypatch.setenv("REGISTRY_DIR", str(tmp_path / "registry"))
+    monkeypatch.setenv("EXPERIMENTS_PATH", str(tmp_path / "experiments.db"))
+    sys.modules.pop("src.api", None)
+    api = importlib.import_module("src.api")
+    try:
+        c = TestClient(api.app)
+        for body in ({"space": {"lr": {"high": 1}}, "mode": "random"}, {"space": {"lr": 0.1}},
+                     {"space": {"lr": [0.1]}, "base": {"n_samples": 10**8}}):
+            r = c.post("/sweep", json=body)
+            assert r.status_code == 400, body
+    finally:
+        sys.modules.pop("src.api", None)
+
+def _params(**kw):
+    return {"space": {"lr": [0.02, 0.05, 0.1], "l2": [1e-4, 1e-2]}, "n_samples": 2000, "k_folds": 2, "seed": 1,
+            "base": {"epochs": 60}, "publish": False, **kw}
+
+def test_single_worker_runs_inline():
+    from src.datasets import DatasetCache
+    from src.sweep import run_sweep
+    res = run_sweep(_params(), None, DatasetCache(), {}, n_workers=1)
+    assert res["n_configs"] == 6 and res["rungs"][0]["n_configs"] == 6 and res["n_evaluations"] > 6
+    assert 0.5 < res["best"]["auc_roc_mean"] <= 1
+
+def test_cancel_drops_queued_trials():
+    from src.datasets import DatasetCache
+    from src.jobs import JobCancelled
+    from src.sweep import run_sweep
+    logged = []
+    def progress(stage, done, total): raise JobCancelled()
+    with pytest.raises(JobCancelled):
+        run_sweep(_params(base={"epochs": 2000}), None, DatasetCache(), {}, log=lambda *a: logged.append(a),
+                  progress=progress, n_workers=2)
+    assert len(logged) == 1  # the first finished trial; the other five were never waited for
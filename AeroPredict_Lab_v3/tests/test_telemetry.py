@@ -0,0 +1,26 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.telemetry import Telemetry, MetricsMiddleware, Histogram, stage
+
+def test_histogram_exposition_is_cumulative():
+    h = Histogram("x_seconds", "x", ("endpoint",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 3.0): h.observe(("/a",), v)
+    lines = h.render()
+    assert 'x_seconds_bucket{endpoint="/a",le="0.1"} 1' in lines and 'x_seconds_bucket{endpoint="/a",le="1.0"} 3' in lines
+    assert 'x_seconds_bucket{endpoint="/a",le="+Inf"} 4' in lines and 'x_seconds_count{endpoint="/a"} 4' in lines
+
+def test_middleware_labels_route_template_and_stages():
+    app = FastAPI(); t = Telemetry(prefix="t")
+    app.add_middleware(MetricsMiddleware, telemetry=t, routes=app.router.routes)
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        with stage("work"): return {"id": item_id}
+    c = TestClient(app)
+    for i in range(3): c.get(f"/items/{i}")
+    c.get("/items/oops")
+    text = t.render()
+    assert 't_requests_total{endpoint="/items/{item_id}",method="GET",status="200"} 3.0' in text
+    assert 't_requests_total{endpoint="/items/{item_id}",method="GET",status="422"} 1.0' in text
+    for st in ("parse", "work", "serialize"):
+        assert f't_stage_duration_seconds_count{{endpoint="/items/{{item_id}}",stage="{st}"}} 3' in text
+    assert 't_requests_in_flight{endpoint="/items/{item_id}"} 0.0' in text
@@ -0,0 +1,34 @@
+import importlib, sys
+import numpy as np
+from fastapi.testclient import TestClient
+from src.model import synth_dataset
+
+def _api(tmp_path, monkeypatch):
+    monkeypatch.setenv("STARTUP_MODE", "lazy")
+    monkeypatch.setenv("DATA_ROOT", str(tmp_path / "data"))
+    monkeypatch.setenv("REGISTRY_DIR", str(tmp_path / "registry"))
+    monkeypatch.setenv("EXPERIMENTS_PATH", str(tmp_path / "experiments.db"))
+    sys.modules.pop("src.api", None)
+    return importlib.import_module("src.api")
+
+def test_paths_are_confined_to_data_root(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    X, y = synth_dataset(n=3000, seed=2)
+    np.save(tmp_path / "data" / "flights.npy", np.column_stack([X, y]))
+    np.save(tmp_path / "outside.npy", np.column_stack([X, y]))
+    (tmp_path / "data" / "link.npy").symlink_to(tmp_path / "outside.npy")
+    np.save(tmp_path / "data" / "empty.npy", np.zeros((0, 8)))
+    api = _api(tmp_path, monkeypatch)
+    try:
+        c = TestClient(api.app)
+        ok = c.post("/train_ooc", json={"path": "flights.npy", "epochs": 1, "chunk_rows": 1024})
+        assert ok.status_code == 200 and ok.json()["n"] == 3000
+        for path in ("../outside.npy", str(tmp_path / "outside.npy"), "link.npy", "/etc/passwd"):
+            r = c.post("/train_ooc", json={"path": path})
+            assert r.status_code == 400 and "outside the data root" in r.json()["detail"]
+        assert c.post("/train_ooc", json={"path": "flights.npy", "y_path": "../outside.npy"}).status_code == 400
+        r = c.post("/train_ooc", json={"path": "empty.npy"})
+        assert r.status_code == 400 and "empty" in r.json()["detail"]
+        assert c.post("/train_ooc", json={"path": "missing.npy"}).status_code == 400
+    finally:
+        sys.modules.pop("src.api", None)
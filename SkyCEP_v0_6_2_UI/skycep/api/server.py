@@ -74,11 +74,32 @@ def on_alert_cb(alert):
         with contextlib.suppress(Exception):
             q.put_nowait(alert)
 
-ENG = Engine(window_seconds=5.0, on_alert=on_alert_cb)
+ENG = Engine(window_seconds=float(os.environ.get("SKYCEP_WINDOW_SECONDS", "5")), on_alert=on_alert_cb,
+             max_keys=int(os.environ.get("SKYCEP_MAX_KEYS", "100000")),
+             max_delay=float(os.environ.get("SKYCEP_MAX_DELAY", "5")),
+             allowed_lateness=float(os.environ.get("SKYCEP_ALLOWED_LATENESS", "30")),
+             idle_seconds=float(os.environ.get("SKYCEP_SOURCE_IDLE", "60")),
+             max_buffer=int(os.environ.get("SKYCEP_MAX_BUFFER", "1000000")))
+
+# loaded when no rules version is active yet (same alert the engine used to hard-code)
+DEFAULT_RULES = """
+rule demo type hard_landing_risk:
+    y < 20 and vy < -1.2
+    emit alt = y, vy
+"""
+
+def load_active_rules():
+    row = get_active_rules()
+    try:
+        ENG.load_programs(compile_rules(row[1] if row else DEFAULT_RULES))
+    except Exception:
+        ENG.load_programs(compile_rules(DEFAULT_RULES))  # versions stored before the DSL existed may not compile
+load_active_rules()
 
 class Event(BaseModel):
-    ts: float
+    ts: Optional[float] = None  # missing: the source's latest event time
     id: str
+    source: Optional[str] = None  # feed (radar, adsb, ...), each with its own watermark
     data: Dict[str, Any]
 
 @app.get("/health")
@@ -89,13 +110,14 @@ def health():
     con.close()
     return {"status":"ok","rules": len(ENG.programs), "alerts_mem": len(ENG.alerts), "alerts_db": c,
             "active_rules_version": (row[0] if row else None), "active_rules_hash": (row[2] if row else None),
+            **ENG.stats(),
             "version": "0.6.2"}
 
 @app.post("/rules/validate")
 def validate_rules(text: str = Body(..., media_type="text/plain")):
     try:
-        sha = _sha256(text)
-        return {"ok": True, "sha256": sha}
+        progs = compile_rules(text)
+        return {"ok": True, "sha256": _sha256(text), "rules": [{"name": p.name, "type": p.type, "fields": p.fields} for p in progs]}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -105,7 +127,7 @@ def post_rules(text: str = Body(..., media_type="text/plain"), activate: int = 1
         progs = compile_rules(text)
         if activate: ENG.load_programs(progs)
         ver, sha = store_rules(text, active=1 if activate else 0)
-        return {"loaded": len(progs), "version": ver, "active": bool(activate), "sha256": sha}
+        return {"loaded": len(progs), "rules": [p.name for p in progs], "version": ver, "active": bool(activate), "sha256": sha}
     except Exception as e:
         raise HTTPException(400, detail=str(e))
 
@@ -118,13 +140,14 @@ def rule_versions():
 
 @app.post("/ingest")
 def ingest(items: List[Event]):
-    ts0 = items[0].ts if items else time.time()
+    ts0 = next((e.ts for e in items if e.ts is not None), None) or time.time()  # storage partition only
     day = datetime.fromtimestamp(ts0, tz=timezone.utc).strftime("%Y-%m-%d")
     day_dir = os.path.join(RAW_DIR, f"day={day}")
     os.makedirs(day_dir, exist_ok=True)
     rows = []
     for e in items:
         row = {"ts": e.ts, "id": e.id}
+        if e.source: row["source"] = e.source
         for k,v in e.data.items(): row[k] = v
         rows.append(row)
     df = pd.DataFrame(rows)
@@ -135,9 +158,18 @@ def ingest(items: List[Event]):
             writer.write_table(table)
     else:
         pq.write_table(table, file_path)
-    ENG.ingest([e.model_dump() for e in items])
+    ENG.ingest_table(table)  # rules run on the same columnar table, no per-event dicts
     return {"stored": len(items), "raw_partition": f"day={day}"}
 
+@app.post("/ingest/flush")
+def ingest_flush():
+    # end of a replay: evaluate the events still waiting for the watermark
+    return {"alerts": len(ENG.flush())}
+
+@app.get("/ingest/dropped")
+def ingest_dropped(n: int = 100):
+    return list(ENG.time.dropped)[-n:][::-1]
+
 @app.get("/alerts")
 def alerts(n: int = 50, day: Optional[str]=None, start_ts: Optional[float]=None, end_ts: Optional[float]=None):
     con = sqlite3.connect(DB_PATH)
@@ -1,2 +1,265 @@
 from __future__ import annotations
-# placeholder DSL
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+# SkyCEP rule language. A ruleset is a sequence of rules:
+#
+#   # comments run to the end of the line
+#   rule hard_landing_risk:
+#       y < 20 and vy < -1.2
+#       emit alt = y, vy
+#
+#   rule bank_limit type attitude: abs(roll) > 0.6 or id in ("TEST1", "TEST2")
+#
+#   rule sink_rate: avg(vy, 5s) < -2 and max(abs(roll), 10s, tumbling) > 0.6
+#
+#   rule engine_out_descent: seq(eng == 0, not eng == 1, vy < -3) within 20s
+#
+# `type` sets the alert type (default: the rule name) and `emit` the payload fields (default:
+# every field the condition reads). Expressions have and/or/not, comparisons, + - * /, `in (...)`,
+# numbers, "strings" (escapes in ESCAPES), true/false, event fields by name and the scalar functions in FUNCTIONS.
+# Durations (500ms, 5s, 2m, 1h) are numbers of seconds. Aggregates (AGGREGATES) take an
+# expression, an optional window length (default: the engine's window_seconds) and an optional
+# window kind, sliding (default) or tumbling; they are evaluated per event id over event time.
+# seq(step, ..., step) within length is true on the event that completes the steps in order for
+# its id, the first and last no more than `length` apart (default: window_seconds). A `not` step
+# forbids matching events between its neighbours; write `(not x)` for a positive step on not x.
+# The parser is hand-written recursive descent and produces plain hashable tuples:
+#   ("num", 1.0) ("str", "A") ("bool", True) ("field", "vy") ("neg", e) ("not", e)
+#   ("cmp", op, a, b) ("arith", op, a, b) ("and", a, b, ...) ("or", a, b, ...)
+#   ("in", e, (v, ...)) ("call", name, a, ...) ("agg", fn, kind, seconds or None, e)
+#   ("seq", seconds or None, (negated, ...), step, ...)
+
+FUNCTIONS = {"abs": 1, "sqrt": 1, "hypot": 2, "is_null": 1}
+AGGREGATES = ("avg", "sum", "min", "max", "count")
+WINDOW_KINDS = ("sliding", "tumbling")
+UNITS = {"ms": 0.001, "s": 1.0, "min": 60.0, "m": 60.0, "h": 3600.0}
+KEYWORDS = {"rule", "type", "emit", "and", "or", "not", "in", "true", "false", "seq", "within"}
+
+class DSLError(ValueError):
+    def __init__(self, msg: str, line: int = 0, col: int = 0):
+        super().__init__(f"line {line}, col {col}: {msg}" if line else msg)
+        self.line = line; self.col = col
+
+class Token(NamedTuple):
+    kind: str   # num, dur, str, name, kw, op, eof
+    value: object
+    line: int
+    col: int
+
+class Rule(NamedTuple):
+    name: str
+    type: str
+    when: tuple
+    emit: Tuple[Tuple[str, tuple], ...]  # (payload key, expression); empty = fields of `when`
+    line: int
+
+_TOKEN = re.compile(r"""
+    (?P<ws>[ \t\r]+) | (?P<nl>\n) | (?P<comment>\#[^\n]*)
+  | (?P<dur>(?:\d+\.\d*|\.\d+|\d+)(?:ms|min|s|m|h)\b)
+  | (?P<num>\d+\.\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?|\d+(?:[eE][+-]?\d+)?)
+  | (?P<str>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op><=|>=|==|!=|<>|[<>=(),:+\-*/])
+""", re.VERBOSE)
+
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", "\\": "\\", '"': '"', "'": "'"}
+
+def _unescape(body: str, line: int, col: int) -> str:
+    # only the escapes in ESCAPES; every other character, ASCII or not, is taken as written
+    def sub(m):
+        if m.group(1) not in ESCAPES: raise DSLError(f"unknown escape \\{m.group(1)} in string", line, col + m.start() + 1)
+        return ESCAPES[m.group(1)]
+    return re.sub(r"\\(.)", sub, body)
+
+def tokenize(text: str) -> List[Token]:
+    out: List[Token] = []; pos = 0; line = 1; line_start = 0
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None: raise DSLError(f"unexpected character {text[pos]!r}", line, pos - line_start + 1)
+        kind = m.lastgroup; val = m.group(); col = pos - line_start + 1; pos = m.end()
+        if kind == "nl": line += 1; line_start = pos; continue
+        if kind in ("ws", "comment"): continue
+        if kind == "num": out.append(Token("num", float(val), line, col))
+        elif kind == "dur":
+            unit = val.lstrip("0123456789.")
+            out.append(Token("dur", float(val[:-len(unit)])*UNITS[unit], line, col))
+        elif kind == "str": out.append(Token("str", _unescape(val[1:-1], line, col), line, col))
+        elif kind == "name" and val.lower() in KEYWORDS: out.append(Token("kw", val.lower(), line, col))
+        elif kind == "name": out.append(Token("name", val, line, col))
+        else: out.append(Token("op", "!=" if val == "<>" else val, line, col))
+    out.append(Token("eof", None, line, pos - line_start + 1))
+    return out
+
+class Parser:
+    def __init__(self, text: str):
+        self.toks = tokenize(text); self.i = 0
+
+    @property
+    def tok(self) -> Token:
+        return self.toks[self.i]
+
+    def _error(self, msg: str, tok: Optional[Token] = None):
+        tok = tok or self.tok
+        got = "end of input" if tok.kind == "eof" else repr(tok.value)
+        raise DSLError(f"{msg}, got {got}", tok.line, tok.col)
+
+    def _accept(self, kind: str, value=None) -> Optional[Token]:
+        t = self.tok
+        if t.kind == kind and (value is None or t.value == value):
+            self.i += 1; return t
+        return None
+
+    def _expect(self, kind: str, value=None, what: str = "") -> Token:
+        t = self._accept(kind, value)
+        if t is None: self._error(f"expected {what or value or kind}")
+        return t
+
+    def ruleset(self) -> List[Rule]:
+        rules: List[Rule] = []; seen = set()
+        while self.tok.kind != "eof":
+            r = self.rule()
+            if r.name in seen: raise DSLError(f"duplicate rule name {r.name!r}", r.line, 1)
+            seen.add(r.name); rules.append(r)
+        return rules
+
+    def rule(self) -> Rule:
+        start = self._expect("kw", "rule", "'rule'")
+        name = self._expect("name", what="rule name").value
+        rtype = self._expect("name", what="alert type").value if self._accept("kw", "type") else name
+        self._expect("op", ":", "':'")
+        when = self.expr()
+        emit: List[Tuple[str, tuple]] = []
+        if self._accept("kw", "emit"):
+            while True:
+                t = self._expect("name", what="payload field")
+                emit.append((t.value, self.expr() if self._accept("op", "=") else ("field", t.value)))
+                if not self._accept("op", ","): break
+        if self.tok.kind != "eof" and not (self.tok.kind == "kw" and self.tok.value == "rule"):
+            self._error("expected 'emit', 'rule' or end of input")
+        return Rule(name, rtype, when, tuple(emit), start.line)
+
+    # precedence: or < and < not < comparison/in < + - < * / < unary minus < atom
+    def expr(self) -> tuple:
+        args = [self.conj()]
+        while self._accept("kw", "or"): args.append(self.conj())
+        return args[0] if len(args) == 1 else ("or", *args)
+
+    def conj(self) -> tuple:
+        args = [self.neg()]
+        while self._accept("kw", "and"): args.append(self.neg())
+        return args[0] if len(args) == 1 else ("and", *args)
+
+    def neg(self) -> tuple:
+        if self._accept("kw", "not"): return ("not", self.neg())
+        return self.comparison()
+
+    def comparison(self) -> tuple:
+        left = self.additive()
+        t = self.tok
+        if t.kind == "op" and t.value in ("<", "<=", ">", ">=", "==", "!="):
+            self.i += 1; return ("cmp", t.value, left, self.additive())
+        negate = self.tok.kind == "kw" and self.tok.value == "not" and self.toks[self.i+1].value == "in"
+        if negate: self.i += 1
+        if self._accept("kw", "in"):
+            self._expect("op", "(", "'('")
+            vals = [self.literal()]
+            while self._accept("op", ","): vals.append(self.literal())
+            self._expect("op", ")", "')'")
+            node = ("in", left, tuple(vals))
+            return ("not", node) if negate else node
+        return left
+
+    def literal(self) -> tuple:
+        sign = -1.0 if self._accept("op", "-") else 1.0
+        t = self.tok
+        if self._accept("num") or self._accept("dur"): return ("num", sign*t.value)
+        if sign < 0: self._error("expected a number")
+        if self._accept("str"): return ("str", t.value)
+        if t.kind == "kw" and t.value in ("true", "false"): self.i += 1; return ("bool", t.value == "true")
+        self._error("expected a literal")
+
+    def additive(self) -> tuple:
+        node = self.term()
+        while self.tok.kind == "op" and self.tok.value in ("+", "-"):
+            op = self.tok.value; self.i += 1; node = ("arith", op, node, self.term())
+        return node
+
+    def term(self) -> tuple:
+        node = self.unary()
+        while self.tok.kind == "op" and self.tok.value in ("*", "/"):
+            op = self.tok.value; self.i += 1; node = ("arith", op, node, self.unary())
+        return node
+
+    def unary(self) -> tuple:
+        if self._accept("op", "-"):
+            node = self.unary()
+            return ("num", -node[1]) if node[0] == "num" else ("neg", node)
+        return self.atom()
+
+    def atom(self) -> tuple:
+        t = self.tok
+        if self._accept("op", "("):
+            node = self.expr(); self._expect("op", ")", "')'"); return node
+        if self._accept("kw", "seq"): return self.sequence(t)
+        if t.kind in ("num", "dur", "str") or (t.kind == "kw" and t.value in ("true", "false")): return self.literal()
+        if self._accept("name"):
+            if not self._accept("op", "("): return ("field", t.value)
+            fn = t.value.lower()
+            if fn in AGGREGATES: return self.aggregate(fn, t)
+            if fn not in FUNCTIONS: raise DSLError(f"unknown function {t.value!r}", t.line, t.col)
+            args = [] if self.tok.kind == "op" and self.tok.value == ")" else [self.expr()]
+            while self._accept("op", ","): args.append(self.expr())
+            self._expect("op", ")", "')'")
+            if len(args) != FUNCTIONS[fn]: raise DSLError(f"{fn}() takes {FUNCTIONS[fn]} argument(s), got {len(args)}", t.line, t.col)
+            return ("call", fn, *args)
+        self._error("expected an expression")
+
+    def _length(self, what: str) -> float:
+        w = self.tok
+        if not (self._accept("dur") or self._accept("num")): self._error(f"expected {what} like 5s")
+        if not w.value > 0: raise DSLError(f"{what} must be positive", w.line, w.col)
+        return float(w.value)
+
+    def sequence(self, t: Token) -> tuple:
+        # seq(['not'] expr, ...) ['within' length], after 'seq'
+        self._expect("op", "(", "'('")
+        negs: List[bool] = []; steps: List[tuple] = []
+        while True:
+            negs.append(self._accept("kw", "not") is not None); steps.append(self.expr())
+            if not self._accept("op", ","): break
+        self._expect("op", ")", "',' or ')'")
+        seconds = self._length("within length") if self._accept("kw", "within") else None
+        if negs[0] or negs[-1]: raise DSLError("seq() must start and end with a positive step", t.line, t.col)
+        if negs.count(False) < 2: raise DSLError("seq() needs at least two positive steps", t.line, t.col)
+        return ("seq", seconds, tuple(negs), *steps)
+
+    def aggregate(self, fn: str, t: Token) -> tuple:
+        # fn(expr [, length [, sliding|tumbling]]) after the '('; count(length) counts events
+        seconds = None; kind = "sliding"
+        if fn == "count" and self.tok.kind == "dur" and self.toks[self.i+1].value in (",", ")"): arg = ("bool", True)
+        else:
+            arg = self.expr()
+            if not self._accept("op", ","): self._expect("op", ")", "',' or ')'"); return ("agg", fn, kind, seconds, arg)
+        seconds = self._length("window length")
+        if self._accept("op", ","):
+            k = self._expect("name", what="sliding or tumbling")
+            if k.value.lower() not in WINDOW_KINDS: raise DSLError(f"unknown window kind {k.value!r}", k.line, k.col)
+            kind = k.value.lower()
+        self._expect("op", ")", "')'")
+        return ("agg", fn, kind, seconds, arg)
+
+def parse(text: str) -> List[Rule]:
+    return Parser(text).ruleset()
+
+def fields(node: tuple) -> List[str]:
+    # event fields an expression reads, in first-use order
+    out: List[str] = []
+    def walk(n):
+        if n[0] == "field":
+            if n[1] not in out: out.append(n[1])
+            return
+        for a in n[1:]:
+            if isinstance(a, tuple) and a and isinstance(a[0], str): walk(a)
+    walk(node)
+    return out
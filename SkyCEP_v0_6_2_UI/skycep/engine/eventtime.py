@@ -0,0 +1,110 @@
+from __future__ import annotations
+import math
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from skycep.engine.ruleset import Batch
+
+# Event-time ordering in front of the stateful operators (windows, seq patterns). Each source
+# (radar, ADS-B, ...) has a watermark: the latest event time it has sent minus max_delay, the
+# out-of-orderness it is allowed. The engine watermark is the smallest source watermark, sources
+# idle for idle_seconds of event time behind the newest one excluded so they cannot stall it.
+# Events wait in a reorder buffer until the watermark passes them, then leave in (ts, arrival)
+# order, so windows and patterns see each id in time order and their results do not depend on
+# how arrivals were interleaved within max_delay. Batching does not matter either: the
+# operators advance event by event.
+# An event older than the released frontier is late. Up to allowed_lateness it is still
+# evaluated, with its alerts marked late (windows and patterns see it at its id's current
+# time, they never rewind), beyond that it is dropped. Both are counted per source and the
+# most recent drops are kept in `dropped`. An event without ts takes its source's latest event
+# time; with none yet it is dropped as untimed. max_buffer bounds the buffer: past it, the
+# oldest events are released early and the watermark jumps to them.
+
+def _finite(x: float) -> Optional[float]:
+    return x if math.isfinite(x) else None  # JSON has no infinities
+
+class EventTime:
+    def __init__(self, max_delay: float = 0.0, allowed_lateness: float = math.inf, idle_seconds: float = 60.0,
+                 max_buffer: int = 1000000, keep_dropped: int = 1000):
+        if max_delay < 0 or allowed_lateness < 0: raise ValueError("max_delay and allowed_lateness must be >= 0")
+        self.max_delay = float(max_delay); self.allowed_lateness = float(allowed_lateness)
+        self.idle_seconds = float(idle_seconds); self.max_buffer = int(max_buffer)
+        self.sources: Dict[Any, float] = {}         # source -> latest event time seen
+        self.watermark = -math.inf                   # events at or before it have been released
+        self.pending: Optional[Batch] = None; self._seq = np.empty(0, dtype=np.int64); self._next = 0
+        self.dropped = deque(maxlen=keep_dropped)
+        self.counts: Dict[str, Dict[Any, int]] = {"late": {}, "dropped": {}, "untimed": {}}
+        self.forced = 0
+
+    def _count(self, what: str, sources: np.ndarray):
+        if not len(sources): return
+        c = self.counts[what]
+        for s, k in zip(*np.unique(sources.astype(str), return_counts=True)): c[str(s)] = c.get(str(s), 0) + int(k)
+
+    def _stamp(self, batch: Batch) -> Batch:
+        # latest event time per source, then missing ts -> that time
+        timed = ~np.isnan(batch.ts)
+        for s in set(batch.sources.tolist()):
+            m = batch.sources == s; t = batch.ts[m & timed]
+            if len(t): self.sources[s] = max(self.sources.get(s, -math.inf), float(t.max()))
+            if not timed[m].all() and s in self.sources:
+                if not batch.ts.flags.writeable: batch.ts = batch.ts.copy()
+                batch.ts[m & ~timed] = self.sources[s]
+        untimed = np.isnan(batch.ts)
+        if untimed.any():
+            self._count("untimed", batch.sources[untimed]); self._drop(batch, untimed, "untimed")
+            batch = batch.take(~untimed)
+        return batch
+
+    def _drop(self, batch: Batch, mask: np.ndarray, why: str):
+        for i in np.flatnonzero(mask)[-self.dropped.maxlen:]:
+            self.dropped.append({"ts": None if batch.ts[i] != batch.ts[i] else float(batch.ts[i]), "id": batch.ids[i],
+                                 "source": batch.sources[i], "reason": why, "watermark": _finite(self.watermark)})
+
+    def _advance(self):
+        if not self.sources: return
+        newest = max(self.sources.values())
+        live = [t for t in self.sources.values() if t >= newest - self.idle_seconds]
+        self.watermark = max(self.watermark, min(live) - self.max_delay)
+
+    def push(self, batch: Batch, hold: bool = True) -> Tuple[Optional[Batch], Optional[Batch]]:
+        # -> (late events still evaluated, events released in order); hold=False releases everything
+        # (no stateful operator is loaded, so order does not matter)
+        batch = self._stamp(batch)
+        late = batch.ts < self.watermark if hold else np.zeros(batch.n, dtype=bool)
+        accepted = None
+        if late.any():
+            keep = late & (batch.ts >= self.watermark - self.allowed_lateness)
+            self._count("late", batch.sources[keep]); self._count("dropped", batch.sources[late & ~keep])
+            self._drop(batch, late & ~keep, "late")
+            if keep.any(): accepted = batch.take(np.flatnonzero(keep)[np.argsort(batch.ts[keep], kind="stable")])
+            batch = batch.take(~late)
+        seq = np.arange(self._next, self._next + batch.n); self._next += batch.n
+        if self.pending is not None and self.pending.n:
+            batch = Batch.concat([self.pending, batch]); seq = np.r_[self._seq, seq]
+        self._advance()
+        if not hold: ready = np.ones(batch.n, dtype=bool)
+        else:
+            ready = batch.ts <= self.watermark
+            over = batch.n - int(ready.sum()) - self.max_buffer
+            if over > 0:  # buffer full: the oldest waiting events go now
+                t = np.sort(batch.ts[~ready])[over-1]
+                self.watermark = max(self.watermark, t); ready = batch.ts <= self.watermark; self.forced += 1
+        idx = np.flatnonzero(ready)
+        idx = idx[np.lexsort((seq[idx], batch.ts[idx]))]
+        rest = np.flatnonzero(~ready)
+        self.pending = batch.take(rest) if len(rest) else None; self._seq = seq[rest]
+        return accepted, (batch.take(idx) if len(idx) else None)
+
+    def flush(self) -> Optional[Batch]:
+        # end of stream: release whatever is buffered, in order
+        if self.pending is None: return None
+        b = self.pending; order = np.lexsort((self._seq, b.ts))
+        self.pending = None; self._seq = self._seq[:0]
+        if b.n: self.watermark = max(self.watermark, float(b.ts.max()))
+        return b.take(order)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"watermark": _finite(self.watermark), "max_delay": self.max_delay,
+                "allowed_lateness": _finite(self.allowed_lateness), "buffered": 0 if self.pending is None else self.pending.n,
+                "forced_releases": self.forced, "sources": dict(self.sources), **{k: dict(v) for k, v in self.counts.items()}}
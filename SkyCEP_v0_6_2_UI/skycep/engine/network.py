@@ -0,0 +1,159 @@
+from __future__ import annotations
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from skycep.engine.dsl import DSLError
+from skycep.engine.ruleset import Batch, RuleProgram, apply, children, truth
+from skycep.engine.windows import WindowStore
+from skycep.engine.patterns import PatternStore
+
+# Shared evaluation network (the alpha/beta memory idea of Rete, for batches). Every rule's
+# condition and payload expressions are put in canonical form and interned: identical
+# predicates and sub-expressions across all loaded rules become one node. Per ingest batch each
+# node is evaluated at most once, on demand and memoized, so the work scales with the number of
+# distinct nodes rather than rules; a rule root is just the and/or of already computed masks.
+# Payload nodes are only computed when some rule using them matched. Aggregate and seq nodes
+# are the exception: they carry per-key state (windows.py, patterns.py), so every one of them is
+# advanced with every batch. Aggregates over the same (kind, length, argument) share one
+# WindowStore whatever function they read from it; each distinct seq node owns a PatternStore.
+
+_MIRROR = {"<": ">", "<=": ">=", ">": "<", ">=": "<=", "==": "==", "!=": "!="}
+_LITERALS = ("num", "str", "bool")
+
+def _boolean(node: tuple) -> bool:
+    # nodes whose value already is a truth mask
+    return node[0] in ("cmp", "in", "not", "and", "or", "seq", "bool") or node[0] == "call" and node[1] == "is_null"
+
+def canon(node: tuple, window: Optional[float] = None, boolean: bool = False) -> tuple:
+    # canonical form so that equivalent spellings intern to the same node:
+    # and/or flattened, deduplicated and sorted; literal-first comparisons mirrored
+    # (20 > y -> y < 20); commutative + and * operands sorted; `in` values sorted; not not x -> x;
+    # aggregates and seq without a length get `window`. boolean: the node is read as a condition
+    # (rule root, and/or/not operand, seq step); elsewhere `not not y` and `y and y` still turn
+    # y into true/false, so they only collapse to not not y there
+    op = node[0]
+    if op == "agg":
+        if node[3] is None and window is None: raise DSLError(f"{node[1]}() needs a window length")
+        return ("agg", node[1], node[2], float(node[3] if node[3] is not None else window), canon(node[4], window))
+    if op == "seq":
+        if node[1] is None and window is None: raise DSLError("seq() needs a within length")
+        return ("seq", float(node[1] if node[1] is not None else window), node[2], *(canon(c, window, True) for c in node[3:]))
+    if op in _LITERALS or op == "field": return node
+    as_bool = lambda a: a if boolean or _boolean(a) else ("not", ("not", a))
+    if op in ("and", "or"):
+        args = []
+        for a in (canon(c, window, True) for c in node[1:]):
+            args.extend(a[1:] if a[0] == op else (a,))
+        args = sorted(set(args), key=repr)
+        return as_bool(args[0]) if len(args) == 1 else (op, *args)
+    if op == "not":
+        a = canon(node[1], window, True)
+        return as_bool(a[1]) if a[0] == "not" else ("not", a)
+    if op == "neg": return ("neg", canon(node[1], window))
+    if op == "cmp":
+        a, b = canon(node[2], window), canon(node[3], window)
+        if a[0] in _LITERALS and b[0] not in _LITERALS: return ("cmp", _MIRROR[node[1]], b, a)
+        return ("cmp", node[1], a, b)
+    if op == "arith":
+        a, b = canon(node[2], window), canon(node[3], window)
+        if node[1] in ("+", "*") and repr(b) < repr(a): a, b = b, a
+        return ("arith", node[1], a, b)
+    if op == "in": return ("in", canon(node[1], window), tuple(sorted(set(node[2]), key=repr)))
+    if op == "call": return ("call", node[1], *(canon(c, window) for c in node[2:]))
+    return node
+
+class Network:
+    # window_seconds: length of aggregates and seq written without one; windows/patterns: the
+    # previous network's stores, kept when the reloaded rules still use the same window or pattern
+    def __init__(self, programs: Sequence[RuleProgram], window_seconds: Optional[float] = None,
+                 max_keys: int = 100000, windows: Optional[Dict[tuple, WindowStore]] = None,
+                 patterns: Optional[Dict[tuple, PatternStore]] = None):
+        self.window_seconds = window_seconds
+        self.nodes: List[tuple] = []       # canonical expression per node id
+        self.kids: List[List[int]] = []    # child node ids
+        self.parents: List[int] = []       # how many rules/nodes reference the node
+        self._ids: Dict[tuple, int] = {}
+        self.roots = [self.add(p.when, boolean=True) for p in programs]
+        self.emits = [[self.add(e) for _, e in p.emit] for p in programs]
+        self.aggs = [i for i, n in enumerate(self.nodes) if n[0] == "agg"]
+        fns: Dict[tuple, set] = {}
+        for i in self.aggs: fns.setdefault(self._spec(i), set()).add(self.nodes[i][1])
+        old = windows or {}
+        self.windows = {spec: old[spec] if spec in old and f <= old[spec].fns else WindowStore(spec[0], spec[1], f, max_keys)
+                        for spec, f in fns.items()}
+        self.seqs = [i for i, n in enumerate(self.nodes) if n[0] == "seq"]
+        old = patterns or {}
+        self.patterns = {self.nodes[i]: old.get(self.nodes[i]) or PatternStore(self.nodes[i][2], self.nodes[i][1], max_keys)
+                         for i in self.seqs}
+
+    def _spec(self, i: int) -> tuple:
+        n = self.nodes[i]
+        return (n[2], n[3], n[4])  # kind, seconds, argument
+
+    def add(self, node: tuple, boolean: bool = False) -> int:
+        return self._intern(canon(node, self.window_seconds, boolean))
+
+    def _intern(self, node: tuple) -> int:
+        i = self._ids.get(node)
+        if i is None:
+            kids = [self._intern(c) for c in children(node)]
+            i = self._ids[node] = len(self.nodes)
+            self.nodes.append(node); self.kids.append(kids); self.parents.append(0)
+        self.parents[i] += 1
+        return i
+
+    def run(self, batch: Batch) -> "NetworkRun":
+        run = NetworkRun(self, batch)
+        for i in self.aggs + self.seqs: run.value(i)  # state advances whether or not anything reads it
+        return run
+
+    def stats(self) -> Dict[str, Any]:
+        # unshared_nodes: what evaluating every rule tree on its own would cost per batch
+        preds = [i for i, n in enumerate(self.nodes) if n[0] in ("cmp", "in") or n[0] == "call" and n[1] == "is_null"]
+        size = lambda i: 1 + sum(size(k) for k in self.kids[i])
+        return {"rules": len(self.roots), "nodes": len(self.nodes), "predicates": len(preds),
+                "shared_nodes": sum(1 for p in self.parents if p > 1),
+                "shared_predicates": sum(1 for i in preds if self.parents[i] > 1),
+                "unshared_nodes": sum(size(r) for r in self.roots) + sum(size(e) for es in self.emits for e in es),
+                "aggregates": len(self.aggs), "windows": [w.stats() for w in self.windows.values()],
+                "patterns": [p.stats() for p in self.patterns.values()]}
+
+_UNSET = object()
+
+class NetworkRun:
+    # memoized evaluation of one network over one batch
+    def __init__(self, net: Network, batch: Batch):
+        self.net = net; self.batch = batch; self.vals: List[Any] = [_UNSET]*len(net.nodes); self.evaluated = 0
+        self._windows: Dict[tuple, Dict[str, np.ndarray]] = {}
+
+    def value(self, i: int):
+        v = self.vals[i]
+        if v is _UNSET:
+            # children first, iteratively, so deep rule trees do not hit the recursion limit
+            stack = [i]
+            while stack:
+                j = stack[-1]
+                todo = [k for k in self.net.kids[j] if self.vals[k] is _UNSET]
+                if todo: stack.extend(todo); continue
+                stack.pop()
+                if self.vals[j] is _UNSET:
+                    node = self.net.nodes[j]; args = [self.vals[k] for k in self.net.kids[j]]
+                    if node[0] == "agg": self.vals[j] = self._aggregate(j, args[0])
+                    elif node[0] == "seq": self.vals[j] = self.net.patterns[node].update(self.batch.ids, self.batch.ts, args)
+                    else: self.vals[j] = apply(node, args, self.batch)
+                    self.evaluated += 1
+            v = self.vals[i]
+        return v
+
+    def _aggregate(self, i: int, arg):
+        # one pass of the batch through the node's WindowStore, shared by every function over it
+        spec = self.net._spec(i); out = self._windows.get(spec)
+        if out is None:
+            b = self.batch
+            out = self._windows[spec] = self.net.windows[spec].update(b.ids, b.ts, arg)
+        return out[self.net.nodes[i][1]]
+
+    def mask(self, rule: int) -> np.ndarray:
+        return truth(self.value(self.net.roots[rule]), self.batch.n)
+
+    def payload(self, rule: int) -> list:
+        return [self.value(i) for i in self.net.emits[rule]]
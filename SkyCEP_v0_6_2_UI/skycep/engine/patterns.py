@@ -0,0 +1,75 @@
+from __future__ import annotations
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from skycep.engine.ruleset import truth
+
+# Sequence patterns: seq(engine_out, not recovered, vy < -3) within 20s. Each pattern is an NFA
+# over the positive steps, run per event id: state j means steps 0..j-1 have matched and the
+# next event matching step j moves on (the partial match also stays, so a later event can
+# take its place: skip-till-any-match). Negated steps attached to state j kill its partial
+# matches when an event matches them. Partial matches in the same state differ only in their
+# start time and face the same future, so each state keeps just the latest start: a key holds
+# at most len(steps)-1 partial matches and an event costs O(those), with no per-match lists.
+# A partial match older than `within` is dropped when touched; keys with nothing left are
+# evicted, idle keys go once every start has expired and max_keys caps the rest (LRU).
+# A completed match emits once, on the event that completed it, and is consumed.
+
+class PatternStore:
+    # one compiled seq node: negs[i] tells whether steps[i] is a `not` step
+    def __init__(self, negs: Sequence[bool], within: float, max_keys: int = 100000):
+        if not within > 0: raise ValueError("within must be positive")
+        self.within = float(within); self.max_keys = max_keys
+        self.pos: List[int] = []                 # step index of each positive step
+        self.guards: List[List[int]] = []        # per NFA state: negated steps that kill it
+        pending: List[int] = []
+        for i, neg in enumerate(negs):
+            if neg: pending.append(i); continue
+            self.pos.append(i); self.guards.append(pending); pending = []
+        self.keys: "OrderedDict[Any, List[Optional[float]]]" = OrderedDict()  # id -> latest start per state
+        self.clock = -math.inf; self.matches = 0; self.evicted = 0
+
+    def update(self, ids: Sequence[Any], ts: np.ndarray, steps: Sequence[Any]) -> np.ndarray:
+        # steps: per-step values over the batch (as evaluated by the network); returns the mask of
+        # events that complete a match
+        n = len(ts); out = np.zeros(n, dtype=bool)
+        M = np.column_stack([truth(s, n) for s in steps]) if n else np.zeros((0, len(steps)), dtype=bool)
+        rows = np.flatnonzero(M.any(axis=1))  # an event no step matches changes no state
+        pos = self.pos; guards = self.guards; last = len(pos) - 1; within = self.within; keys = self.keys
+        for r, k, t, hit in zip(rows.tolist(), ids[rows], ts[rows].tolist(), M[rows].tolist()):
+            st = keys.get(k)
+            if st is None:
+                if not hit[pos[0]]: continue
+                st = keys[k] = [None]*len(pos)
+            else: keys.move_to_end(k)
+            edge = t - within
+            # last state first, so one event advances a partial match by a single step
+            for j in range(last, 0, -1):
+                s = st[j]
+                if s is None: continue
+                if s < edge: st[j] = None; continue
+                if hit[pos[j]]:
+                    if j == last: out[r] = True; self.matches += 1; st[j] = None; continue
+                    if st[j+1] is None or st[j+1] < s: st[j+1] = s
+                for g in guards[j]:
+                    if hit[g]: st[j] = None; break
+            if hit[pos[0]]:
+                if last == 0: out[r] = True; self.matches += 1
+                else: st[1] = t if st[1] is None or st[1] < t else st[1]
+            if all(s is None for s in st): del keys[k]
+        if n: self.clock = max(self.clock, float(np.max(ts)))
+        self.evict()
+        return out
+
+    def evict(self):
+        edge = self.clock - self.within; keys = self.keys
+        while keys:
+            k, st = next(iter(keys.items()))
+            if max(s for s in st if s is not None) >= edge and len(keys) <= self.max_keys: break
+            keys.popitem(last=False); self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"within": self.within, "steps": len(self.pos), "keys": len(self.keys),
+                "partial_matches": sum(s is not None for st in self.keys.values() for s in st[1:]),
+                "matches": self.matches, "evicted": self.evicted}
@@ -1,4 +1,214 @@
 from __future__ import annotations
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from skycep.engine.dsl import Rule, DSLError, parse, fields
 
-def compile_rules(text:str):
-    return []
+# Rule text -> columnar programs. An ingest batch is turned into one array per referenced field
+# (float64 with NaN for missing values, object arrays for strings) and every rule evaluates its
+# condition over the whole batch with NumPy, producing a boolean mask. Per-event Python work is
+# left for the rows that actually match, when their alert payload is built.
+
+DEFAULT_SOURCE = "default"
+_RESERVED = ("ts", "id", "source")
+
+class Batch:
+    # columnar view of an ingest batch: ts, id, source and the requested data fields. A missing
+    # ts stays NaN here: event time is assigned by eventtime.EventTime, never from the wall clock.
+    def __init__(self, ts: np.ndarray, ids: np.ndarray, columns: Dict[str, np.ndarray], sources: Optional[np.ndarray] = None):
+        self.ts = ts; self.ids = ids; self.columns = columns; self.n = len(ts)
+        self.sources = sources if sources is not None else np.full(self.n, DEFAULT_SOURCE, dtype=object)
+
+    def get(self, name: str) -> np.ndarray:
+        col = self.columns.get(name)
+        if col is None:
+            col = self.columns[name] = (self.ts if name == "ts" else self.ids if name == "id" else self.sources if name == "source"
+                                        else np.full(self.n, np.nan))
+        return col
+
+    @staticmethod
+    def _column(values: Sequence[Any]) -> np.ndarray:
+        try:
+            return np.array(values, dtype=float)  # None -> NaN, bool -> 0/1
+        except (TypeError, ValueError):
+            return np.array(values, dtype=object)
+
+    @classmethod
+    def from_events(cls, events: Sequence[Dict[str, Any]], names: Iterable[str]) -> "Batch":
+        # events: [{"ts", "id", "source", "data": {...}}] as POST /ingest receives them
+        ts = np.array([e.get("ts") if e.get("ts") is not None else np.nan for e in events], dtype=float)
+        ids = np.array([e.get("id", "UNK") for e in events], dtype=object)
+        datas = [e.get("data") or {} for e in events]
+        src = np.array([e.get("source") or d.get("source") or DEFAULT_SOURCE for e, d in zip(events, datas)], dtype=object)
+        cols = {f: cls._column([d.get(f) for d in datas]) for f in names if f not in _RESERVED}
+        return cls(ts, ids, cols, src)
+
+    @classmethod
+    def from_arrow(cls, table, names: Iterable[str]) -> "Batch":
+        # flat Arrow table (ts, id, optional source, data fields as columns), e.g. the one /ingest writes to Parquet
+        import pyarrow as pa, pyarrow.compute as pc
+        ts = (pc.cast(table.column("ts"), pa.float64()).to_numpy(zero_copy_only=False) if "ts" in table.column_names
+              else np.full(table.num_rows, np.nan))
+        ids = (table.column("id").to_numpy(zero_copy_only=False).astype(object, copy=False) if "id" in table.column_names
+               else np.full(table.num_rows, "UNK", dtype=object))
+        src = (np.array([s or DEFAULT_SOURCE for s in table.column("source").to_pylist()], dtype=object)
+               if "source" in table.column_names else None)
+        cols = {}
+        for f in names:
+            if f in _RESERVED or f not in table.column_names: continue
+            col = table.column(f)
+            if pa.types.is_boolean(col.type) or pa.types.is_integer(col.type) or pa.types.is_floating(col.type):
+                cols[f] = pc.cast(col, pa.float64()).to_numpy(zero_copy_only=False)
+            else:
+                cols[f] = cls._column(col.to_pylist())
+        return cls(ts, ids, cols, src)
+
+    def take(self, idx: np.ndarray) -> "Batch":
+        return Batch(self.ts[idx], self.ids[idx], {k: v[idx] for k, v in self.columns.items()}, self.sources[idx])
+
+    @staticmethod
+    def concat(batches: Sequence["Batch"]) -> "Batch":
+        # a field missing from some batches is missing (NaN/None) on their rows
+        if len(batches) == 1: return batches[0]
+        names = list(dict.fromkeys(k for b in batches for k in b.columns))
+        cols = {}
+        for k in names:
+            parts = [b.columns.get(k) if k in b.columns else np.full(b.n, np.nan) for b in batches]
+            if any(p.dtype == object for p in parts):
+                parts = [p if p.dtype == object else np.where(np.isnan(p), None, p.astype(object)) for p in parts]
+            cols[k] = np.concatenate(parts)
+        return Batch(np.concatenate([b.ts for b in batches]), np.concatenate([b.ids for b in batches]), cols,
+                     np.concatenate([b.sources for b in batches]))
+
+def _num(x) -> np.ndarray:
+    return x.astype(float) if isinstance(x, np.ndarray) and x.dtype == bool else x
+
+def _numeric(x):
+    # operand of -, arithmetic and the numeric functions: text and missing values become NaN
+    # (as windows._numbers does for aggregates), so a string in a field degrades to "no match"
+    if isinstance(x, np.ndarray):
+        if x.dtype == object:
+            return np.array([float(v) if isinstance(v, (int, float, np.number)) else np.nan for v in x], dtype=float)
+        return x.astype(float) if x.dtype == bool else x
+    return float(x) if isinstance(x, (int, float, np.number)) else np.nan
+
+def truth(x, n: int) -> np.ndarray:
+    # boolean mask of a value used as a condition: NaN/missing and 0 are false
+    if isinstance(x, np.ndarray):
+        if x.dtype == bool: return x
+        if x.dtype == object: return np.array([bool(v) and v == v for v in x], dtype=bool)
+        return np.nan_to_num(x, nan=0.0) != 0
+    return np.full(n, bool(x) and x == x)
+
+def _is_text(x) -> bool:
+    return isinstance(x, str) or isinstance(x, np.ndarray) and x.dtype == object
+
+def _present(x, n: int) -> np.ndarray:
+    if isinstance(x, np.ndarray) and x.dtype == object: return np.array([v is not None for v in x], dtype=bool)
+    if isinstance(x, np.ndarray): return ~np.isnan(x)
+    return np.full(n, x is not None)
+
+_CMP = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal, "==": np.equal, "!=": np.not_equal}
+_ARITH = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide}
+
+def children(node: tuple) -> tuple:
+    # sub-expressions of a node, in argument order
+    op = node[0]
+    if op in ("neg", "not", "and", "or"): return node[1:]
+    if op in ("cmp", "arith", "call"): return node[2:]
+    if op == "in": return (node[1],)
+    if op == "agg": return (node[4],)
+    if op == "seq": return node[3:]
+    return ()
+
+def apply(node: tuple, args: list, batch: Batch):
+    # one node over the whole batch, given the values of its children (see children())
+    op = node[0]
+    if op in ("num", "str", "bool"): return node[1]
+    if op == "field": return batch.get(node[1])
+    if op == "neg": return -_numeric(args[0])
+    if op == "not": return ~truth(args[0], batch.n)
+    if op == "and":
+        m = truth(args[0], batch.n)
+        for a in args[1:]: m = m & truth(a, batch.n)
+        return m
+    if op == "or":
+        m = truth(args[0], batch.n)
+        for a in args[1:]: m = m | truth(a, batch.n)
+        return m
+    if op == "cmp":
+        a = _num(args[0]); b = _num(args[1])
+        if _is_text(a) or _is_text(b):
+            # strings only support ==/!= (checked at compile time for literals); None never matches
+            if node[1] not in ("==", "!="): return np.zeros(batch.n, dtype=bool)
+            eq = np.broadcast_to(np.asarray(a == b, dtype=bool), (batch.n,))
+            return eq if node[1] == "==" else ~eq & _present(a, batch.n) & _present(b, batch.n)
+        with np.errstate(invalid="ignore"):
+            m = _CMP[node[1]](a, b) & ~np.isnan(a) & ~np.isnan(b)  # a missing value never satisfies a comparison, != included
+        return np.broadcast_to(m, (batch.n,))
+    if op == "arith":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _ARITH[node[1]](_numeric(args[0]), _numeric(args[1]))
+    if op == "in":
+        x = args[0]; vals = [v[1] for v in node[2]]
+        if isinstance(x, np.ndarray) and x.dtype != object:
+            return np.isin(x, [v for v in vals if not isinstance(v, str)])
+        return np.array([v in vals for v in np.broadcast_to(x, (batch.n,))], dtype=bool)
+    if op == "call":
+        fn = node[1]
+        if fn == "is_null":
+            x = args[0]
+            if isinstance(x, np.ndarray) and x.dtype == object: return np.array([v is None or v != v for v in x], dtype=bool)
+            if isinstance(x, str): return np.zeros(batch.n, dtype=bool)
+            return np.broadcast_to(np.isnan(_numeric(x)), (batch.n,))
+        args = [_numeric(a) for a in args]
+        with np.errstate(invalid="ignore"):
+            if fn == "abs": return np.abs(args[0])
+            if fn == "sqrt": return np.sqrt(args[0])
+            if fn == "hypot": return np.hypot(args[0], args[1])
+    if op in ("agg", "seq"): raise DSLError(f"{node[1] if op == 'agg' else 'seq'}() needs per-key state: evaluate through the engine's network")
+    raise DSLError(f"cannot evaluate node {op!r}")
+
+def evaluate(node: tuple, batch: Batch):
+    # vectorized evaluation of an expression tuple (see dsl.py) over the whole batch
+    return apply(node, [evaluate(c, batch) for c in children(node)], batch)
+
+def _jsonable(v):
+    if isinstance(v, (np.floating, float)): return None if v != v else float(v)
+    if isinstance(v, (np.integer,)): return int(v)
+    if isinstance(v, np.bool_): return bool(v)
+    return v
+
+def check(node: tuple):
+    # static checks the parser cannot do: ordering comparisons, arithmetic and functions need numbers
+    if node[0] == "cmp" and node[1] not in ("==", "!=") and ("str" in (node[2][0], node[3][0])):
+        raise DSLError(f"operator {node[1]} is not defined for strings")
+    if node[0] in ("neg", "arith", "call") and any(a[0] == "str" for a in children(node)):
+        what = {"neg": "unary -", "arith": f"operator {node[1]}"}.get(node[0], f"{node[1]}()")
+        raise DSLError(f"{what} is not defined for strings")
+    for a in node[1:]:
+        if isinstance(a, tuple) and a and isinstance(a[0], str): check(a)
+
+class RuleProgram:
+    # one compiled rule: condition mask over a batch + payload for the matching rows
+    def __init__(self, rule: Rule):
+        check(rule.when)
+        for _, e in rule.emit: check(e)
+        self.rule = rule; self.name = rule.name; self.type = rule.type; self.when = rule.when
+        self.emit = rule.emit or tuple((f, ("field", f)) for f in fields(rule.when) if f not in _RESERVED)
+        self.fields = list(dict.fromkeys(fields(rule.when) + [f for _, e in self.emit for f in fields(e)]))
+
+    def evaluate(self, batch: Batch) -> np.ndarray:
+        return truth(evaluate(self.when, batch), batch.n)
+
+    def alerts(self, batch: Batch, rows: np.ndarray, values: Optional[list] = None) -> List[Dict[str, Any]]:
+        # values: precomputed emit expressions (shared network); evaluated here otherwise
+        values = values if values is not None else [evaluate(e, batch) for _, e in self.emit]
+        payload = {k: np.broadcast_to(v, (batch.n,)) for (k, _), v in zip(self.emit, values)}
+        return [{"ts": float(batch.ts[i]), "id": batch.ids[i], "type": self.type, "rule": self.name,
+                 **{k: _jsonable(v[i]) for k, v in payload.items()}} for i in rows]
+
+    def __repr__(self):
+        return f"RuleProgram({self.name!r}, fields={self.fields})"
+
+def compile_rules(text: str) -> List[RuleProgram]:
+    return [RuleProgram(r) for r in parse(text)]
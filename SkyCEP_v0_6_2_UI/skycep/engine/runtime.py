@@ -1,20 +1,69 @@
 from __future__ import annotations
-import time
+import math, threading
+import numpy as np
+from skycep.engine.ruleset import Batch
+from skycep.engine.network import Network
+from skycep.engine.eventtime import EventTime
+
 class Engine:
-    def __init__(self, window_seconds: float = 5.0, on_alert=None):
+    # Runs compiled rule programs (ruleset.compile_rules) over ingest batches: the batch is
+    # turned into columns once, the shared network (network.py) evaluates every distinct
+    # predicate once, each rule reads its match mask from it, and alerts are built only for
+    # matching rows, in event order. window_seconds is the length of aggregates and seq patterns
+    # written without one; max_keys bounds the ids each window or pattern tracks. While any
+    # window or pattern is loaded, events pass through the EventTime reorder buffer first
+    # (eventtime.py: max_delay, allowed_lateness, idle_seconds, max_buffer).
+    # The engine is one stateful stream shared by concurrent /ingest requests: reorder buffer,
+    # window and pattern stores and the network swap all change under self._lock, one batch at a time.
+    def __init__(self, window_seconds: float = 5.0, on_alert=None, max_keys: int = 100000, max_delay: float = 0.0,
+                 allowed_lateness: float = math.inf, idle_seconds: float = 60.0, max_buffer: int = 1000000):
         self.window_seconds = window_seconds
+        self.max_keys = max_keys
         self.on_alert = on_alert
         self.programs = []
+        self.fields = []
+        self.network = Network([], window_seconds)
+        self.time = EventTime(max_delay, allowed_lateness, idle_seconds, max_buffer)
         self.alerts = []
         self.states = {}
+        self._lock = threading.Lock()
     def load_programs(self, progs):
-        self.programs = list(progs)
+        progs = list(progs)
+        with self._lock:
+            self.programs = progs
+            self.fields = list(dict.fromkeys(f for p in self.programs for f in p.fields))
+            self.network = Network(self.programs, self.window_seconds, self.max_keys, self.network.windows, self.network.patterns)
     def ingest(self, events):
-        now = time.time()
-        for e in events:
-            d = e.get("data", {})
-            if d.get("y") is not None and d.get("vy") is not None and float(d["y"]) < 20 and float(d["vy"]) < -1.2:
-                alert = {"ts": e.get("ts", now), "id": e.get("id","UNK"), "type": "hard_landing_risk",
-                         "rule": "demo", "alt": d.get("y"), "vy": d.get("vy")}
-                self.alerts.append(alert)
-                if self.on_alert: self.on_alert(alert)
+        # events: [{"ts", "id", "source", "data": {...}}]
+        return self.ingest_batch(Batch.from_events(events, self.fields))
+    def ingest_table(self, table):
+        # flat Arrow table with ts, id, optional source and data fields as columns
+        return self.ingest_batch(Batch.from_arrow(table, self.fields))
+    def ingest_batch(self, batch: Batch):
+        with self._lock:
+            if not self.programs or not batch.n: return []
+            late, ready = self.time.push(batch, hold=bool(self.network.aggs or self.network.seqs))
+            return self._evaluate(late, late=True) + self._evaluate(ready)
+    def flush(self):
+        # end of stream: evaluate everything still in the reorder buffer
+        with self._lock:
+            return self._evaluate(self.time.flush()) if self.programs else []
+    def stats(self):
+        # consistent snapshot for /health (the stores are OrderedDicts that ingest mutates)
+        with self._lock:
+            return {"network": self.network.stats(), "event_time": self.time.stats()}
+    def _evaluate(self, batch, late: bool = False):
+        if batch is None or not batch.n: return []
+        run = self.network.run(batch); hits = []
+        for k, prog in enumerate(self.programs):
+            rows = np.flatnonzero(run.mask(k))
+            if len(rows): hits.append((rows, k, prog.alerts(batch, rows, run.payload(k))))
+        if not hits: return []
+        rows = np.concatenate([h[0] for h in hits]); order = np.argsort(rows, kind="stable")  # event order, then rule order
+        flat = [a for h in hits for a in h[2]]
+        out = [flat[i] for i in order]
+        for alert in out:
+            if late: alert["late"] = True
+            self.alerts.append(alert)
+            if self.on_alert: self.on_alert(alert)
+        return out
@@ -0,0 +1,142 @@
+from __future__ import annotations
+import math
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, Sequence
+import numpy as np
+from skycep.engine.dsl import AGGREGATES, WINDOW_KINDS
+
+# Per-key time windows behind the DSL aggregates avg/sum/min/max/count(expr, 5s[, tumbling]).
+# One WindowStore exists per distinct (kind, length, argument) and every aggregate function over
+# it reads the same per-key state, updated once per event:
+#   sliding  - (t - length, t]: values sit in a ring buffer (two array('d'), 16 bytes per value)
+#              with a running sum and count; min/max come from monotonic deques, so every event
+#              costs O(1) amortized whatever the window holds.
+#   tumbling - [k*length, (k+1)*length): the current bucket only, as sum/count/min/max scalars;
+#              the value at an event is the aggregate of its bucket so far.
+# Missing values (NaN) are not aggregated; an empty window gives avg/min/max NaN, sum/count 0.
+# A key whose last event is older than the window length holds nothing that can still be
+# aggregated and is evicted; max_keys caps the number of keys tracked (least recently updated go).
+
+class SlidingWindow:
+    __slots__ = ("length", "ts", "vals", "head", "size", "sum", "count", "lo", "hi", "seq", "last", "_pops")
+
+    def __init__(self, length: float, extremes: bool):
+        self.length = length
+        self.ts = array("d", bytes(8*8)); self.vals = array("d", bytes(8*8))  # capacity is a power of two
+        self.head = 0; self.size = 0; self.sum = 0.0; self.count = 0; self.seq = 0; self.last = -math.inf; self._pops = 0
+        self.lo = deque() if extremes else None  # (seq, value), increasing values: front is the min
+        self.hi = deque() if extremes else None  # (seq, value), decreasing values: front is the max
+
+    def push(self, t: float, v: float):
+        # events are taken in arrival order; an older timestamp than the key's last one counts as the last
+        if t < self.last: t = self.last
+        self.last = t
+        self.expire(t)
+        if v != v: return
+        cap = len(self.ts)
+        if self.size == cap: self._grow(); cap = len(self.ts)
+        i = (self.head + self.size) & (cap - 1)
+        self.ts[i] = t; self.vals[i] = v; self.size += 1
+        self.sum += v; self.count += 1
+        s = self.seq + self.size - 1  # sequence number of this value; the oldest held one is self.seq
+        if self.lo is not None:
+            lo = self.lo; hi = self.hi
+            while lo and lo[-1][1] >= v: lo.pop()
+            lo.append((s, v))
+            while hi and hi[-1][1] <= v: hi.pop()
+            hi.append((s, v))
+
+    def expire(self, t: float):
+        edge = t - self.length; cap = len(self.ts) - 1
+        while self.size and self.ts[self.head] <= edge:
+            self.sum -= self.vals[self.head]; self.count -= 1
+            self.head = (self.head + 1) & cap; self.size -= 1; self.seq += 1; self._pops += 1
+        if self.lo is not None:
+            while self.lo and self.lo[0][0] < self.seq: self.lo.popleft()
+            while self.hi and self.hi[0][0] < self.seq: self.hi.popleft()
+        if not self.size: self.sum = 0.0
+        elif self._pops > len(self.ts):
+            # re-add from the buffer now and then so the running sum cannot drift
+            self._pops = 0; self.sum = math.fsum(self.vals[(self.head + k) & cap] for k in range(self.size))
+
+    def _grow(self):
+        cap = len(self.ts); order = [(self.head + k) & (cap - 1) for k in range(self.size)]
+        self.ts = array("d", [self.ts[k] for k in order]) + array("d", bytes(8*cap))
+        self.vals = array("d", [self.vals[k] for k in order]) + array("d", bytes(8*cap))
+        self.head = 0
+
+    def values(self):
+        return (self.sum/self.count if self.count else math.nan, self.sum, self.lo[0][1] if self.lo else math.nan,
+                self.hi[0][1] if self.hi else math.nan, float(self.count))
+
+    def held(self) -> int:
+        return self.size
+
+class TumblingWindow:
+    __slots__ = ("length", "bucket", "sum", "count", "lo", "hi", "last")
+
+    def __init__(self, length: float, extremes: bool):
+        self.length = length; self.bucket = None; self.last = -math.inf
+        self.sum = 0.0; self.count = 0; self.lo = math.nan; self.hi = math.nan
+
+    def push(self, t: float, v: float):
+        if t < self.last: t = self.last
+        self.last = t
+        b = math.floor(t/self.length)
+        if b != self.bucket:
+            self.bucket = b; self.sum = 0.0; self.count = 0; self.lo = math.nan; self.hi = math.nan
+        if v != v: return
+        self.sum += v; self.count += 1
+        if not v >= self.lo: self.lo = v  # NaN start compares false
+        if not v <= self.hi: self.hi = v
+
+    def values(self):
+        return (self.sum/self.count if self.count else math.nan, self.sum, self.lo, self.hi, float(self.count))
+
+    def held(self) -> int:
+        return 0
+
+def _numbers(x, n: int) -> np.ndarray:
+    x = np.broadcast_to(x, (n,))
+    if x.dtype == object:
+        return np.array([float(v) if isinstance(v, (int, float, np.number)) else math.nan for v in x], dtype=float)
+    return x.astype(float)
+
+class WindowStore:
+    # per-key windows of one (kind, length, argument); fns: the aggregates some rule reads
+    def __init__(self, kind: str, length: float, fns: Iterable[str], max_keys: int = 100000):
+        if kind not in WINDOW_KINDS: raise ValueError(f"unknown window kind {kind!r}")
+        if not length > 0: raise ValueError("window length must be positive")
+        self.kind = kind; self.length = float(length); self.fns = set(fns); self.max_keys = max_keys
+        self.keys: "OrderedDict[Any, Any]" = OrderedDict()
+        self.clock = -math.inf; self.evicted = 0
+        self._cls = SlidingWindow if kind == "sliding" else TumblingWindow
+        self._extremes = bool(self.fns & {"min", "max"})
+
+    def update(self, ids: Sequence[Any], ts: np.ndarray, values) -> Dict[str, np.ndarray]:
+        # push one batch in event order; returns {fn: (n,) value at each event, that event included}
+        n = len(ts); rows = []
+        keys = self.keys; cls = self._cls; length = self.length; ext = self._extremes
+        for k, t, v in zip(ids, ts.tolist(), _numbers(values, n).tolist()):
+            w = keys.get(k)
+            if w is None: w = keys[k] = cls(length, ext)
+            else: keys.move_to_end(k)
+            w.push(t, v)
+            rows.append(w.values())
+        out = np.array(rows, dtype=float).reshape(n, 5)
+        if n: self.clock = max(self.clock, float(np.max(ts)))
+        self.evict()
+        return {f: out[:, AGGREGATES.index(f)] for f in self.fns}
+
+    def evict(self):
+        # keys are kept in update order, so idle ones collect at the front
+        edge = self.clock - self.length; keys = self.keys
+        while keys:
+            k, w = next(iter(keys.items()))
+            if w.last > edge and len(keys) <= self.max_keys: break
+            keys.popitem(last=False); self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "seconds": self.length, "keys": len(self.keys),
+                "values": sum(w.held() for w in self.keys.values()), "evicted": self.evicted}
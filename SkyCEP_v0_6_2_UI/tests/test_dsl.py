@@ -0,0 +1,131 @@
+import pytest
+from skycep.engine.dsl import DSLError, parse, tokenize
+
+def _str(src):
+    toks = tokenize(src)
+    assert [t.kind for t in toks] == ["str", "eof"]
+    return toks[0].value
+
+def test_string_escapes_keep_unicode():
+    assert _str('"Zürich"') == "Zürich" and _str("'São Paulo ✈'") == "São Paulo ✈"
+    assert _str(r'"a\"b\\c\n\t"') == 'a"b\\c\n\t' and _str(r"'it\'s'") == "it's"
+    assert parse('rule r: id in ("Zürich", "Köln")')[0].when == ("in", ("field", "id"), (("str", "Zürich"), ("str", "Köln")))
+    with pytest.raises(DSLError) as e:
+        tokenize('x == "a\\qb"')
+    assert (e.value.line, e.value.col) == (1, 8) and "\\q" in str(e.value)
+
+def _when(src):
+    return parse(f"rule r: {src}")[0].when
+
+F = lambda n: ("field", n)
+N = lambda v: ("num", float(v))
+
+def test_precedence():
+    # or < and < not < comparison < + - < * / < unary minus
+    assert _when("a or b and not c") == ("or", F("a"), ("and", F("b"), ("not", F("c"))))
+    assert _when("a and b and c or d or e") == ("or", ("and", F("a"), F("b"), F("c")), F("d"), F("e"))
+    assert _when("not x < 1 + 2 * -y") == \
+        ("not", ("cmp", "<", F("x"), ("arith", "+", N(1), ("arith", "*", N(2), ("neg", F("y"))))))
+    assert _when("a - b - c / d / e") == \
+        ("arith", "-", ("arith", "-", F("a"), F("b")), ("arith", "/", ("arith", "/", F("c"), F("d")), F("e")))
+    assert _when("(a or b) and c") == ("and", ("or", F("a"), F("b")), F("c"))
+    assert _when("-2 > x") == ("cmp", ">", N(-2), F("x")) and _when("y <> 1") == ("cmp", "!=", F("y"), N(1))
+    assert _when("abs(roll) > 0.6") == ("cmp", ">", ("call", "abs", F("roll")), N(0.6))
+    assert _when("avg(vy, 500ms) < -2") == ("cmp", "<", ("agg", "avg", "sliding", 0.5, F("vy")), N(-2))
+    assert _when("max(abs(r), 2m, tumbling) > 1 and count(5s) >= 3") == \
+        ("and", ("cmp", ">", ("agg", "max", "tumbling", 120.0, ("call", "abs", F("r"))), N(1)),
+                ("cmp", ">=", ("agg", "count", "sliding", 5.0, ("bool", True)), N(3)))
+
+def test_in_and_not_in():
+    vals = (("str", "A"), ("num", -1.0), ("bool", True))
+    assert _when('id in ("A", -1, true)') == ("in", F("id"), vals)
+    assert _when('id not in ("A", -1, true)') == ("not", ("in", F("id"), vals))
+    assert _when('not id in ("A")') == ("not", ("in", F("id"), (("str", "A"),)))
+    assert _when('x not in (1) and y') == ("and", ("not", ("in", F("x"), (N(1),))), F("y"))
+    # "not" that does not precede "in" stays a prefix operator
+    assert _when("a and not b") == ("and", F("a"), ("not", F("b")))
+
+def test_seq():
+    assert _when("seq(eng == 0, not eng == 1, vy < -3) within 20s") == \
+        ("seq", 20.0, (False, True, False), ("cmp", "==", F("eng"), N(0)), ("cmp", "==", F("eng"), N(1)),
+         ("cmp", "<", F("vy"), N(-3)))
+    assert _when("seq(a, (not b), c)") == ("seq", None, (False, False, False), F("a"), ("not", F("b")), F("c"))
+
+def test_rule_header_and_emit():
+    r1, r2 = parse("""
+        # comment
+        rule hard_landing type landing:
+            y < 20 and vy < -1.2
+            emit alt = y * 3.28, vy, label = "HL"
+        rule bank: abs(roll) > 0.6
+    """)
+    assert (r1.name, r1.type, r1.line) == ("hard_landing", "landing", 3)
+    assert r1.emit == (("alt", ("arith", "*", F("y"), N(3.28))), ("vy", F("vy")), ("label", ("str", "HL")))
+    assert (r2.name, r2.type, r2.emit, r2.line) == ("bank", "bank", (), 6)
+
+def test_emit_payloads():
+    from skycep.engine.ruleset import compile_rules
+    from skycep.engine.runtime import Engine
+    eng = Engine()
+    eng.load_programs(compile_rules("""
+        rule low type landing: y < 20 and id != "X" emit alt = y * 2, vy, tag = "HL"
+        rule bank: abs(roll) > 0.6
+    """))
+    out = eng.ingest([{"ts": 1.0, "id": "A", "data": {"y": 10, "vy": -2, "roll": 0.9}},
+                      {"ts": 2.0, "id": "X", "data": {"y": 5, "roll": 0.1}},
+                      {"ts": 3.0, "id": "B", "data": {"y": 12, "roll": -0.7}}])
+    assert out == [{"ts": 1.0, "id": "A", "type": "landing", "rule": "low", "alt": 20.0, "vy": -2.0, "tag": "HL"},
+                   {"ts": 1.0, "id": "A", "type": "bank", "rule": "bank", "roll": 0.9},
+                   {"ts": 3.0, "id": "B", "type": "landing", "rule": "low", "alt": 24.0, "vy": None, "tag": "HL"},
+                   {"ts": 3.0, "id": "B", "type": "bank", "rule": "bank", "roll": -0.7}]
+
+@pytest.mark.parametrize("src, line, col, msg", [
+    ("rule r: x >", 1, 12, "expected an expression, got end of input"),
+    ("rule r x > 1", 1, 8, "expected ':', got 'x'"),
+    ("rule r: x > 1\nrule r: y", 2, 1, "duplicate rule name 'r'"),
+    ("rule r:\n  x > 1 y", 2, 9, "expected 'emit', 'rule' or end of input, got 'y'"),
+    ("rule r: foo(x)", 1, 9, "unknown function 'foo'"),
+    ("rule r: hypot(x)", 1, 9, "hypot() takes 2 argument(s), got 1"),
+    ("rule r: avg(x, 0s) > 1", 1, 16, "window length must be positive"),
+    ("rule r: avg(x, 5s, hopping) > 1", 1, 20, "unknown window kind 'hopping'"),
+    ("rule r: x in (y)", 1, 15, "expected a literal, got 'y'"),
+    ("rule r: seq(not a, b, c)", 1, 9, "seq() must start and end with a positive step"),
+    ("rule r: seq(a, not b)", 1, 9, "seq() must start and end with a positive step"),
+    ("rule r: seq(a)", 1, 9, "seq() needs at least two positive steps"),
+    ("rule r: x == 1 emit a =", 1, 24, "expected an expression, got end of input"),
+    ("rule r: x $ 1", 1, 11, "unexpected character '$'"),
+])
+def test_errors_carry_positions(src, line, col, msg):
+    with pytest.raises(DSLError) as e:
+        parse(src)
+    assert (e.value.line, e.value.col) == (line, col) and str(e.value) == f"line {line}, col {col}: {msg}"
+
+def test_text_values_in_numeric_expressions_do_not_match():
+    from skycep.engine.ruleset import compile_rules
+    from skycep.engine.runtime import Engine
+    eng = Engine()
+    eng.load_programs(compile_rules("""
+        rule a: abs(cs) > 1 emit v = -cs
+        rule b: cs + 1 > 2 or hypot(cs, 1) > 5 or sqrt(cs) > 9
+        rule n: is_null(cs)
+        rule ok: y > 1
+    """))
+    out = eng.ingest([{"ts": 1.0, "id": "A", "data": {"cs": "AB1", "y": 2}},
+                      {"ts": 2.0, "id": "A", "data": {"cs": 4, "y": 0}},
+                      {"ts": 3.0, "id": "A", "data": {"y": 0}}])
+    assert [(x["ts"], x["rule"]) for x in out] == [(1.0, "ok"), (2.0, "a"), (2.0, "b"), (3.0, "n")]
+    assert out[1]["v"] == -4.0
+
+@pytest.mark.parametrize("src, msg", [
+    ('"a" + 1 > 0', "operator + is not defined for strings"),
+    ('x * "b" > 0', "operator * is not defined for strings"),
+    ('-"a" < 0', "unary - is not defined for strings"),
+    ('abs("a") > 1', "abs() is not defined for strings"),
+    ('is_null("x")', "is_null() is not defined for strings"),
+    ('y > 0 emit v = hypot(y, "a")', "hypot() is not defined for strings"),
+])
+def test_string_literals_rejected_in_arithmetic(src, msg):
+    from skycep.engine.ruleset import compile_rules
+    with pytest.raises(DSLError) as e:
+        compile_rules(f"rule r: {src}")
+    assert str(e.value) == msg
@@ -0,0 +1,148 @@
+import json, math
+import numpy as np
+import pytest
+from skycep.engine.eventtime import EventTime
+from skycep.engine.ruleset import Batch, compile_rules
+from skycep.engine.runtime import Engine
+
+def _batch(ts, ids=None, sources=None, **cols):
+    ts = np.array(ts, dtype=float); n = len(ts)
+    ids = np.array(ids if ids is not None else ["A"]*n, dtype=object)
+    src = np.array(sources, dtype=object) if sources is not None else None
+    return Batch(ts, ids, {k: np.array(v, dtype=float) for k, v in cols.items()}, src)
+
+RULES = """
+    rule w: avg(vy, 5s) < -1.5 and count(5s) >= 3 emit m = avg(vy, 5s), hi = max(vy, 10s, tumbling)
+    rule p: seq(a == 1, not vy > 4, vy < -3) within 20s
+    rule s: vy > 5
+"""
+
+def _stream(n=20000, seed=2):
+    rng = np.random.default_rng(seed)
+    ts = np.round(np.sort(rng.uniform(0, 2000, n)), 3)
+    ids = np.array([f"F{k}" for k in rng.integers(0, 20, n)], dtype=object)
+    src = np.where(rng.random(n) < 0.5, "radar", "adsb").astype(object)
+    return rng, ts, ids, src, rng.normal(0, 2, n), (rng.random(n) < 0.05).astype(float)
+
+def _alerts(stream, order, batch, **kw):
+    _, ts, ids, src, vy, a = stream
+    eng = Engine(**kw); eng.load_programs(compile_rules(RULES)); out = []
+    for s in range(0, len(order), batch):
+        sl = order[s:s+batch]
+        out += eng.ingest_batch(Batch(ts[sl].copy(), ids[sl], {"vy": vy[sl], "a": a[sl]}, src[sl]))
+    out += eng.flush()
+    return eng, sorted((x["ts"], x["id"], x["rule"], round(x.get("m") or 0.0, 9), x.get("hi"), x.get("late", False)) for x in out)
+
+def test_results_do_not_depend_on_disorder_within_max_delay():
+    stream = _stream(); rng, ts = stream[0], stream[1]
+    eng0, ref = _alerts(stream, np.arange(len(ts)), 700)
+    arrival = np.argsort(ts + rng.uniform(0, 4, len(ts)), kind="stable")  # each event at most 4 s behind
+    assert (np.diff(ts[arrival]) < 0).mean() > 0.3
+    eng, got = _alerts(stream, arrival, 333, max_delay=4.0)
+    assert got == ref and len(ref) > 500 and {r[2] for r in ref} == {"w", "p", "s"}
+    st = eng.time.stats()
+    assert st["late"] == {} and st["dropped"] == {} and st["buffered"] == 0 and st["forced_releases"] == 0
+    # too small a delay: some events arrive late, and late alerts are flagged as such
+    _, tight = _alerts(stream, arrival, 333, max_delay=1.0)
+    assert tight != ref and any(r[5] for r in tight)
+
+def test_released_events_are_in_time_order():
+    _, ts, ids, src, vy, _ = _stream(5000, seed=7)
+    rng = np.random.default_rng(1); arrival = np.argsort(ts + rng.uniform(0, 2, len(ts)), kind="stable")
+    et = EventTime(max_delay=2.0); out = []
+    for s in range(0, len(ts), 250):
+        sl = arrival[s:s+250]
+        late, ready = et.push(Batch(ts[sl].copy(), ids[sl], {"vy": vy[sl]}, src[sl]))
+        assert late is None
+        if ready is not None: out.append(ready)
+    out.append(et.flush())
+    got = np.concatenate([b.ts for b in out])
+    assert np.array_equal(got, np.sort(ts)) and np.array_equal(np.sort(np.concatenate([b.columns["vy"] for b in out])), np.sort(vy))
+
+def test_watermark_skips_idle_sources():
+    et = EventTime(max_delay=2.0, idle_seconds=30.0)
+    et.push(_batch([10.0, 12.0], sources=["radar", "adsb"]))
+    assert et.watermark == 8.0  # min over sources, minus max_delay
+    et.push(_batch([35.0], sources=["radar"]))
+    assert et.watermark == 10.0  # adsb (12) is 23 s behind: still live, still holds it back
+    _, ready = et.push(_batch([50.0], sources=["radar"]))
+    assert et.watermark == 48.0 and ready.ts.tolist() == [12.0, 35.0]  # adsb is 38 s behind: idle, ignored
+    et.push(_batch([20.0], sources=["adsb"]))  # adsb is back: late, and the watermark never moves back
+    assert et.watermark == 48.0 and et.counts["late"] == {"adsb": 1}
+    assert et.stats()["sources"] == {"radar": 50.0, "adsb": 20.0}
+
+def test_late_and_dropped():
+    et = EventTime(max_delay=0.0, allowed_lateness=10.0)
+    et.push(_batch([50.0], sources=["radar"]))
+    late, ready = et.push(_batch([45.0, 30.0, 40.0, 50.0, 55.0], ids=["A", "B", "C", "D", "E"], sources=["radar", "adsb", "adsb", "radar", "radar"]))
+    assert late.ts.tolist() == [40.0, 45.0] and late.ids.tolist() == ["C", "A"]  # accepted, sorted by time
+    assert ready.ts.tolist() == [50.0]  # 50 is not late, only events before the watermark are; adsb (40) holds 55 back
+    assert et.counts["late"] == {"radar": 1, "adsb": 1} and et.counts["dropped"] == {"adsb": 1}
+    assert list(et.dropped) == [{"ts": 30.0, "id": "B", "source": "adsb", "reason": "late", "watermark": 50.0}]
+    eng = Engine(max_delay=0.0, allowed_lateness=10.0)
+    eng.load_programs(compile_rules("rule c: count(100s) >= 1 emit n = count(100s)"))
+    eng.ingest([{"ts": 50.0, "id": "A", "data": {}}])
+    out = eng.ingest([{"ts": 45.0, "id": "A", "data": {}}, {"ts": 10.0, "id": "A", "data": {}}])
+    assert out == [{"ts": 45.0, "id": "A", "type": "c", "rule": "c", "n": 2.0, "late": True}]
+
+def test_untimed_events_take_their_sources_time():
+    et = EventTime(max_delay=5.0)
+    _, ready = et.push(_batch([np.nan], sources=["radar"]))
+    assert ready is None and et.counts["untimed"] == {"radar": 1} and list(et.dropped)[0]["reason"] == "untimed"
+    assert list(et.dropped)[0]["ts"] is None and list(et.dropped)[0]["watermark"] is None
+    et.push(_batch([10.0, np.nan, 7.0, np.nan], sources=["radar", "radar", "adsb", "adsb"], k=[1, 2, 3, 4]))
+    b = et.flush()
+    assert b.ts.tolist() == [7.0, 7.0, 10.0, 10.0] and b.columns["k"].tolist() == [3, 4, 1, 2]
+    assert et.counts["untimed"] == {"radar": 1}
+    json.dumps(et.stats())
+
+def test_max_buffer_forces_the_oldest_out():
+    et = EventTime(max_delay=1000.0, max_buffer=10)
+    _, ready = et.push(_batch(np.arange(25.0)[::-1]))
+    assert ready.ts.tolist() == list(np.arange(15.0)) and et.pending.n == 10
+    assert et.watermark == 14.0 and et.forced == 1 and et.stats()["forced_releases"] == 1
+    late, ready = et.push(_batch([3.0, 30.0]))
+    assert late.ts.tolist() == [3.0] and ready.ts.tolist() == [15.0] and et.pending.n == 10  # 30 pushed 15 out
+    assert et.forced == 2 and et.watermark == 15.0
+
+def test_flush_releases_in_order_and_empties():
+    et = EventTime(max_delay=100.0)
+    assert et.flush() is None
+    et.push(_batch([5.0, 3.0, 5.0, 1.0], k=[1, 2, 3, 4]))
+    et.push(_batch([3.0, 2.0], k=[5, 6]))
+    b = et.flush()
+    assert b.ts.tolist() == [1.0, 2.0, 3.0, 3.0, 5.0, 5.0] and b.columns["k"].tolist() == [4, 6, 2, 5, 1, 3]  # ties: arrival order
+    assert et.watermark == 5.0 and et.pending is None and et.flush() is None
+    late, _ = et.push(_batch([4.0]))
+    assert late.ts.tolist() == [4.0]  # everything before the flushed frontier is late now
+
+def test_hold_false_passes_everything_through():
+    et = EventTime(max_delay=0.0, allowed_lateness=0.0)
+    et.push(_batch([50.0]), hold=False)
+    late, ready = et.push(_batch([60.0, 10.0]), hold=False)
+    assert late is None and ready.ts.tolist() == [10.0, 60.0] and et.counts["dropped"] == {}
+
+def test_rejects_negative_delays():
+    with pytest.raises(ValueError):
+        EventTime(max_delay=-1.0)
+    with pytest.raises(ValueError):
+        EventTime(allowed_lateness=-1.0)
+    assert EventTime().stats()["allowed_lateness"] is None and math.isinf(EventTime().allowed_lateness)
+
+def test_concurrent_ingest_matches_serial():
+    # /ingest runs in a threadpool: batches from many threads must behave like some serial order of them
+    from concurrent.futures import ThreadPoolExecutor
+    stream = _stream(60000, seed=5); _, ts, ids, src, vy, a = stream
+    rules = "rule w: count(5s) >= 1 and sum(vy, 5s) < -4\nrule p: seq(a == 1, vy < -3) within 20s"
+    def run(threads):
+        eng = Engine(max_delay=1000.0); eng.load_programs(compile_rules(rules))
+        batches = [Batch(ts[s:s+50].copy(), ids[s:s+50], {"vy": vy[s:s+50], "a": a[s:s+50]}, src[s:s+50])
+                   for s in range(0, len(ts), 50)]
+        with ThreadPoolExecutor(threads) as ex:
+            out = [x for r in ex.map(eng.ingest_batch, batches) for x in r]
+        out += eng.flush()
+        return eng, sorted((x["ts"], x["id"], x["rule"]) for x in out)
+    _, ref = run(1)
+    eng, got = run(8)
+    # max_delay covers the whole stream, so every arrival order releases the same events in the same order
+    assert got == ref and len(ref) > 1000 and eng.stats()["event_time"]["buffered"] == 0
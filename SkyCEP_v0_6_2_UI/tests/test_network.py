@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from skycep.engine.dsl import DSLError, parse
+from skycep.engine.network import Network, canon
+from skycep.engine.ruleset import Batch, compile_rules
+
+def _c(src, window=None, boolean=True):
+    # boolean=True: canonical form as a rule root
+    return canon(parse(f"rule r: {src}")[0].when, window, boolean)
+
+@pytest.mark.parametrize("a, b", [
+    ("20 > y", "y < 20"),
+    ("-1 <= vy", "vy >= -1"),
+    ('"A" == id', 'id == "A"'),
+    ("1 != x", "x != 1"),
+    ("a and (b and c)", "(c and a) and b"),
+    ("a or b or (c or a)", "c or (b or a)"),
+    ("a and (b or c) and a", "(c or b) and a"),
+    ("not not (y < 20)", "y < 20"),
+    ("not not not a", "not a"),
+    ("x + y > 2 * z", "y + x > z * 2"),
+    ('id in ("B", "A", "B")', 'id in ("A", "B")'),
+    ("abs(20 > y and roll)", "abs(roll and y < 20)"),
+    ("avg(vy) < -1", "avg(vy, 5s) < -1"),
+    ("seq(1 < a, b) within 5s", "seq(a > 1, b)"),
+])
+def test_equivalent_spellings_share_a_canonical_form(a, b):
+    assert _c(a, 5.0) == _c(b, 5.0)
+
+def test_canonical_forms():
+    assert _c("20 > y") == ("cmp", "<", ("field", "y"), ("num", 20.0))
+    assert _c("1 < 2") == ("cmp", "<", ("num", 1.0), ("num", 2.0))  # only literal-vs-non-literal is mirrored
+    assert _c("a and (b and c)") == ("and", ("field", "a"), ("field", "b"), ("field", "c"))
+    assert _c("a and (b or c)")[0] == "and" and len(_c("a and (b or c)")) == 3  # and/or are not mixed
+    assert _c("a and a") == ("field", "a") and _c("not not a") == ("field", "a")
+    # as a value (comparison operand, payload) they still coerce to true/false
+    nn = ("not", ("not", ("field", "a")))
+    assert _c("a and a", boolean=False) == nn and _c("not not a", boolean=False) == nn and _c("a or a", boolean=False) == nn
+    assert _c("(not not y) == 1") == ("cmp", "==", ("not", ("not", ("field", "y"))), ("num", 1.0))
+    assert _c("not not (y < 1)", boolean=False) == _c("y < 1") and _c("not (not a and not a)") == ("field", "a")
+    assert _c("x - y") != _c("y - x") and _c("x / y") != _c("y / x")
+    assert _c("max(r, 10s, tumbling) > 1") != _c("max(r, 10s) > 1")
+    with pytest.raises(DSLError):
+        _c("avg(vy) < 1")
+    with pytest.raises(DSLError):
+        _c("seq(a, b)")
+
+def test_boolean_coercion_survives_in_values():
+    progs = compile_rules("""
+        rule a: (not not y) == 1 emit flag = not not y, both = y and y
+        rule b: not not y emit y
+    """)
+    batch = Batch.from_events([{"ts": 0.0, "id": "A", "data": {"y": 5}}, {"ts": 1.0, "id": "A", "data": {"y": 0}}], ["y"])
+    run = Network(progs, 5.0).run(batch)
+    for k, p in enumerate(progs):
+        assert np.array_equal(run.mask(k), p.evaluate(batch)) and run.mask(k).tolist() == [True, False]
+    assert p.alerts(batch, np.array([0]), run.payload(1)) == [{"ts": 0.0, "id": "A", "type": "b", "rule": "b", "y": 5.0}]
+    assert progs[0].alerts(batch, np.array([0]), run.payload(0))[0]["flag"] is True
+    assert progs[0].alerts(batch, np.array([0]), run.payload(0))[0]["both"] is True
+
+def test_equivalent_predicates_are_one_node():
+    progs = compile_rules("""
+        rule r1: y < 20 and vy < -1
+        rule r2: 20 > y or not not (vy < -1)
+        rule r3: -1 > vy and y < 20
+    """)
+    net = Network(progs, 5.0)
+    s = net.stats()
+    assert s["predicates"] == 2 and s["shared_predicates"] == 2
+    assert net.roots[0] == net.roots[2]  # identical after canonicalisation
+    assert s["nodes"] < s["unshared_nodes"]
+
+RULES = """
+    rule low: y < 20 and vy < -1.2 emit alt = y * 3.28, vy
+    rule low_mirror: 20 > y and -1.2 > vy
+    rule bank: abs(roll) > 0.6 or id in ("T1", "T2") emit roll
+    rule bank2: not not (abs(roll) > 0.6) or id in ("T2", "T1", "T1")
+    rule notin: id not in ("T1") and roll != 0 emit id, roll
+    rule ne: 0 != roll and not (y >= 100) emit slope = vy / y
+    rule arith: y + vy * 2 > 10 and hypot(vx, vy) <= 3 or is_null(vx)
+    rule nested: (y < 50 or vy > 0) and (y < 50 or vy > 0) and not (roll < -0.5 or roll > 0.5)
+    rule text: tag == "go" or tag != "stop" and y > 5 emit tag, y
+    rule flag: on and not (on and y > 10)
+    rule coerce: (not not vy) + (roll and roll) >= 1 emit b = not not on, c = vx or vx
+"""
+
+def _batch(n, seed):
+    rng = np.random.default_rng(seed)
+    events = []
+    for i in range(n):
+        data = {"y": float(rng.uniform(0, 120)), "vy": float(rng.normal(0, 2)), "roll": float(rng.normal(0, 0.5)),
+                "vx": float(rng.normal(0, 2)), "tag": str(rng.choice(["go", "stop", "hold"])), "on": bool(rng.random() < 0.5)}
+        for k in list(data):
+            if rng.random() < 0.1: del data[k]  # missing fields
+        events.append({"ts": float(i), "id": str(rng.choice(["T1", "T2", "A", "B"])), "data": data})
+    return events
+
+def test_shared_and_unshared_evaluation_agree():
+    progs = compile_rules(RULES)
+    names = list(dict.fromkeys(f for p in progs for f in p.fields))
+    for seed in range(5):
+        batch = Batch.from_events(_batch(400, seed), names)
+        run = Network(progs, 5.0).run(batch)
+        for k, p in enumerate(progs):
+            shared, own = run.mask(k), p.evaluate(batch)
+            assert np.array_equal(shared, own), p.name
+            assert 0 < own.sum() < batch.n, p.name  # every rule discriminates on this data
+            rows = np.flatnonzero(own)
+            assert p.alerts(batch, rows, run.payload(k)) == p.alerts(batch, rows), p.name
+        assert run.evaluated < Network(progs, 5.0).stats()["unshared_nodes"]
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from skycep.engine.patterns import PatternStore
+
+def _simulate(negs, within, ids, ts, M):
+    # reference: every partial match kept explicitly as (start, state); state j = positive steps matched
+    pos = [i for i, neg in enumerate(negs) if not neg]
+    guards = {j: [g for g in range(pos[j-1]+1, pos[j])] for j in range(1, len(pos))}
+    last = len(pos) - 1; parts = {}; out = np.zeros(len(ts), dtype=bool)
+    for r in range(len(ts)):
+        t = ts[r]; hit = M[r]
+        P = [(s, j) for s, j in parts.get(ids[r], []) if s >= t - within]
+        keep = []; new = []
+        for s, j in P:
+            if hit[pos[j]]:
+                if j == last: out[r] = True; continue
+                new.append((s, j+1))
+            if not any(hit[g] for g in guards[j]): keep.append((s, j))
+        if out[r]: keep = [(s, j) for s, j in keep if j != last]  # the match is consumed with its state
+        if hit[pos[0]]: new.append((t, 1))
+        parts[ids[r]] = keep + new
+    return out
+
+def _run(store, ids, ts, M, cuts):
+    return np.concatenate([store.update(ids[a:b], ts[a:b], list(M[a:b].T)) for a, b in zip(cuts, cuts[1:])])
+
+@pytest.mark.parametrize("negs, p", [
+    ((False, False), (0.1, 0.1)),
+    ((False, True, False), (0.1, 0.05, 0.1)),
+    ((False, False, True, False), (0.08, 0.1, 0.05, 0.1)),
+    ((False, True, True, False, False), (0.1, 0.03, 0.03, 0.15, 0.1)),
+])
+def test_matches_explicit_simulation(negs, p):
+    rng = np.random.default_rng(len(negs))
+    n = 20000
+    ids = np.array([f"F{k}" for k in rng.integers(0, 15, n)], dtype=object)
+    ts = np.round(np.sort(rng.uniform(0, 2000, n)), 1)  # ties and exact `within` edges
+    M = rng.random((n, len(negs))) < np.array(p)
+    store = PatternStore(negs, 20.0)
+    got = _run(store, ids, ts, M, [0, 1, 7, 3000, 3001, 12000, n])
+    ref = _simulate(negs, 20.0, ids, ts, M)
+    assert np.array_equal(got, ref) and ref.sum() > 100 and store.matches == ref.sum()
+    assert store.stats()["partial_matches"] <= len(store.keys)*(sum(not x for x in negs) - 1)
+
+def _one(store, events):
+    # events: (id, ts, step0, step1, ...) -> completing mask
+    ids = np.array([e[0] for e in events], dtype=object); ts = np.array([float(e[1]) for e in events])
+    return store.update(ids, ts, [np.array([bool(e[2+i]) for e in events]) for i in range(len(events[0]) - 2)]).tolist()
+
+def test_not_guard():
+    negs = (False, True, False)  # seq(a, not c, b)
+    assert _one(PatternStore(negs, 10), [("A", 0, 1, 0, 0), ("A", 1, 0, 0, 1)]) == [False, True]
+    assert _one(PatternStore(negs, 10), [("A", 0, 1, 0, 0), ("A", 1, 0, 1, 0), ("A", 2, 0, 0, 1)]) == [False]*3
+    # a start after the guard is unaffected by it
+    assert _one(PatternStore(negs, 10), [("A", 0, 1, 0, 0), ("A", 1, 0, 1, 0), ("A", 2, 1, 0, 0), ("A", 3, 0, 0, 1)])[-1]
+    # the completing event is not "between" the steps, even if it matches the guard too
+    assert _one(PatternStore(negs, 10), [("A", 0, 1, 0, 0), ("A", 1, 0, 1, 1)]) == [False, True]
+    # guards are per id
+    assert _one(PatternStore(negs, 10), [("A", 0, 1, 0, 0), ("B", 1, 0, 1, 0), ("A", 2, 0, 0, 1)])[-1]
+
+def test_within_expiry():
+    assert _one(PatternStore((False, False), 20), [("A", 0, 1, 0), ("A", 20, 0, 1)]) == [False, True]  # inclusive
+    assert _one(PatternStore((False, False), 20), [("A", 0, 1, 0), ("A", 20.01, 0, 1)]) == [False, False]
+    # a later start keeps the pattern alive after the first one expired
+    assert _one(PatternStore((False, False), 20), [("A", 0, 1, 0), ("A", 15, 1, 0), ("A", 30, 0, 1)])[-1]
+    # span counts from the first step, not from the middle one
+    s3 = PatternStore((False, False, False), 20)
+    assert _one(s3, [("A", 0, 1, 0, 0), ("A", 19, 0, 1, 0), ("A", 21, 0, 0, 1)]) == [False]*3
+    store = PatternStore((False, False), 20)
+    _one(store, [("A", 0, 1, 0)])
+    _one(store, [("B", 25, 1, 0)])  # clock 25: A's only start is expired, so the key goes
+    assert list(store.keys) == ["B"] and store.evicted == 1
+
+def test_fire_once_consumption():
+    s = PatternStore((False, False), 10)
+    assert _one(s, [("A", 0, 1, 0), ("A", 1, 0, 1), ("A", 2, 0, 1)]) == [False, True, False]
+    assert not s.keys and s.matches == 1  # nothing left for A
+    # two starts waiting in the same state complete together, once
+    s = PatternStore((False, False), 10)
+    assert _one(s, [("A", 0, 1, 0), ("A", 1, 1, 0), ("A", 2, 0, 1), ("A", 3, 0, 1)]) == [False, False, True, False]
+    # a step event both completes and restarts: b == a here
+    s = PatternStore((False, False), 10)
+    assert _one(s, [("A", 0, 1, 1), ("A", 1, 1, 1), ("A", 2, 1, 1)]) == [False, True, True]
+    # an event advances a partial match by one step only
+    s = PatternStore((False, False, False), 10)
+    assert _one(s, [("A", 0, 1, 1, 1), ("A", 1, 1, 1, 1), ("A", 2, 1, 1, 1)]) == [False, False, True]
+
+def test_max_keys_and_stats():
+    s = PatternStore((False, False), 100, max_keys=2)
+    _one(s, [("A", 0, 1, 0), ("B", 1, 1, 0), ("C", 2, 1, 0)])
+    assert list(s.keys) == ["B", "C"] and s.evicted == 1
+    assert _one(s, [("A", 3, 0, 1), ("B", 4, 0, 1)]) == [False, True]
+    assert s.stats() == {"within": 100.0, "steps": 2, "keys": 1, "partial_matches": 1, "matches": 1, "evicted": 1}
+    with pytest.raises(ValueError):
+        PatternStore((False, False), 0)
+
+def test_seq_rule_through_the_engine():
+    from skycep.engine.ruleset import compile_rules
+    from skycep.engine.runtime import Engine
+    eng = Engine(window_seconds=10)
+    eng.load_programs(compile_rules("rule eo: seq(eng == 0, not eng == 1, vy < -3) emit vy"))
+    ev = lambda t, i, **d: {"ts": float(t), "id": i, "data": d}
+    out = eng.ingest([ev(0, "A", eng=0, vy=0), ev(1, "B", eng=0, vy=0), ev(2, "B", eng=1, vy=0),
+                      ev(3, "A", eng=0, vy=-4), ev(4, "B", eng=0, vy=-5), ev(15, "A", eng=0, vy=0), ev(26, "A", vy=-9)])
+    out += eng.flush()
+    # A completes at t=3; B's start is killed by eng == 1 and its t=4 event only starts a new one;
+    # A's t=26 event is more than 10s after its latest start (t=15)
+    assert [(a["id"], a["ts"], a["vy"]) for a in out] == [("A", 3.0, -4.0)]
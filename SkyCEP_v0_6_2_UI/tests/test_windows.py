@@ -0,0 +1,101 @@
+import math
+import numpy as np
+import pytest
+from skycep.engine.windows import SlidingWindow, TumblingWindow, WindowStore
+
+FNS = ("avg", "sum", "min", "max", "count")
+
+def _stream(n, seed, n_ids=7, nan=0.15):
+    rng = np.random.default_rng(seed)
+    ts = np.sort(np.round(rng.exponential(0.05, n).cumsum(), 2))  # rounded: ties and exact edges happen
+    ids = rng.choice([f"F{i}" for i in range(n_ids)], n)
+    vals = np.round(rng.normal(0, 10, n), 1); vals[rng.random(n) < nan] = np.nan
+    return ids, ts, vals
+
+def _brute(kind, length, ids, ts, vals):
+    # every event against the plain definition: same id, up to and including the event itself
+    out = {f: np.empty(len(ts)) for f in FNS}
+    for i in range(len(ts)):
+        same = ids[:i+1] == ids[i]
+        if kind == "sliding": inside = same & (ts[:i+1] > ts[i] - length)
+        else: inside = same & (np.floor(ts[:i+1]/length) == math.floor(ts[i]/length))
+        v = vals[:i+1][inside]; v = v[~np.isnan(v)]
+        out["sum"][i] = v.sum(); out["count"][i] = len(v)
+        out["avg"][i] = v.mean() if len(v) else np.nan
+        out["min"][i] = v.min() if len(v) else np.nan
+        out["max"][i] = v.max() if len(v) else np.nan
+    return out
+
+@pytest.mark.parametrize("kind, length", [("sliding", 2.0), ("sliding", 0.5), ("tumbling", 2.0), ("tumbling", 0.3)])
+def test_matches_brute_force(kind, length):
+    ids, ts, vals = _stream(6000, seed=int(length*10))
+    store = WindowStore(kind, length, FNS)
+    got = {f: [] for f in FNS}; cuts = [0, 1, 2, 500, 501, 1700, 4000, 6000]  # uneven batches, some of one event
+    for a, b in zip(cuts, cuts[1:]):
+        res = store.update(ids[a:b], ts[a:b], vals[a:b])
+        for f in FNS: got[f].append(res[f])
+    ref = _brute(kind, length, ids, ts, vals)
+    for f in FNS:
+        np.testing.assert_allclose(np.concatenate(got[f]), ref[f], rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=f)
+
+def test_sliding_window_edges_and_growth():
+    w = SlidingWindow(1.0, extremes=True)
+    for k in range(100): w.push(k*0.01, float(k))  # 100 values held: the ring buffer grows past its 8 slots
+    assert w.held() == 100 and w.values() == (49.5, 4950.0, 0.0, 99.0, 100.0)
+    w.push(1.0, math.nan)  # (0, 1]: the value at t=0 leaves, NaN is not added
+    assert w.held() == 99 and w.values()[1:] == (4950.0, 1.0, 99.0, 99.0)
+    w.push(5.0, 3.0)
+    assert w.held() == 1 and w.values() == (3.0, 3.0, 3.0, 3.0, 1.0)
+    w.push(9.0, math.nan)
+    avg, s, lo, hi, n = w.values()
+    assert math.isnan(avg) and s == 0.0 and math.isnan(lo) and math.isnan(hi) and n == 0.0
+    w.push(8.5, 1.0)  # older than the key's last timestamp: taken as t=9.0
+    assert w.last == 9.0 and w.values()[4] == 1.0
+
+def test_sliding_sum_does_not_drift():
+    w = SlidingWindow(10.0, extremes=False)
+    rng = np.random.default_rng(0); vals = rng.normal(0, 1e6, 50000); vals[::7] *= 1e-9
+    for k, v in enumerate(vals): w.push(k*0.01, float(v))
+    held = vals[-w.held():]
+    assert w.held() == 1000 and abs(w.values()[1] - math.fsum(held)) < 1e-6
+
+def test_tumbling_buckets():
+    w = TumblingWindow(5.0, extremes=True)
+    w.push(4.9, 2.0); w.push(4.99, -1.0)
+    assert w.values() == (0.5, 1.0, -1.0, 2.0, 2.0)
+    w.push(5.0, 7.0)  # bucket [5, 10) starts at exactly 5.0
+    assert w.bucket == 1 and w.values() == (7.0, 7.0, 7.0, 7.0, 1.0)
+    w.push(12.0, math.nan)
+    avg, s, lo, hi, n = w.values()
+    assert math.isnan(avg) and s == 0.0 and math.isnan(lo) and math.isnan(hi) and n == 0.0 and w.held() == 0
+
+def test_only_requested_functions_and_non_numbers():
+    store = WindowStore("sliding", 5.0, {"avg", "count"})
+    out = store.update(np.array(["A"]*4, dtype=object), np.array([0.0, 1.0, 2.0, 3.0]),
+                       np.array([1, "x", None, 3.0], dtype=object))
+    assert set(out) == {"avg", "count"} and not store.keys["A"].lo  # no min/max: no deques kept
+    assert out["count"].tolist() == [1, 1, 1, 2] and out["avg"].tolist() == [1, 1, 1, 2]
+    assert store.update(np.array(["B"]), np.array([4.0]), 1.5)["count"].tolist() == [1]  # scalar broadcast
+
+def test_idle_keys_are_evicted():
+    store = WindowStore("sliding", 2.0, ["sum"])
+    store.update(np.array(["A", "B"]), np.array([0.0, 1.0]), np.array([1.0, 2.0]))
+    assert list(store.keys) == ["A", "B"]
+    store.update(np.array(["B"]), np.array([2.0]), np.array([3.0]))  # clock 2.0: A's last event is exactly length ago
+    assert list(store.keys) == ["B"] and store.evicted == 1
+    out = store.update(np.array(["A"]), np.array([2.5]), np.array([4.0]))
+    assert out["sum"].tolist() == [4.0]  # a fresh window, nothing left over from t=0
+    assert store.stats() == {"kind": "sliding", "seconds": 2.0, "keys": 2, "values": 3, "evicted": 1}
+
+def test_max_keys_drops_least_recently_updated():
+    store = WindowStore("tumbling", 100.0, ["count"], max_keys=3)
+    store.update(np.array(["A", "B", "C", "A", "D"]), np.arange(5.0), np.ones(5))
+    assert list(store.keys) == ["C", "A", "D"] and store.evicted == 1
+    out = store.update(np.array(["B", "A"]), np.array([5.0, 6.0]), np.ones(2))
+    assert out["count"].tolist() == [1, 3] and list(store.keys) == ["D", "B", "A"] and store.evicted == 2
+
+def test_rejects_bad_specs():
+    with pytest.raises(ValueError):
+        WindowStore("hopping", 1.0, ["sum"])
+    with pytest.raises(ValueError):
+        WindowStore("sliding", 0.0, ["sum"])